@@ -0,0 +1,186 @@
+"""
+GrowPak Precomputed KB Answers
+Urdu renderings + TTS audio for every KB answer, prepared offline by
+pregenerate_answers.py and served directly when retrieval is decisive
+(top hit very similar AND clearly ahead of the runner-up), skipping the
+Groq generation call and Google TTS entirely.
+
+Artifact layout (KB_ANSWERS_DIR):
+  answers.bin       concatenated UTF-8 answers and MP3 bytes (memory-mapped)
+  answers.idx.json  {key: [text_offset, text_len, audio_offset, audio_len]}
+"""
+
+import os
+import json
+import mmap
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ─────────────────────────────────────────────────────────────
+# CONFIG  (override via environment variables)
+# ─────────────────────────────────────────────────────────────
+KB_ANSWERS_DIR           = os.getenv("KB_ANSWERS_DIR", "./kb_answers")
+DIRECT_ANSWER_MIN_SIM    = float(os.getenv("DIRECT_ANSWER_MIN_SIM", "0.80"))
+DIRECT_ANSWER_MIN_MARGIN = float(os.getenv("DIRECT_ANSWER_MIN_MARGIN", "0.08"))
+
+ARTIFACT_FILE   = "answers.bin"
+INDEX_FILE      = "answers.idx.json"
+CHECKPOINT_FILE = "checkpoint.jsonl"   # pregenerate_answers.py working state
+STAGING_SUBDIR  = "staging"
+
+AUDIO_CACHE_DIR = os.path.join(tempfile.gettempdir(), "growpak_kb_audio")
+
+
+def answer_key(question: str, answer: str) -> str:
+    """Stable id for a KB row, independent of Chroma document ids."""
+    digest = hashlib.sha1(f"{question.strip()}\n{answer.strip()}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def is_decisive(rag_results: List[Dict],
+                min_sim: float = DIRECT_ANSWER_MIN_SIM,
+                min_margin: float = DIRECT_ANSWER_MIN_MARGIN) -> bool:
+    """True when the top hit is similar enough and well ahead of the second."""
+    if not rag_results:
+        return False
+    top    = rag_results[0]["similarity"]
+    second = rag_results[1]["similarity"] if len(rag_results) > 1 else 0.0
+    return top >= min_sim and (top - second) >= min_margin
+
+
+def pack_artifact(base_dir: str, rows: Iterable[Dict]) -> Tuple[int, int]:
+    """
+    Pack checkpoint rows ({"key", "urdu", "audio": staged path|None}) into
+    answers.bin + answers.idx.json. Files are written under temporary names
+    and renamed, so a running server never sees a half-written artifact.
+    Returns (entries, bytes).
+    """
+    bin_path = os.path.join(base_dir, ARTIFACT_FILE)
+    idx_path = os.path.join(base_dir, INDEX_FILE)
+    index, offset = {}, 0
+
+    with open(bin_path + ".tmp", "wb") as out:
+        for row in rows:
+            text = row["urdu"].encode("utf-8")
+            audio = b""
+            if row.get("audio"):
+                audio_path = os.path.join(base_dir, row["audio"])
+                if os.path.exists(audio_path):
+                    with open(audio_path, "rb") as f:
+                        audio = f.read()
+            out.write(text)
+            out.write(audio)
+            index[row["key"]] = [offset, len(text), offset + len(text), len(audio)]
+            offset += len(text) + len(audio)
+
+    with open(idx_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(bin_path + ".tmp", bin_path)
+    os.replace(idx_path + ".tmp", idx_path)
+    return len(index), offset
+
+
+class PrecomputedAnswers:
+    """Memory-maps the answers artifact and serves lookups + hit-rate stats."""
+
+    def __init__(self, base_dir: str = KB_ANSWERS_DIR):
+        self.base_dir = base_dir
+        self._entries = None
+        self._data    = None
+        self._version = 0
+        self._lock    = threading.Lock()
+        self._stats   = {"lookups": 0, "decisive": 0, "hits": 0, "direct_hits": 0}
+
+    def load(self):
+        """Map the artifact into memory (called from pipeline._init at startup)."""
+        entries, data = {}, None
+        bin_path = os.path.join(self.base_dir, ARTIFACT_FILE)
+        idx_path = os.path.join(self.base_dir, INDEX_FILE)
+        version = 0
+        if os.path.exists(idx_path) and os.path.exists(bin_path) and os.path.getsize(bin_path) > 0:
+            with open(idx_path, encoding="utf-8") as f:
+                entries = json.load(f)
+            with open(bin_path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            version = int(os.path.getmtime(bin_path))
+        with self._lock:
+            self._entries, self._data, self._version = entries, data, version
+        print(f"[KB] Mapped {len(entries)} precomputed answers from {bin_path}")
+
+    @property
+    def entries(self) -> Dict[str, List[int]]:
+        if self._entries is None:
+            self.load()
+        return self._entries
+
+    def _audio_path(self, key: str, offset: int, length: int) -> str:
+        """WhatsApp upload needs a file; write each clip out once and reuse it."""
+        path = os.path.join(AUDIO_CACHE_DIR, f"{key}-{self._version}.mp3")
+        if not os.path.exists(path):
+            os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(self._data[offset:offset + length])
+            os.replace(path + ".tmp", path)
+        return path
+
+    def get(self, question: str, answer: str) -> Optional[Dict]:
+        """Return {"urdu": str, "audio": path|None} for a KB row, if prepared."""
+        key = answer_key(question, answer)
+        loc = self.entries.get(key)
+        if loc is None:
+            return None
+        t_off, t_len, a_off, a_len = loc
+        urdu  = self._data[t_off:t_off + t_len].decode("utf-8")
+        audio = self._audio_path(key, a_off, a_len) if a_len else None
+        return {"urdu": urdu, "audio": audio}
+
+    def direct_answer(self, rag_results: List[Dict]) -> Optional[Dict]:
+        """Precomputed answer for the top hit if the confidence rule fires."""
+        with self._lock:
+            self._stats["lookups"] += 1
+        if not is_decisive(rag_results):
+            return None
+        with self._lock:
+            self._stats["decisive"] += 1
+        top = rag_results[0]
+        hit = self.get(top["question"], top["answer"])
+        if hit is not None:
+            with self._lock:
+                self._stats["hits"] += 1
+        return hit
+
+    def text_answer(self, rag_results: List[Dict], min_sim: float) -> Optional[Dict]:
+        """
+        Precomputed answer for a typed question whose top hit is a near-exact
+        match (similarity >= min_sim). Called after direct_answer missed for
+        the same lookup, so a hit here counts as a direct hit.
+        """
+        if not rag_results or rag_results[0]["similarity"] < min_sim:
+            return None
+        top = rag_results[0]
+        hit = self.get(top["question"], top["answer"])
+        if hit is not None:
+            with self._lock:
+                self._stats["direct_hits"] += 1
+        return hit
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = dict(self._stats)
+        served = out["hits"] + out["direct_hits"]
+        out["hit_rate"]      = round(served / out["lookups"], 4) if out["lookups"] else 0.0
+        out["prepared"]      = len(self._entries) if self._entries is not None else None
+        out["min_sim"]       = DIRECT_ANSWER_MIN_SIM
+        out["min_margin"]    = DIRECT_ANSWER_MIN_MARGIN
+        return out
+
+
+_answers = None
+
+def get_answers() -> PrecomputedAnswers:
+    global _answers
+    if _answers is None:
+        _answers = PrecomputedAnswers()
+    return _answers
@@ -0,0 +1,385 @@
+"""
+GrowPak LLM client
+Every Groq completion goes through LLMClient, which bounds how long a
+webhook worker can wait on the LLM:
+
+  deadline   each call has a total budget (LLM_DEADLINE); every attempt gets
+             at most LLM_TIMEOUT of it.
+  retries    429 and 5xx (plus timeouts and dropped connections) are retried
+             with full-jitter exponential backoff, honouring Retry-After.
+  hedging    once a request has been pending for the recent p95 latency, a
+             second identical request is fired and whichever answers first
+             wins (LLM_HEDGE=1).
+  breaker    after LLM_BREAKER_FAILURES consecutive failed calls the circuit
+             opens for LLM_BREAKER_COOLDOWN seconds; calls then fail at once
+             with LLMUnavailable and the pipeline falls back to the KB answer.
+             One trial call is let through after the cooldown.
+  early stop with stop=..., the completion is streamed and closed as soon
+             as the caller has what it needs (stop_after_json for the query
+             enhancer, stop_after_sentences(2) for answers), so the rest of
+             the reply is never generated or billed.
+
+stats() reports latency percentiles, token usage and the counters above
+(served on /stats). Streams closed early never get Groq's usage block, so
+their prompt tokens are estimated from the message length; the estimated
+share is reported as "estimated_prompt_tokens".
+"""
+
+import os
+import re
+import json
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Tuple
+
+import groq
+from groq import Groq
+
+# ─────────────────────────────────────────────────────────────
+# CONFIG  (override via environment variables)
+# ─────────────────────────────────────────────────────────────
+LLM_TIMEOUT          = float(os.getenv("LLM_TIMEOUT", "8"))
+LLM_DEADLINE         = float(os.getenv("LLM_DEADLINE", "15"))
+LLM_MAX_RETRIES      = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE     = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_HEDGE            = os.getenv("LLM_HEDGE", "1") == "1"
+LLM_HEDGE_MIN_DELAY  = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+LATENCY_WINDOW     = 500   # recent successful calls kept for percentiles
+HEDGE_MIN_SAMPLES  = 20    # no hedging until p95 is meaningful
+RETRYABLE_STATUS   = {408, 409, 429, 500, 502, 503, 504}
+CHARS_PER_TOKEN    = 3     # rough; Urdu script tokenises denser than English
+TOKENS_PER_MESSAGE = 4     # chat template overhead
+
+
+class LLMError(RuntimeError):
+    """The LLM call failed (after retries) or ran out of its deadline."""
+
+
+class LLMUnavailable(LLMError):
+    """The circuit breaker is open; no request was sent."""
+
+
+def _retryable(exc: Exception) -> bool:
+    if isinstance(exc, (TimeoutError, groq.APIConnectionError)):
+        return True
+    return isinstance(exc, groq.APIStatusError) and exc.status_code in RETRYABLE_STATUS
+
+
+def _client_side(exc: Exception) -> bool:
+    """Bad arguments rejected locally before any request was sent."""
+    return isinstance(exc, (TypeError, ValueError)) and not isinstance(exc, groq.GroqError)
+
+
+def _estimate_tokens(messages: List[Dict]) -> int:
+    return sum(TOKENS_PER_MESSAGE + len(str(m.get("content", ""))) // CHARS_PER_TOKEN for m in messages)
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# ─────────────────────────────────────────────────────────────
+# Early stop conditions for streamed completions
+# ─────────────────────────────────────────────────────────────
+SENTENCE_END = re.compile(r"[.!?](?=\s)|[۔؟]")
+
+
+def stop_after_json(text: str) -> Optional[str]:
+    """Text up to the end of the first complete JSON object, once it parses."""
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                candidate = text[:i + 1]
+                try:
+                    json.loads(text[start:i + 1])
+                except ValueError:
+                    return None
+                return candidate
+    return None
+
+
+def stop_after_sentences(n: int) -> Callable[[str], Optional[str]]:
+    """Stop condition: text up to the n-th sentence terminator (. ! ? ۔ ؟)."""
+    def stop(text: str) -> Optional[str]:
+        for count, match in enumerate(SENTENCE_END.finditer(text), 1):
+            if count == n:
+                return text[:match.end()]
+        return None
+    return stop
+
+
+class CircuitBreaker:
+    """closed → open after `failures` consecutive failures → half-open after `cooldown`."""
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.failures  = failures
+        self.cooldown  = cooldown
+        self._errors   = 0
+        self._opened_at = None
+        self._trial    = False
+        self.opened    = 0
+        self._lock     = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.time() - self._opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.time() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True   # one probe call while half-open
+            return True
+
+    def release(self):
+        """End a call without a verdict (nothing was sent): free the half-open trial slot."""
+        with self._lock:
+            self._trial = False
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._trial = False
+            if ok:
+                self._errors, self._opened_at = 0, None
+                return
+            self._errors += 1
+            if self._opened_at is not None or self._errors >= self.failures:
+                if self._opened_at is None:
+                    self.opened += 1
+                    print(f"[LLM] Circuit open after {self._errors} failures — "
+                          f"falling back for {self.cooldown:.0f}s")
+                self._opened_at = time.time()
+
+
+class LLMClient:
+    def __init__(self, api_key: str, model: str):
+        # retries are ours; the SDK's own would ignore the deadline
+        self._client  = Groq(api_key=api_key, max_retries=0, timeout=LLM_TIMEOUT)
+        self.model    = model
+        self.breaker  = CircuitBreaker()
+        self._pool    = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm")
+        self._latency = deque(maxlen=LATENCY_WINDOW)
+        self._lock    = threading.Lock()
+        self._stats   = {"calls": 0, "ok": 0, "failed": 0, "rejected": 0, "retries": 0,
+                         "hedges": 0, "hedge_wins": 0, "timeouts": 0, "early_stops": 0,
+                         "prompt_tokens": 0, "completion_tokens": 0, "estimated_prompt_tokens": 0}
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+
+    def hedge_delay(self) -> Optional[float]:
+        """Recent p95 latency, or None while there are too few samples."""
+        with self._lock:
+            samples = list(self._latency)
+        if not LLM_HEDGE or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(LLM_HEDGE_MIN_DELAY, _percentile(samples, 0.95))
+
+    # --------------------------
+    # One attempt (maybe hedged)
+    # --------------------------
+    def _request(self, messages: List[Dict], timeout: float, stop: Optional[Callable],
+                 cancel: threading.Event, **params) -> Tuple[str, int, int, bool]:
+        """
+        (text, prompt_tokens, completion_tokens, estimated) for one request;
+        estimated is True when Groq reported no usage and the prompt tokens
+        were estimated from the messages.
+        """
+        if stop is None:
+            completion = self._client.chat.completions.create(
+                model=self.model, messages=messages, timeout=timeout, **params)
+            usage = completion.usage
+            if usage is None:
+                return completion.choices[0].message.content, _estimate_tokens(messages), 0, True
+            return completion.choices[0].message.content, usage.prompt_tokens, usage.completion_tokens, False
+
+        # streamed: hand the text so far to `stop` after every delta and close
+        # the connection as soon as it has what it needs (or another attempt won)
+        end = time.time() + timeout
+        stream = self._client.chat.completions.create(
+            model=self.model, messages=messages, timeout=timeout, stream=True, **params)
+        text, tokens, usage = "", 0, None
+        try:
+            for chunk in stream:
+                if cancel.is_set():
+                    break
+                if time.time() > end:
+                    raise TimeoutError(f"stream not finished within {timeout:.1f}s")
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                    usage = x_groq.usage
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                text += chunk.choices[0].delta.content
+                tokens += 1   # Groq streams about one token per delta
+                cut = stop(text)
+                if cut is not None:
+                    # closed before the final chunk, which carries the usage
+                    self._count("early_stops")
+                    return cut, _estimate_tokens(messages), tokens, True
+        finally:
+            stream.response.close()
+        if usage is not None and usage.prompt_tokens:
+            return text, usage.prompt_tokens, usage.completion_tokens or tokens, False
+        return text, _estimate_tokens(messages), tokens, True
+
+    def _attempt(self, messages: List[Dict], budget: float, stop: Optional[Callable], **params):
+        timeout = min(LLM_TIMEOUT, budget)
+        start   = time.time()
+        cancel  = threading.Event()
+        primary = self._pool.submit(self._request, messages, timeout, stop, cancel, **params)
+        pending = {primary}
+
+        delay = self.hedge_delay()
+        if delay is not None and delay < timeout:
+            done, _ = wait(pending, timeout=delay)
+            if not done:
+                self._count("hedges")
+                pending.add(self._pool.submit(self._request, messages, timeout - delay, stop, cancel, **params))
+
+        error = None
+        try:
+            while pending:
+                remaining = timeout - (time.time() - start)
+                done, pending = wait(pending, timeout=max(0.0, remaining), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if future is not primary:
+                        self._count("hedge_wins")
+                    return result, time.time() - start
+        finally:
+            # streams still running stop at their next delta; plain requests
+            # finish in the background, bounded by their timeout
+            cancel.set()
+        raise error or TimeoutError(f"no response within {timeout:.1f}s")
+
+    # --------------------------
+    # Public API
+    # --------------------------
+    def complete(self, messages: List[Dict], deadline: float = LLM_DEADLINE,
+                 stop: Optional[Callable[[str], Optional[str]]] = None, **params) -> str:
+        """
+        Chat completion text. With `stop` the completion is streamed and
+        `stop(text_so_far)` is checked after every delta: the first non-None
+        value it returns is the result and the stream is closed (see
+        stop_after_json / stop_after_sentences).
+        Raises LLMUnavailable when the breaker is open and LLMError once
+        retries or the deadline are used up.
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise LLMUnavailable("LLM circuit open")
+
+        end = time.time() + deadline
+        last_error = None
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            budget = end - time.time()
+            if budget <= 0:
+                break
+            try:
+                (text, prompt_tokens, completion_tokens, estimated), latency = \
+                    self._attempt(messages, budget, stop, **params)
+            except Exception as e:
+                last_error = e
+                if isinstance(e, (TimeoutError, groq.APITimeoutError)):
+                    self._count("timeouts")
+                if _client_side(e) or not _retryable(e) or attempt == LLM_MAX_RETRIES:
+                    break
+                # full jitter, but never sleep past the deadline
+                backoff = _retry_after(e) or random.uniform(0, LLM_BACKOFF_BASE * 2 ** attempt)
+                if time.time() + backoff >= end:
+                    break
+                print(f"[LLM] {type(e).__name__}, retrying in {backoff:.1f}s "
+                      f"(attempt {attempt + 1}/{LLM_MAX_RETRIES})")
+                self._count("retries")
+                time.sleep(backoff)
+                continue
+
+            self.breaker.record(True)
+            with self._lock:
+                self._latency.append(latency)
+                self._stats["ok"] += 1
+                self._stats["prompt_tokens"]     += prompt_tokens
+                self._stats["completion_tokens"] += completion_tokens
+                if estimated:
+                    self._stats["estimated_prompt_tokens"] += prompt_tokens
+            return text.strip()
+
+        if last_error is not None and _client_side(last_error):
+            # our own bad arguments, raised before anything reached Groq
+            self.breaker.release()
+        else:
+            self.breaker.record(False)
+        self._count("failed")
+        raise LLMError(f"LLM call failed: {last_error or 'deadline exceeded'}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = dict(self._stats)
+            samples = list(self._latency)
+        for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            value = _percentile(samples, q)
+            out[f"latency_{name}"] = round(value, 3) if value is not None else None
+        out["hedge_delay"]    = self.hedge_delay()
+        out["breaker"]        = self.breaker.state
+        out["breaker_opened"] = self.breaker.opened
+        return out
+
+
+_client = None
+
+def get_client(api_key: Optional[str] = None, model: Optional[str] = None) -> LLMClient:
+    """Shared client; the arguments only matter on the first call (pipeline._init)."""
+    global _client
+    if _client is None:
+        _client = LLMClient(api_key or os.getenv("GROQ_API_KEY"),
+                            model or os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"))
+    return _client
@@ -0,0 +1,215 @@
+"""
+Mine Roman Urdu spelling variants for roman_urdu.py.
+
+    python mine_roman_variants.py
+    python mine_roman_variants.py --transcripts ../stt-finetune/Inference --excel ../rag/RAG_knowledgeBase.xlsx
+
+Reads every Roman transcript in the stt-finetune CSV / Excel files
+(ground_truth, prediction, transcript and text columns) plus the KB
+questions, and groups spellings of the same word three ways:
+
+  fold      words with the same roman_urdu.fold() key (kapaas/kapas)
+  vowels    words of 5+ letters one dropped vowel or one a/e, e/i, o/u swap
+            apart once folded (fasal/fasl, rehnumai/rahnumai)
+  aligned   shorter pairs that pass the same vowel test, when the model
+            wrote one where the reference had the other at least
+            --min-pair-count times (ground truth vs prediction columns)
+
+Each group's canonical form is the spelling the KB uses, else the most
+frequent one; words seen fewer than --min-count times are ignored. Words
+that occur in the (English) KB answers are never rewritten, which keeps
+English and chemical names intact; they are saved as "protected" so that
+roman_urdu.normalize() also skips them when they merely share a folded
+key with a mined variant.
+Writes roman_urdu_variants.json; the server loads it at startup.
+"""
+
+import os
+import re
+import json
+import argparse
+import difflib
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from roman_urdu import ROMAN_URDU_VARIANTS_PATH, BUILTIN_VARIANTS, fold
+
+TEXT_COLUMNS = ("ground_truth", "prediction", "transcript", "text", "roman", "QUESTION")
+WORD = re.compile(r"[a-z]+")
+VOWELS = re.compile(r"[aeiouyhw]")
+
+
+def words(text) -> List[str]:
+    return WORD.findall(str(text).lower()) if isinstance(text, str) else []
+
+
+def skeleton(word: str) -> str:
+    """Consonant outline; a final vowel is kept apart (jaan ≠ jana)."""
+    if not word:
+        return word
+    return word[0] + VOWELS.sub("", word[1:]) + ("-" if word[-1] in "aeiouy" else "")
+
+
+def edit_distance(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+# ─────────────────────────────────────────────────────────────
+# SOURCES
+# ─────────────────────────────────────────────────────────────
+def read_table(path: str):
+    import pandas as pd
+
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    return pd.read_excel(path)
+
+
+def transcript_tables(folder: str) -> Iterable[Tuple[str, object]]:
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.endswith((".csv", ".xlsx")) and not name.startswith("~$"):
+                path = os.path.join(root, name)
+                try:
+                    yield path, read_table(path)
+                except Exception as e:
+                    print(f"⚠️  Skipping {path}: {e}")
+
+
+def aligned_pairs(reference: List[str], hypothesis: List[str]) -> Iterable[Tuple[str, str]]:
+    """One-for-one word substitutions between a reference and a hypothesis."""
+    matcher = difflib.SequenceMatcher(a=reference, b=hypothesis, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "replace" and i2 - i1 == j2 - j1:
+            yield from zip(reference[i1:i2], hypothesis[j1:j2])
+
+
+# ─────────────────────────────────────────────────────────────
+# MINING
+# ─────────────────────────────────────────────────────────────
+# vowel swaps that are spelling, not meaning (rehnumai/rahnumai, behtar/behter);
+# a↔i or u↔i change the word (kahan/kahin, pachas/pachis)
+SPELLING_SWAPS = {frozenset("ae"), frozenset("ei"), frozenset("ou")}
+# an "a" before a verb ending is the causative, not a spelling (lagte/lagate, barhta/barhata)
+VERB_ENDINGS = ("ta", "te", "ti", "tay", "na", "ne", "ni", "nay", "ya", "ye", "yi", "o", "ein", "en", "ega", "egi", "enge")
+
+
+def vowel_variant(fa: str, fb: str) -> bool:
+    """
+    Folded words one spelling-only vowel swap or one dropped short vowel
+    apart. Only between consonants: a word-final vowel marks gender/number
+    (karna/karne), and a vowel next to another changes the word (jaega/jaga).
+    """
+    def between_consonants(word, i):
+        return 0 < i < len(word) - 1 and word[i - 1] not in "aeiou" and word[i + 1] not in "aeiou"
+
+    if len(fa) == len(fb):
+        diff = [i for i, (x, y) in enumerate(zip(fa, fb)) if x != y]
+        return (len(diff) == 1 and frozenset((fa[diff[0]], fb[diff[0]])) in SPELLING_SWAPS
+                and between_consonants(fa, diff[0]))
+    short, long_ = sorted((fa, fb), key=len)
+    if len(long_) - len(short) != 1:
+        return False
+    return any(long_[i] in "aeiou" and between_consonants(long_, i) and long_[:i] + long_[i + 1:] == short
+               and not (long_[i] == "a" and long_[i + 1:] in VERB_ENDINGS)
+               for i in range(len(long_)))
+
+
+def similar(a: str, b: str, min_len: int = 5) -> bool:
+    """Same fold key, or words of min_len+ letters that are vowel variants of each other."""
+    fa, fb = fold(a), fold(b)
+    if fa == fb:
+        return True
+    return min(len(a), len(b)) >= min_len and skeleton(fa) == skeleton(fb) and vowel_variant(fa, fb)
+
+
+def mine(counts: Counter, kb_counts: Counter, protected: set, pairs: Counter,
+         min_count: int, min_pair_count: int) -> Dict[str, str]:
+    """
+    Variant → canonical. Words are visited from most to least preferred
+    (KB spelling, then frequency); each one either becomes a canonical form
+    or is attached directly to the first canonical it is similar to, so
+    groups never chain through intermediate spellings.
+    """
+    candidates = [w for w, c in counts.items() if c >= min_count and len(w) >= 3 and w not in protected]
+    candidates.sort(key=lambda w: (-kb_counts[w], -counts[w], len(w), w))
+
+    # aligned substitutions vouch for shorter pairs the length limit skips;
+    # most are recognition errors, so they must still be vowel variants
+    vouched = defaultdict(set)
+    for (a, b), c in pairs.items():
+        if c >= min_pair_count and similar(a, b, min_len=3):
+            vouched[a].add(b)
+            vouched[b].add(a)
+
+    by_skeleton = defaultdict(list)   # skeleton → canonical forms so far
+    variants = {}
+    for w in candidates:
+        key = skeleton(fold(w))
+        target = next((c for c in by_skeleton[key] if similar(w, c) or c in vouched[w]), None)
+        if target is None:
+            by_skeleton[key].append(w)
+        else:
+            variants[w] = target
+    return variants
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Mine Roman Urdu spelling variants from transcripts and the KB.")
+    parser.add_argument("--transcripts", action="append",
+                        default=None, help="Folder with transcript CSV/Excel files (repeatable).")
+    parser.add_argument("--excel", default=os.path.join(here, "..", "rag", "RAG_knowledgeBase.xlsx"))
+    parser.add_argument("--out", default=ROMAN_URDU_VARIANTS_PATH)
+    parser.add_argument("--min-count", type=int, default=2, help="Ignore rarer words (likely typos).")
+    parser.add_argument("--min-pair-count", type=int, default=2, help="Aligned substitutions needed.")
+    args = parser.parse_args()
+    folders = args.transcripts or [os.path.join(here, "..", "stt-finetune", "Inference")]
+
+    counts, pairs = Counter(), Counter()
+    for folder in folders:
+        for path, df in transcript_tables(folder):
+            columns = [c for c in TEXT_COLUMNS if c in df.columns]
+            for column in columns:
+                for text in df[column]:
+                    counts.update(words(text))
+            if "ground_truth" in df.columns and "prediction" in df.columns:
+                for ref, hyp in zip(df["ground_truth"], df["prediction"]):
+                    pairs.update(aligned_pairs(words(ref), words(hyp)))
+            print(f"📂 {path}: {len(df)} rows ({', '.join(columns) or 'no text columns'})")
+
+    kb_counts, protected = Counter(), set()
+    if os.path.exists(args.excel):
+        kb = read_table(args.excel)
+        for text in kb.get("QUESTION", []):
+            kb_counts.update(words(text))
+        for text in kb.get("ANSWER", []):
+            protected.update(words(text))
+        # hand-written variants are deliberate (paani → pani), even in answers
+        protected -= set(BUILTIN_VARIANTS)
+        counts.update(kb_counts)
+        print(f"📂 {args.excel}: {len(kb)} KB rows, {len(protected)} protected answer words")
+
+    variants = mine(counts, kb_counts, protected, pairs, args.min_count, args.min_pair_count)
+    # built-in entries are applied first at load time; don't repeat them
+    builtin = {fold(k) for k in BUILTIN_VARIANTS}
+    variants = {w: c for w, c in sorted(variants.items()) if fold(w) not in builtin}
+
+    with open(args.out + ".tmp", "w", encoding="utf-8") as f:
+        out_dir = os.path.dirname(os.path.abspath(args.out))
+        sources = [os.path.relpath(os.path.abspath(p), out_dir) for p in folders + [args.excel]]
+        json.dump({"sources": sources, "words": len(counts), "variants": variants,
+                   "protected": sorted(protected)}, f, ensure_ascii=False, indent=1)
+    os.replace(args.out + ".tmp", args.out)
+    print(f"✅ {len(variants)} variants over {len(set(variants.values()))} words, "
+          f"{len(protected)} protected → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
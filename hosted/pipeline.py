@@ -1,14 +1,17 @@
 """
 GrowPak Agriculture Pipeline
-STT  : Fine-tuned Whisper via Hugging Face Inference API (no local model needed)
+STT  : Fine-tuned Whisper via Hugging Face Inference API (no local model needed),
+       or locally with the long-form engine from stt-finetune (STT_BACKEND=local)
 LLM  : Groq API  (query enhancement + response generation)
 RAG  : ChromaDB  (persistent vector store)
 TTS  : Google Cloud TTS (Urdu WaveNet)
 """
 
 import os
+import sys
 import json
 import time
+import threading
 import base64
 import warnings
 import tempfile
@@ -19,7 +22,14 @@ from typing import Dict, List, Optional
 import requests
 import chromadb
 from sentence_transformers import SentenceTransformer
-from groq import Groq
+
+from kb_answers import get_answers
+from query_classifier import get_classifier
+from query_cache import get_query_cache
+from roman_urdu import normalize as normalize_roman
+from reranker import get_reranker, RERANK, RERANK_CANDIDATES, RERANK_THRESHOLD, RERANK_CONTEXTS
+from llm_client import (get_client, stop_after_json, stop_after_sentences,
+                        LLMUnavailable, LLM_DEADLINE, LLM_HEDGE)
 
 warnings.filterwarnings("ignore")
 
@@ -36,6 +46,31 @@ GROQ_API_KEY     = os.getenv("GROQ_API_KEY")
 GROQ_MODEL       = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 GOOGLE_TTS_API_KEY = os.getenv("GOOGLE_TTS_API_KEY")
 SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.55"))
+# How often (seconds) to check kb_manifest.json for a rebuilt index
+KB_RELOAD_INTERVAL = float(os.getenv("KB_RELOAD_INTERVAL", "30"))
+KB_MANIFEST_PATH   = os.path.join(CHROMA_DB_PATH, "kb_manifest.json")
+# Typed questions whose top KB hit is at least this similar are answered
+# straight from the KB, skipping the response-generation LLM call.
+TEXT_DIRECT_THRESHOLD = float(os.getenv("TEXT_DIRECT_THRESHOLD", "0.85"))
+
+# Speech-to-text backend: "hf" (Inference API) or "local", which runs the
+# long-form engine from stt-finetune/growpak_stt in-process (VAD chunking,
+# one batched generate per voice note). Local needs torch, transformers and
+# ffmpeg on the host; they are not in requirements.txt.
+STT_BACKEND          = os.getenv("STT_BACKEND", "hf")
+GROWPAK_STT_PATH     = os.getenv("GROWPAK_STT_PATH", "../stt-finetune")
+LOCAL_STT_MODEL      = os.getenv("LOCAL_STT_MODEL", HF_MODEL_ID)
+LOCAL_STT_PRECISION  = os.getenv("LOCAL_STT_PRECISION", "int8")
+LOCAL_STT_BATCH      = int(os.getenv("LOCAL_STT_BATCH", "8"))
+# our checkpoints were fine-tuned without timestamp tokens; opt in only for ones that were
+LOCAL_STT_TIMESTAMPS = os.getenv("LOCAL_STT_TIMESTAMPS", "0") == "1"
+# LOCAL_STT_DUAL=1 decodes each voice note twice from one encoder pass:
+# Urdu script (shown to the farmer) and Roman Urdu (used for retrieval).
+# It requires LOCAL_STT_ADAPTERS ("urdu=dir,roman=dir", LoRA adapters
+# exported by training/train_*.py) over one resident base model; prompting
+# a single checkpoint with "en" gives English, not Roman Urdu.
+LOCAL_STT_DUAL       = os.getenv("LOCAL_STT_DUAL", "0") == "1"
+LOCAL_STT_ADAPTERS   = os.getenv("LOCAL_STT_ADAPTERS", "")
 
 AUDIO_OUT_DIR = "./audio_responses"
 os.makedirs(AUDIO_OUT_DIR, exist_ok=True)
@@ -49,6 +84,10 @@ _embedding_model = None
 _groq_client     = None
 _hf_asr_url      = None
 _hf_headers      = None
+_kb_manifest_mtime = None
+_kb_checked_at     = 0.0
+_local_stt       = None
+_local_stt_lock  = threading.Lock()
 
 def _init():
     """Initialise all singletons on first use."""
@@ -63,27 +102,71 @@ def _init():
     print("=" * 60)
 
     print("  Loading ChromaDB...")
-    _chroma_client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
-    _collection    = _chroma_client.get_collection(name=COLLECTION_NAME)
-    print(f"  ✅ ChromaDB: {_collection.count()} documents")
+    reload_knowledge_base()
 
     print("  Loading embedding model...")
     _embedding_model = SentenceTransformer(EMBEDDING_MODEL)
     print(f"  ✅ Embedding model: {EMBEDDING_MODEL}")
 
     print("  Connecting to Groq...")
-    _groq_client = Groq(api_key=GROQ_API_KEY)
-    print(f"  ✅ Groq model: {GROQ_MODEL}")
+    _groq_client = get_client(GROQ_API_KEY, GROQ_MODEL)
+    print(f"  ✅ Groq model: {GROQ_MODEL} (deadline {LLM_DEADLINE:.0f}s, hedging {'on' if LLM_HEDGE else 'off'})")
 
     _hf_asr_url = f"https://api-inference.huggingface.co/models/{HF_MODEL_ID}"
     _hf_headers = {"Authorization": f"Bearer {HF_TOKEN}"}
-    print(f"  ✅ Whisper via HF Inference API: {HF_MODEL_ID}")
+    if STT_BACKEND == "local":
+        mode = " (Urdu + Roman)" if LOCAL_STT_DUAL else ""
+        print(f"  ✅ Whisper locally{mode} (loads on first voice note): {LOCAL_STT_MODEL}")
+    else:
+        print(f"  ✅ Whisper via HF Inference API: {HF_MODEL_ID}")
+
+    get_answers().load()
+    if RERANK:
+        get_reranker().load()
 
     print("=" * 60)
     print("All models ready.")
     print("=" * 60)
 
 
+def _manifest_mtime() -> Optional[float]:
+    try:
+        return os.path.getmtime(KB_MANIFEST_PATH)
+    except OSError:
+        return None
+
+
+def reload_knowledge_base():
+    """
+    (Re)open the Chroma collection from disk. rag/build_kb.py rewrites
+    kb_manifest.json after every rebuild; rag_search calls
+    _maybe_reload_knowledge_base() to pick that up without a restart.
+    """
+    global _chroma_client, _collection, _kb_manifest_mtime, _kb_checked_at
+
+    if _chroma_client is not None:
+        # Chroma caches one System per path; drop it so the new files are read
+        _chroma_client.clear_system_cache()
+    _kb_manifest_mtime = _manifest_mtime()
+    _kb_checked_at     = time.time()
+    _chroma_client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+    _collection    = _chroma_client.get_collection(name=COLLECTION_NAME)
+    print(f"  ✅ ChromaDB: {_collection.count()} documents")
+
+
+def _maybe_reload_knowledge_base():
+    global _kb_checked_at
+    if time.time() - _kb_checked_at < KB_RELOAD_INTERVAL:
+        return
+    _kb_checked_at = time.time()
+    if _manifest_mtime() != _kb_manifest_mtime:
+        print("[RAG] Knowledge base manifest changed — reloading collection...")
+        try:
+            reload_knowledge_base()
+        except Exception as e:
+            print(f"[WARNING] KB reload failed ({e}), keeping previous collection.")
+
+
 # ─────────────────────────────────────────────────────────────
 # STT — Fine-tuned Whisper via HF Inference API
 # ─────────────────────────────────────────────────────────────
@@ -100,6 +183,10 @@ def transcribe_audio(audio_path: str) -> str:
     if ext not in ALLOWED_AUDIO_EXTS:
         raise ValueError(f"Unsupported audio format: {ext}")
 
+    if STT_BACKEND == "local":
+        text = _transcribe_local(audio_path)
+        return text["urdu"] if isinstance(text, dict) else text
+
     params = {}
     if WHISPER_LANGUAGE:
         params = {"language": WHISPER_LANGUAGE}
@@ -139,30 +226,132 @@ def transcribe_audio(audio_path: str) -> str:
     raise RuntimeError("HF Inference API failed after 3 attempts — model may still be loading.")
 
 
+def _parse_adapters(spec: str) -> Dict[str, str]:
+    """"urdu=dir,roman=dir" → {"urdu": "dir", "roman": "dir"}"""
+    adapters = {}
+    for item in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, path = item.partition("=")
+        adapters[name.strip()] = path.strip()
+    return adapters
+
+
+def _get_local_stt():
+    """Load the long-form transcriber from stt-finetune once (STT_BACKEND=local)."""
+    global _local_stt
+    with _local_stt_lock:
+        if _local_stt is None:
+            stt_path = os.path.abspath(GROWPAK_STT_PATH)
+            if stt_path not in sys.path:
+                sys.path.insert(0, stt_path)
+            from growpak_stt.audio import load_audio
+
+            if LOCAL_STT_DUAL:
+                from growpak_stt.dualscript import DualScriptTranscriber
+
+                adapters = _parse_adapters(LOCAL_STT_ADAPTERS)
+                missing = {"urdu", "roman"} - set(adapters)
+                if missing:
+                    raise RuntimeError(
+                        f"LOCAL_STT_DUAL=1 needs LOCAL_STT_ADAPTERS with urdu and roman adapters "
+                        f"(\"urdu=dir,roman=dir\"); missing: {', '.join(sorted(missing))}")
+                # adapters need a float base model
+                precision = "fp32" if LOCAL_STT_PRECISION == "int8" else LOCAL_STT_PRECISION
+                transcriber = DualScriptTranscriber.from_adapters(
+                    adapters, precision=precision, batch_size=LOCAL_STT_BATCH)
+                device = transcriber.device
+            else:
+                from growpak_stt.longform import LongFormTranscriber
+                from growpak_stt.transcribe import load_model
+
+                processor, model, device = load_model(LOCAL_STT_MODEL, LOCAL_STT_PRECISION)
+                transcriber = LongFormTranscriber(
+                    processor, model, device,
+                    language=WHISPER_LANGUAGE or None,
+                    batch_size=LOCAL_STT_BATCH,
+                    use_timestamps=LOCAL_STT_TIMESTAMPS,
+                )
+            _local_stt = (transcriber, load_audio)
+            print(f"[STT] Local Whisper loaded: {LOCAL_STT_MODEL} ({LOCAL_STT_PRECISION} on {device})")
+    return _local_stt
+
+
+def _transcribe_local(audio_path: str):
+    transcriber, load_audio = _get_local_stt()
+    audio = load_audio(audio_path)
+    start = time.time()
+    # one model instance; voice notes are decoded one at a time
+    with _local_stt_lock:
+        out = transcriber.transcribe([audio])[0]
+    print(f"[STT] Local: {len(audio) / 16000:.1f}s of audio in {time.time() - start:.1f}s")
+    if isinstance(out, dict):
+        return {script: text.strip() for script, text in out.items()}
+    return out.strip()
+
+
+def transcribe_audio_scripts(audio_path: str) -> Dict[str, Optional[str]]:
+    """
+    {"urdu": ..., "roman": ...} for a voice note. Both are filled by the
+    local dual-script engine (LOCAL_STT_DUAL=1); any other backend returns
+    its single transcript as "urdu" and roman=None.
+    """
+    if STT_BACKEND == "local" and LOCAL_STT_DUAL:
+        _init()
+        if Path(audio_path).suffix.lower() not in ALLOWED_AUDIO_EXTS:
+            raise ValueError(f"Unsupported audio format: {Path(audio_path).suffix.lower()}")
+        scripts = _transcribe_local(audio_path)
+        return {"urdu": scripts.get("urdu", ""), "roman": scripts.get("roman")}
+    return {"urdu": transcribe_audio(audio_path), "roman": None}
+
+
 # ─────────────────────────────────────────────────────────────
 # LLM — Groq (replaces Ollama)
 # ─────────────────────────────────────────────────────────────
-def _call_groq(prompt: str, system_prompt: str = "", temperature: float = 0.1) -> str:
-    """Call Groq API with a prompt and optional system message."""
+def _call_groq(prompt: str, system_prompt: str = "", temperature: float = 0.1, stop=None) -> str:
+    """
+    Call Groq with a prompt and optional system message through llm_client
+    (deadline, retries, hedging, circuit breaker). With `stop` the reply is
+    streamed and cut off as soon as stop(text) returns it, so tokens past the
+    part we use are never generated. Raises llm_client.LLMError.
+    """
     _init()
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
     messages.append({"role": "user", "content": prompt})
 
-    completion = _groq_client.chat.completions.create(
-        model=GROQ_MODEL,
-        messages=messages,
-        temperature=temperature,
-        max_tokens=512,
-    )
-    return completion.choices[0].message.content.strip()
+    return _groq_client.complete(messages, stop=stop, temperature=temperature, max_tokens=512)
 
 
-def enhance_farmer_query(raw_question: str) -> Dict:
+def _classify_query(raw_question: str):
+    """
+    Local crop/topic/stage/intent prediction (query_classifier.py).
+    Returns ({field: (label, confidence)}, confident, english), or None
+    without a trained classifier for the current embedding model. Only an
+    English question the classifier is confident about can skip the LLM.
+    """
+    _init()
+    classifier = get_classifier()
+    if classifier is None or classifier.embedding_model != EMBEDDING_MODEL:
+        return None
+    embedding = _embedding_model.encode(normalize_roman(raw_question))
+    prediction, confident = classifier.predict(embedding)
+    return prediction, confident, classifier.is_english(raw_question)
+
+
+# Bump when the enhancement prompt changes so cached results are not reused
+ENHANCE_PROMPT_VERSION = "2"
+
+
+def enhance_farmer_query(raw_question: str, use_classifier: bool = True) -> Dict:
     """
     LLM Step 1: Translate Roman Urdu/Punjabi → structured English query for RAG.
     Returns a dict with enhanced_query, crop, topic, keywords, etc.
+    When the question is already English and the local classifier is
+    confident about every label, the LLM call is skipped and the question is
+    used as the retrieval query. Otherwise the classifier's labels go to the
+    LLM as hints, and stand in if the LLM call fails. "enhancer" records
+    which was used.
+    LLM results are cached by normalised question text (query_cache.py).
     """
     system_prompt = """You are a translation-first agricultural query normalizer for Pakistani farmer questions.
 You understand Roman Urdu, Roman Punjabi, Urdu terms written in Latin script and Urdu/Arabic script, and English.
@@ -206,10 +395,37 @@ Return JSON only."""
         "reply_language": "English",
         "translation_confidence": 0.5,
         "ambiguity_notes": "None",
+        "enhancer": "fallback",
     }
 
+    cache = get_query_cache(f"{GROQ_MODEL}|{ENHANCE_PROMPT_VERSION}")
+    cached = cache.get(raw_question) if use_classifier else None
+    if cached is not None:
+        print(f"[CACHE] Enhanced query hit (hit rate {cache.stats()['hit_rate']:.1%})")
+        return cached
+
+    classified = _classify_query(raw_question) if use_classifier else None
+    local = None
+    if classified is not None:
+        prediction, confident, english = classified
+        local = dict(_DEFAULTS, enhancer="classifier",
+                     translation_confidence=round(min(c for _, c in prediction.values()), 4),
+                     **{field: label for field, (label, _) in prediction.items()})
+        labels = ", ".join(f"{f}={l} ({c:.2f})" for f, (l, c) in prediction.items())
+        if confident and english:
+            local["detected_language"] = "English"
+            print(f"[CLASSIFIER] {labels}")
+            return local
+        print(f"[CLASSIFIER] {'Unsure' if english else 'Not English'} ({labels}) — asking the LLM")
+        enhancement_prompt += (
+            "\n\nLabels suggested by a local classifier (confidence in brackets); "
+            "use them only where the question agrees:\n"
+            + "\n".join(f"- {f}: {l} ({c:.2f})" for f, (l, c) in prediction.items())
+        )
+
     try:
-        raw = _call_groq(enhancement_prompt, system_prompt, temperature=0.1)
+        # stop as soon as the JSON object closes
+        raw = _call_groq(enhancement_prompt, system_prompt, temperature=0.1, stop=stop_after_json)
         # Strip markdown fences if present
         if "```json" in raw:
             raw = raw.split("```json")[1].split("```")[0]
@@ -232,12 +448,14 @@ Return JSON only."""
                 seen.add(kw_s)
                 normalized.append(kw_s)
         enhanced["keywords"] = normalized[:5]
+        enhanced["enhancer"] = "llm"
 
+        cache.put(raw_question, enhanced)
         return enhanced
 
     except Exception as e:
         print(f"[WARNING] Query enhancement failed ({e}), using fallback.")
-        return _DEFAULTS
+        return local or _DEFAULTS
 
 
 # ─────────────────────────────────────────────────────────────
@@ -247,15 +465,20 @@ def rag_search(enhanced_query: Dict, top_k: int = 5) -> List[Dict]:
     """
     Embed the enhanced English query + keywords and search ChromaDB.
     Applies crop/topic metadata filter when available; falls back to no filter.
+    With RERANK=1, RERANK_CANDIDATES hits are fetched and the cross-encoder
+    (reranker.py) picks the top_k, adding "rerank_score" to each.
     """
     _init()
+    _maybe_reload_knowledge_base()
     search_text = enhanced_query.get("enhanced_query", "")
     if enhanced_query.get("keywords"):
         search_text += " " + " ".join(enhanced_query["keywords"])
     if enhanced_query.get("entity") and enhanced_query["entity"] != "Not specified":
         search_text += " " + enhanced_query["entity"]
 
-    query_embedding = _embedding_model.encode(search_text).tolist()
+    # one spelling per Roman Urdu word (gundum/gehun → gandum) before embedding
+    query_embedding = _embedding_model.encode(normalize_roman(search_text)).tolist()
+    n_results = max(top_k, RERANK_CANDIDATES) if RERANK else top_k
 
     crop  = enhanced_query.get("crop", "Unknown")
     topic = enhanced_query.get("topic", "General")
@@ -269,14 +492,14 @@ def rag_search(enhanced_query: Dict, top_k: int = 5) -> List[Dict]:
     try:
         results = _collection.query(
             query_embeddings=[query_embedding],
-            n_results=top_k,
+            n_results=n_results,
             where=where_filter if where_filter else None,
         )
     except Exception as e:
         print(f"[WARNING] Filtered search failed ({e}), retrying without filter...")
         results = _collection.query(
             query_embeddings=[query_embedding],
-            n_results=top_k,
+            n_results=n_results,
         )
 
     formatted = []
@@ -292,7 +515,13 @@ def rag_search(enhanced_query: Dict, top_k: int = 5) -> List[Dict]:
                 "entity":      meta["entity"],
                 "similarity":  round(1 - results["distances"][0][i], 4),
             })
-    return formatted
+
+    if RERANK and formatted:
+        query = enhanced_query.get("enhanced_query") or search_text
+        formatted, reranked = get_reranker().rerank(query, formatted, top_k)
+        if not reranked:
+            print("[RERANK] Skipped (over latency budget) — using cosine order")
+    return formatted[:top_k]
 
 
 # ─────────────────────────────────────────────────────────────
@@ -302,16 +531,17 @@ def generate_farmer_response(
     original_question: str,
     rag_results: List[Dict],
     enhanced_query: Dict,
+    max_contexts: int = 3,
 ) -> Dict:
     """
     Generate a natural Urdu-script response for the farmer.
-    Uses RAG context if available, falls back to pure LLM.
+    Uses up to max_contexts RAG results if available, falls back to pure LLM.
     Returns {"raw_rag_answer": str|None, "refined_answer": str}.
     """
     if rag_results:
         raw_rag_answer = rag_results[0]["answer"]
         context_parts  = []
-        for i, r in enumerate(rag_results[:3]):
+        for i, r in enumerate(rag_results[:max_contexts]):
             context_parts.append(
                 f"Source {i+1} (Crop: {r['crop']}, Topic: {r['topic']}, "
                 f"Similarity: {r['similarity']}):\n"
@@ -352,12 +582,20 @@ Rules:
 Answer:"""
 
     try:
-        refined_answer = _call_groq(response_prompt, system_prompt, temperature=0.3)
+        # the prompt asks for 1-2 sentences; stop after the second
+        refined_answer = _call_groq(response_prompt, system_prompt, temperature=0.3,
+                                    stop=stop_after_sentences(2))
         return {"raw_rag_answer": raw_rag_answer, "refined_answer": refined_answer}
     except Exception as e:
-        print(f"[ERROR] LLM generation failed ({e}) — returning raw RAG answer.")
-        fallback = raw_rag_answer or "معافی کریں، ابھی جواب دینے میں دقت ہو رہی ہے۔"
-        return {"raw_rag_answer": raw_rag_answer, "refined_answer": fallback}
+        if isinstance(e, LLMUnavailable):
+            print("[LLM] Circuit open — answering from the KB.")
+        else:
+            print(f"[ERROR] LLM generation failed ({e}) — returning the KB answer.")
+        # prefer the precomputed Urdu rendering of the top hit over the raw KB text
+        prepared = get_answers().get(rag_results[0]["question"], raw_rag_answer) if rag_results else None
+        fallback = (prepared and prepared["urdu"]) or raw_rag_answer \
+            or "معافی کریں، ابھی جواب دینے میں دقت ہو رہی ہے۔"
+        return {"raw_rag_answer": raw_rag_answer, "refined_answer": fallback, "llm_failed": True}
 
 
 # ─────────────────────────────────────────────────────────────
@@ -407,10 +645,15 @@ def text_to_speech_urdu(text: str, output_path: str = None) -> str:
 # ─────────────────────────────────────────────────────────────
 # FULL PIPELINE
 # ─────────────────────────────────────────────────────────────
-def run_pipeline(audio_path: str = None, text_input: str = None) -> Dict:
+def run_pipeline(audio_path: str = None, text_input: str = None,
+                 context: Optional[Dict] = None, synthesize_speech: bool = True) -> Dict:
     """
     Run the full STT → Query Enhancement → RAG → LLM → TTS pipeline.
     Provide exactly one of audio_path or text_input.
+    `context` is the sender's session (see session_store.Session.as_context);
+    its crop fills in the retrieval filter when the question doesn't name one.
+    Typed questions with a near-exact KB match skip the generation LLM, and
+    synthesize_speech=False skips TTS (audio_response is then None).
     Returns a dict with all intermediate results and final audio path.
     """
     if bool(audio_path) == bool(text_input):
@@ -420,35 +663,80 @@ def run_pipeline(audio_path: str = None, text_input: str = None) -> Dict:
 
     # 1. STT
     if audio_path:
-        result["transcribed_text"] = transcribe_audio(audio_path)
-        farmer_text = result["transcribed_text"]
+        # Urdu script for display; Roman (dual-script local STT only) drives retrieval
+        scripts = transcribe_audio_scripts(audio_path)
+        result["transcribed_text"]  = scripts["urdu"]
+        result["transcribed_roman"] = scripts["roman"]
+        farmer_text = scripts["roman"] or scripts["urdu"]
     else:
         farmer_text = str(text_input).strip()
-        result["transcribed_text"] = None
+        result["transcribed_text"]  = None
+        result["transcribed_roman"] = None
 
     result["farmer_text"] = farmer_text
     print(f"[STT] {farmer_text}")
 
     # 2. LLM Query Enhancement
     enhanced_query = enhance_farmer_query(farmer_text)
+    if context and context.get("crop") and enhanced_query.get("crop") in ("Unknown", "Not specified", ""):
+        enhanced_query["crop"] = context["crop"]
+        print(f"[SESSION] Using previous crop: {context['crop']}")
     result["enhanced_query"] = enhanced_query
     print(f"[ENHANCE] {enhanced_query.get('enhanced_query')}")
 
     # 3. RAG Search
     rag_results  = rag_search(enhanced_query, top_k=5)
-    good_results = [r for r in rag_results if r["similarity"] >= SIMILARITY_THRESHOLD]
+    reranked     = bool(rag_results) and "rerank_score" in rag_results[0]
+    if reranked:
+        # the cross-encoder score is the sharper relevance signal
+        good_results = [r for r in rag_results if r["rerank_score"] >= RERANK_THRESHOLD]
+    else:
+        good_results = [r for r in rag_results if r["similarity"] >= SIMILARITY_THRESHOLD]
     result["rag_results"]  = rag_results
     result["good_results"] = good_results
     result["using_rag"]    = bool(good_results)
     print(f"[RAG] {len(good_results)}/{len(rag_results)} results above threshold")
 
-    # 4. LLM Response
-    llm_out = generate_farmer_response(farmer_text, good_results, enhanced_query)
-    result["raw_rag_answer"] = llm_out["raw_rag_answer"]
-    result["final_answer"]   = llm_out["refined_answer"]
-    print(f"[LLM] {result['final_answer'][:80]}...")
+    # 4. LLM Response (decisive KB hits with a precomputed answer skip it,
+    #    as do typed questions with a near-exact KB match). Both gates are
+    #    cosine thresholds, so they see the hits in cosine order; after
+    #    re-ranking they only fire when the cross-encoder agrees on the top hit.
+    direct_results = good_results
+    if reranked:
+        by_cosine = sorted(good_results, key=lambda r: r["similarity"], reverse=True)
+        direct_results = by_cosine if by_cosine and by_cosine[0] is good_results[0] else []
+    precomputed = get_answers().direct_answer(direct_results)
+    answer_source = "kb_precomputed"
+    if not precomputed and text_input:
+        # KB answers are English: a typed near-exact match is only answered
+        # directly with its precomputed Urdu, otherwise it goes through the LLM
+        precomputed = get_answers().text_answer(direct_results, TEXT_DIRECT_THRESHOLD)
+        answer_source = "kb_direct"
+    if precomputed:
+        result["raw_rag_answer"] = direct_results[0]["answer"]
+        result["final_answer"]   = precomputed["urdu"]
+        result["answer_source"]  = answer_source
+        print(f"[KB] {'Direct' if answer_source == 'kb_direct' else 'Precomputed'} answer "
+              f"(similarity {direct_results[0]['similarity']}, "
+              f"hit rate {get_answers().stats()['hit_rate']:.1%})")
+    else:
+        llm_out = generate_farmer_response(farmer_text, good_results, enhanced_query,
+                                           max_contexts=RERANK_CONTEXTS if reranked else 3)
+        result["raw_rag_answer"] = llm_out["raw_rag_answer"]
+        result["final_answer"]   = llm_out["refined_answer"]
+        result["answer_source"]  = "kb_fallback" if llm_out.get("llm_failed") else "llm"
+        print(f"[LLM] {result['final_answer'][:80]}...")
 
     # 5. TTS
+    if not synthesize_speech:
+        result["audio_response"] = None
+        return result
+
+    if precomputed and precomputed["audio"]:
+        result["audio_response"] = precomputed["audio"]
+        print(f"[TTS] Precomputed → {precomputed['audio']}")
+        return result
+
     try:
         tts_path = text_to_speech_urdu(result["final_answer"])
         result["audio_response"] = tts_path
@@ -0,0 +1,156 @@
+"""
+Pre-generate Urdu answers + TTS audio for every KB entry.
+
+Run once after (re)building the knowledge base:
+    python pregenerate_answers.py
+    python pregenerate_answers.py --excel ../rag/RAG_knowledgeBase.xlsx --llm-workers 4
+
+Each KB answer is rendered with the same prompt the live pipeline uses
+(generate_farmer_response with the entry itself as the only context) and
+synthesised with Google TTS, with separate concurrency limits for Groq and
+TTS. Finished rows are appended to a checkpoint (KB_ANSWERS_DIR/checkpoint.jsonl
++ staged MP3s) as they complete, so an interrupted run resumes where it left
+off and already-completed rows are never regenerated. At the end everything
+is packed into answers.bin + answers.idx.json, which kb_answers memory-maps.
+"""
+
+import os
+import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from kb_answers import KB_ANSWERS_DIR, CHECKPOINT_FILE, STAGING_SUBDIR, answer_key, pack_artifact
+import pipeline
+
+
+def iter_collection_rows():
+    """Yield the metadata dict of every document in the Chroma collection."""
+    pipeline._init()
+    data = pipeline._collection.get(include=["metadatas"])
+    for meta in data["metadatas"]:
+        yield meta
+
+
+def iter_excel_rows(path: str):
+    """Yield KB rows from the spreadsheet, cleaned the way the index builder does."""
+    import pandas as pd
+
+    df = pd.read_excel(path).fillna("Not specified")
+    for _, row in df.iterrows():
+        question, answer = str(row["QUESTION"]).strip(), str(row["ANSWER"]).strip()
+        if not question or not answer or "Not specified" in (question, answer):
+            continue
+        yield {
+            "question":    question,
+            "answer":      answer,
+            "crop":        str(row.get("crop", "Not specified")).strip(),
+            "topic":       str(row.get("topic", "Not specified")).strip(),
+            "intent_type": str(row.get("intent_type", "Recommendation")).strip(),
+        }
+
+
+def load_checkpoint(path: str) -> dict:
+    done = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue   # torn last line from an interrupted run
+                done[row["key"]] = row
+    return done
+
+
+def render_answer(meta: dict) -> str:
+    context = [dict(meta, similarity=1.0)]
+    llm_out = pipeline.generate_farmer_response(
+        meta["question"], context, {"intent_type": meta.get("intent_type", "Recommendation")}
+    )
+    if llm_out.get("llm_failed") or not llm_out["refined_answer"]:
+        # generate_farmer_response fell back (KB text or an older rendering) — retry next run
+        raise RuntimeError("LLM generation failed")
+    return llm_out["refined_answer"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate Urdu answers + TTS audio for the KB.")
+    parser.add_argument("--out-dir", default=KB_ANSWERS_DIR)
+    parser.add_argument("--excel", default=None,
+                        help="Read rows from this spreadsheet instead of the Chroma collection.")
+    parser.add_argument("--llm-workers", type=int, default=4, help="Concurrent Groq calls.")
+    parser.add_argument("--tts-workers", type=int, default=8, help="Concurrent TTS calls.")
+    parser.add_argument("--no-audio", action="store_true", help="Skip TTS synthesis.")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most N new rows.")
+    parser.add_argument("--pack-only", action="store_true",
+                        help="Only rebuild answers.bin from the existing checkpoint.")
+    args = parser.parse_args()
+
+    staging_dir = os.path.join(args.out_dir, STAGING_SUBDIR)
+    os.makedirs(staging_dir, exist_ok=True)
+    checkpoint_path = os.path.join(args.out_dir, CHECKPOINT_FILE)
+
+    done = load_checkpoint(checkpoint_path)
+    print(f"Already prepared: {len(done)}")
+
+    if not args.pack_only:
+        rows = iter_excel_rows(args.excel) if args.excel else iter_collection_rows()
+        todo, seen = [], set(done)
+        for meta in rows:
+            key = answer_key(meta["question"], meta["answer"])
+            if key not in seen:
+                seen.add(key)
+                todo.append((key, meta))
+        if args.limit:
+            todo = todo[:args.limit]
+        print(f"To generate: {len(todo)}")
+
+        write_lock = threading.Lock()
+        completed  = [0]
+
+        def record(key: str, urdu: str, audio_rel):
+            row = {"key": key, "urdu": urdu, "audio": audio_rel}
+            with write_lock:
+                with open(checkpoint_path, "a", encoding="utf-8") as out:
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                done[key] = row
+                completed[0] += 1
+                print(f"  [{completed[0]}/{len(todo)}] {key}")
+
+        def synthesise(key: str, urdu: str):
+            audio_rel = f"{STAGING_SUBDIR}/{key}.mp3"
+            pipeline.text_to_speech_urdu(urdu, os.path.join(args.out_dir, audio_rel))
+            record(key, urdu, audio_rel)
+
+        with ThreadPoolExecutor(args.llm_workers) as llm_pool, \
+             ThreadPoolExecutor(args.tts_workers) as tts_pool:
+            llm_jobs = {llm_pool.submit(render_answer, meta): key for key, meta in todo}
+            tts_jobs = {}
+            for fut in as_completed(llm_jobs):
+                key = llm_jobs[fut]
+                try:
+                    urdu = fut.result()
+                except Exception as e:
+                    print(f"[LLM ERROR] {key}: {e}")
+                    continue
+                if args.no_audio:
+                    record(key, urdu, None)
+                else:
+                    tts_jobs[tts_pool.submit(synthesise, key, urdu)] = key
+
+            for fut in as_completed(tts_jobs):
+                try:
+                    fut.result()
+                except Exception as e:
+                    print(f"[TTS ERROR] {tts_jobs[fut]}: {e}")
+
+        print(f"Generated {completed[0]} new answers ({len(todo) - completed[0]} failed, "
+              f"re-run to retry).")
+
+    n, size = pack_artifact(args.out_dir, done.values())
+    print(f"Packed {n} answers ({size / 1e6:.1f} MB) into {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
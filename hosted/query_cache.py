@@ -0,0 +1,145 @@
+"""
+GrowPak Query Cache
+Maps farmer text to the JSON enhance_farmer_query got back from Groq, so a
+phrasing that has been seen before ("gandum mein zang", "kapas ko pani kab
+dena") skips the LLM call. Enhancement runs at temperature 0.1 and is
+effectively deterministic, so a cached result is as good as a fresh one.
+
+Keys are roman_urdu.normalize_key(text): lowercase, punctuation and extra
+whitespace removed, and Roman Urdu spelling variants folded (gundum →
+gandum, kapaas → kapas), prefixed with the model and prompt version so a
+change to either starts from an empty cache.
+
+Entries live in a bounded in-memory LRU with a TTL. Set QUERY_CACHE_DB_PATH
+to also persist them to SQLite (same scheme as session_store): the cache
+survives restarts and evicted entries are reloaded on their next hit.
+"""
+
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from roman_urdu import normalize_key
+
+# ─────────────────────────────────────────────────────────────
+# CONFIG  (override via environment variables)
+# ─────────────────────────────────────────────────────────────
+QUERY_CACHE_SIZE      = int(os.getenv("QUERY_CACHE_SIZE", "20000"))
+QUERY_CACHE_TTL_HOURS = float(os.getenv("QUERY_CACHE_TTL_HOURS", "168"))
+QUERY_CACHE_DB_PATH   = os.getenv("QUERY_CACHE_DB_PATH", "")   # empty → memory only
+
+
+class QueryCache:
+    """Thread-safe LRU + TTL cache of enhanced queries with optional SQLite write-through."""
+
+    def __init__(self, namespace: str = "", max_entries: int = QUERY_CACHE_SIZE,
+                 ttl_seconds: float = QUERY_CACHE_TTL_HOURS * 3600,
+                 db_path: str = QUERY_CACHE_DB_PATH):
+        self.namespace   = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries    = OrderedDict()   # key -> (value, stored_at)
+        self._lock       = threading.Lock()
+        self._stats      = {"lookups": 0, "hits": 0, "disk_hits": 0, "stores": 0,
+                            "expired": 0, "evicted": 0}
+        self._db         = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_cache ("
+                " key TEXT PRIMARY KEY, value TEXT, stored_at REAL)"
+            )
+            self._db.commit()
+
+    def key(self, text: str) -> str:
+        return f"{self.namespace}|{normalize_key(text)}"
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, text: str) -> Optional[Dict]:
+        """A copy of the cached enhancement for text, or None."""
+        key = self.key(text)
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self._entries.get(key)
+            from_disk = False
+            if entry is None:
+                entry = self._load(key)
+                from_disk = entry is not None
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl_seconds and time.time() - stored_at > self.ttl_seconds:
+                self._stats["expired"] += 1
+                self._delete(key)
+                return None
+            self._insert(key, entry)
+            self._stats["hits"] += 1
+            self._stats["disk_hits"] += from_disk
+        # callers fill in session context; never hand out the stored dict
+        return copy.deepcopy(value)
+
+    def put(self, text: str, value: Dict):
+        key = self.key(text)
+        entry = (copy.deepcopy(value), time.time())
+        with self._lock:
+            self._stats["stores"] += 1
+            self._insert(key, entry)
+            self._save(key, entry)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["size"] = len(self._entries)
+        out["hit_rate"]    = round(out["hits"] / out["lookups"], 4) if out["lookups"] else 0.0
+        out["persistent"]  = self._db is not None
+        return out
+
+    # ── internals (caller holds the lock) ───────────────────
+    def _insert(self, key: str, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)   # still on disk if persisted
+            self._stats["evicted"] += 1
+
+    def _delete(self, key: str):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM query_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _load(self, key: str):
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT value, stored_at FROM query_cache WHERE key = ?", (key,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _save(self, key: str, entry):
+        if self._db is None:
+            return
+        value, stored_at = entry
+        self._db.execute("INSERT OR REPLACE INTO query_cache VALUES (?, ?, ?)",
+                         (key, json.dumps(value, ensure_ascii=False), stored_at))
+        self._db.commit()
+
+
+_cache = None
+
+def get_query_cache(namespace: Optional[str] = None) -> QueryCache:
+    """
+    Process-wide cache. The pipeline passes its model + prompt version as
+    namespace; callers that only read stats (server /stats) pass nothing.
+    """
+    global _cache
+    if _cache is None:
+        _cache = QueryCache(namespace or "")
+    elif namespace is not None:
+        _cache.namespace = namespace
+    return _cache
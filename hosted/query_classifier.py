@@ -0,0 +1,173 @@
+"""
+GrowPak Query Classifier
+Nearest-centroid classifier over the sentence embeddings the pipeline
+already computes (all-MiniLM-L6-v2), predicting the crop / topic / stage /
+intent_type labels that enhance_farmer_query otherwise asks Groq for.
+Trained from the labelled KB questions by rag/train_query_classifier.py.
+
+Each field has one unit-length centroid per label. A question's score for a
+label is its cosine similarity to that centroid; confidence is the softmax
+of those scores (temperature chosen at training time), so it is high
+only when one label is clearly closer than the rest.
+
+The KB questions it is trained on are English, so its confidence means
+nothing for Roman Urdu or Urdu input, and those still need the LLM's
+translation for retrieval. The pipeline therefore skips the LLM only when
+every field clears QUERY_CLASSIFIER_MIN_CONF and is_english() accepts the
+text (almost every word is in the training vocabulary); otherwise the
+labels are passed to the LLM as hints.
+
+Artifact (query_classifier.npz, next to the Chroma files):
+  <field>          float32 [labels, dim] centroids
+  meta             JSON: {"fields": {field: [labels]}, "embedding_model", "temperature",
+                          "vocabulary": [words], ...}
+"""
+
+import os
+import re
+import json
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# ─────────────────────────────────────────────────────────────
+# CONFIG  (override via environment variables)
+# ─────────────────────────────────────────────────────────────
+QUERY_CLASSIFIER_PATH     = os.getenv("QUERY_CLASSIFIER_PATH", os.path.join(
+    os.getenv("CHROMA_DB_PATH", "./agriculture_chroma_db"), "query_classifier.npz"))
+QUERY_CLASSIFIER_MIN_CONF = float(os.getenv("QUERY_CLASSIFIER_MIN_CONF", "0.6"))
+QUERY_ENGLISH_MIN_SHARE   = float(os.getenv("QUERY_ENGLISH_MIN_SHARE", "0.85"))
+
+FIELDS              = ("crop", "topic", "stage", "intent_type")
+DEFAULT_TEMPERATURE = 0.05
+
+_WORD        = re.compile(r"[a-z]+")
+_URDU_SCRIPT = re.compile(r"[\u0600-\u06ff\u0750-\u077f\ufb50-\ufdff\ufe70-\ufeff]")
+
+
+def vocabulary(texts: Sequence[str]) -> frozenset:
+    """Lowercase Latin words of the training questions."""
+    return frozenset(w for t in texts for w in _WORD.findall(str(t).lower()))
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+class QueryClassifier:
+    def __init__(self, centroids: Dict[str, np.ndarray], labels: Dict[str, List[str]],
+                 embedding_model: str, temperature: float = DEFAULT_TEMPERATURE,
+                 info: Optional[Dict] = None, vocab: Sequence[str] = ()):
+        self.centroids       = centroids
+        self.labels          = labels
+        self.embedding_model = embedding_model
+        self.temperature     = temperature
+        self.info            = info or {}
+        self.vocab           = frozenset(vocab)
+        self._stats          = {"queries": 0, "confident": 0, "seconds": 0.0}
+
+    @classmethod
+    def fit(cls, embeddings: np.ndarray, targets: Dict[str, Sequence[str]], embedding_model: str,
+            temperature: float = DEFAULT_TEMPERATURE, min_examples: int = 1,
+            questions: Sequence[str] = ()) -> "QueryClassifier":
+        """
+        embeddings: [n, dim] question embeddings; targets: {field: n labels};
+        questions: their text, kept as the vocabulary is_english() checks.
+        Labels with fewer than min_examples questions are left out.
+        """
+        embeddings = _unit(np.asarray(embeddings, dtype=np.float32))
+        centroids, labels = {}, {}
+        for field, values in targets.items():
+            values = np.asarray(values)
+            names = sorted(v for v in set(values.tolist()) if (values == v).sum() >= min_examples)
+            centroids[field] = np.stack([_unit(embeddings[values == name].mean(axis=0)) for name in names])
+            labels[field] = names
+        return cls(centroids, labels, embedding_model, temperature, vocab=vocabulary(questions))
+
+    @classmethod
+    def load(cls, path: str = QUERY_CLASSIFIER_PATH) -> "QueryClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            centroids = {field: data[field].astype(np.float32) for field in meta["fields"]}
+        return cls(centroids, meta["fields"], meta["embedding_model"], meta["temperature"],
+                   meta.get("info"), meta.get("vocabulary", ()))
+
+    def save(self, path: str):
+        meta = {"fields": self.labels, "embedding_model": self.embedding_model,
+                "temperature": self.temperature, "info": self.info, "vocabulary": sorted(self.vocab)}
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, meta=np.array(json.dumps(meta)), **self.centroids)
+        os.replace(tmp, path)
+
+    def scores(self, embeddings: np.ndarray) -> Dict[str, np.ndarray]:
+        """{field: [n, labels] softmax confidences} for a batch of embeddings."""
+        embeddings = _unit(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        out = {}
+        for field, centroids in self.centroids.items():
+            logits = embeddings @ centroids.T / self.temperature
+            logits -= logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            out[field] = probs / probs.sum(axis=1, keepdims=True)
+        return out
+
+    def predict_batch(self, embeddings: np.ndarray) -> List[Dict[str, Tuple[str, float]]]:
+        scores = self.scores(embeddings)
+        n = next(iter(scores.values())).shape[0]
+        out = [{} for _ in range(n)]
+        for field, probs in scores.items():
+            best = probs.argmax(axis=1)
+            for i, j in enumerate(best):
+                out[i][field] = (self.labels[field][j], float(probs[i, j]))
+        return out
+
+    def predict(self, embedding: np.ndarray,
+                min_conf: float = QUERY_CLASSIFIER_MIN_CONF) -> Tuple[Dict[str, Tuple[str, float]], bool]:
+        """
+        ({field: (label, confidence)}, confident) for one question embedding;
+        confident is True when every field reaches min_conf.
+        """
+        start = time.perf_counter()
+        prediction = self.predict_batch(embedding)[0]
+        confident = all(conf >= min_conf for _, conf in prediction.values())
+        self._stats["queries"]   += 1
+        self._stats["confident"] += int(confident)
+        self._stats["seconds"]   += time.perf_counter() - start
+        return prediction, confident
+
+    def is_english(self, text: str, min_share: float = QUERY_ENGLISH_MIN_SHARE) -> bool:
+        """
+        True when text is written like the (English) training questions: no
+        Urdu script and at least min_share of its words in the vocabulary.
+        Artifacts saved without a vocabulary never accept.
+        """
+        if not self.vocab or _URDU_SCRIPT.search(text):
+            return False
+        words = _WORD.findall(text.lower())
+        return bool(words) and sum(w in self.vocab for w in words) >= min_share * len(words)
+
+    def stats(self) -> Dict:
+        q = self._stats["queries"]
+        return {
+            "queries":        q,
+            "confident":      self._stats["confident"],
+            "confident_rate": round(self._stats["confident"] / q, 4) if q else 0.0,
+            "mean_ms":        round(1000 * self._stats["seconds"] / q, 3) if q else 0.0,
+            "min_conf":       QUERY_CLASSIFIER_MIN_CONF,
+        }
+
+
+_classifier = None
+_loaded     = False
+
+def get_classifier() -> Optional[QueryClassifier]:
+    """The trained classifier, or None when no artifact has been built."""
+    global _classifier, _loaded
+    if not _loaded:
+        _loaded = True
+        if os.path.exists(QUERY_CLASSIFIER_PATH):
+            _classifier = QueryClassifier.load(QUERY_CLASSIFIER_PATH)
+            print(f"[CLASSIFIER] Loaded {QUERY_CLASSIFIER_PATH} "
+                  f"({', '.join(f'{f}: {len(v)}' for f, v in _classifier.labels.items())})")
+    return _classifier
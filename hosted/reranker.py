@@ -0,0 +1,145 @@
+"""
+GrowPak Re-ranker
+Optional second retrieval stage (RERANK=1). rag_search pulls a wider
+candidate set from Chroma (RERANK_CANDIDATES), and a small cross-encoder
+scores every (query, KB entry) pair in one batch. The best top_k are kept
+and judged by that score (RERANK_THRESHOLD) instead of bi-encoder cosine.
+This is sharper at the margin, so the pipeline can hand Groq fewer
+contexts (RERANK_CONTEXTS).
+
+The cross-encoder runs on CPU with int8 dynamic quantisation of its Linear
+layers. Each call is planned against RERANK_BUDGET_MS using the measured
+cost per pair. If the budget doesn't cover every candidate, the list is cut
+to the best-by-cosine ones that fit. If it doesn't even cover top_k, re-ranking
+is skipped and the cosine order stands; every RERANK_PROBE_EVERY skips in a
+row, one call re-ranks just the top_k anyway so that a single slow batch
+(GC pause, CPU contention) can't switch re-ranking off for good.
+"""
+
+import os
+import time
+import threading
+from typing import Dict, List, Tuple
+
+# ─────────────────────────────────────────────────────────────
+# CONFIG  (override via environment variables)
+# ─────────────────────────────────────────────────────────────
+RERANK             = os.getenv("RERANK", "0") == "1"
+RERANK_MODEL       = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES  = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_BUDGET_MS   = float(os.getenv("RERANK_BUDGET_MS", "150"))
+RERANK_THRESHOLD   = float(os.getenv("RERANK_THRESHOLD", "0.3"))
+RERANK_CONTEXTS    = int(os.getenv("RERANK_CONTEXTS", "2"))
+RERANK_QUANTIZE    = os.getenv("RERANK_QUANTIZE", "1") == "1"
+RERANK_PROBE_EVERY = int(os.getenv("RERANK_PROBE_EVERY", "20"))
+
+MAX_PAIR_TOKENS = 256   # question + answer are cut here; KB answers are short
+EWMA_ALPHA      = 0.2   # weight of the newest per-pair timing
+
+
+def _passage(result: Dict) -> str:
+    return f"{result['question']} {result['answer']}"
+
+
+class Reranker:
+    def __init__(self, model_name: str = RERANK_MODEL, budget_ms: float = RERANK_BUDGET_MS,
+                 quantize: bool = RERANK_QUANTIZE, probe_every: int = RERANK_PROBE_EVERY):
+        self.model_name   = model_name
+        self.budget_ms    = budget_ms
+        self.quantize     = quantize
+        self.probe_every  = max(1, probe_every)
+        self._model       = None
+        self._ms_per_pair = None   # EWMA, None until the first timed batch
+        self._skip_run    = 0      # skips since the last timed batch
+        self._lock        = threading.Lock()
+        self._stats       = {"calls": 0, "reranked": 0, "trimmed": 0, "skipped": 0, "probes": 0,
+                             "over_budget": 0, "pairs": 0, "seconds": 0.0}
+
+    def load(self):
+        """Load (and quantise) the cross-encoder, then time one warm-up batch."""
+        if self._model is not None:
+            return
+        from sentence_transformers import CrossEncoder
+
+        model = CrossEncoder(self.model_name, max_length=MAX_PAIR_TOKENS, device="cpu")
+        if self.quantize:
+            import torch
+            model.model = torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+        # first call pays tokenizer/graph warm-up; keep it out of the estimate
+        model.predict([("warm up", "warm up")] * 4, show_progress_bar=False)
+        self._model = model
+        print(f"  ✅ Re-ranker: {self.model_name} ({'int8' if self.quantize else 'fp32'}, "
+              f"budget {self.budget_ms:.0f} ms)")
+
+    def _affordable(self, n: int) -> int:
+        """How many pairs fit in the budget at the measured cost per pair."""
+        if self._ms_per_pair is None:
+            return n
+        return min(n, int(self.budget_ms / self._ms_per_pair))
+
+    def rerank(self, query: str, results: List[Dict], top_k: int) -> Tuple[List[Dict], bool]:
+        """
+        (results, reranked). results are Chroma hits in cosine order; when
+        reranked, each returned hit carries "rerank_score" in [0, 1].
+        """
+        self.load()
+        with self._lock:
+            self._stats["calls"] += 1
+        if len(results) <= 1:
+            return results[:top_k], False
+
+        n = self._affordable(len(results))
+        if n < min(top_k, len(results)):
+            with self._lock:
+                self._skip_run += 1
+                probe = self._skip_run >= self.probe_every
+                self._stats["probes" if probe else "skipped"] += 1
+            if not probe:
+                return results[:top_k], False
+            # re-measure on the smallest useful batch; the EWMA update below
+            # lets the estimate recover once the slowdown has passed
+            n = min(top_k, len(results))
+        elif n < len(results):
+            with self._lock:
+                self._stats["trimmed"] += 1
+        candidates = results[:n]
+
+        start = time.perf_counter()
+        # one batch; 1-label cross-encoders apply a sigmoid by default
+        scores = self._model.predict([(query, _passage(r)) for r in candidates],
+                                     batch_size=len(candidates), show_progress_bar=False)
+        elapsed_ms = 1000 * (time.perf_counter() - start)
+
+        per_pair = elapsed_ms / len(candidates)
+        with self._lock:
+            self._ms_per_pair = per_pair if self._ms_per_pair is None else (
+                EWMA_ALPHA * per_pair + (1 - EWMA_ALPHA) * self._ms_per_pair)
+            self._skip_run = 0
+            self._stats["reranked"]    += 1
+            self._stats["pairs"]       += len(candidates)
+            self._stats["seconds"]     += elapsed_ms / 1000
+            self._stats["over_budget"] += elapsed_ms > self.budget_ms
+
+        for r, s in zip(candidates, scores):
+            r["rerank_score"] = round(float(s), 4)
+        candidates.sort(key=lambda r: r["rerank_score"], reverse=True)
+        return candidates[:top_k], True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = dict(self._stats)
+            ms_per_pair = self._ms_per_pair
+        out["mean_ms"]     = round(1000 * out.pop("seconds") / out["reranked"], 1) if out["reranked"] else 0.0
+        out["ms_per_pair"] = round(ms_per_pair, 2) if ms_per_pair is not None else None
+        out["budget_ms"]   = self.budget_ms
+        out["model"]       = self.model_name
+        return out
+
+
+_reranker = None
+
+def get_reranker() -> Reranker:
+    global _reranker
+    if _reranker is None:
+        _reranker = Reranker()
+    return _reranker
@@ -0,0 +1,127 @@
+"""
+GrowPak Roman Urdu Normalizer
+Roman Urdu has no standard spelling (gandum/gundum/gehun, kapas/kapaas,
+zyada/ziada/ziyada), which splits one word across several embeddings and
+cache keys. normalize() maps every known spelling to one canonical form
+before the text is embedded or used as a cache key.
+
+Two stages, both compiled once at import:
+  fold()      spelling rules (doubled letters, long vowels, silent h) that
+              reduce a word to a key; variants that differ only in these
+              ways share a key without any dictionary entry.
+  VARIANTS    folded key → canonical spelling: a small built-in list plus
+              roman_urdu_variants.json, mined from the STT transcripts and
+              the KB by mine_roman_variants.py (committed next to this file;
+              re-run the miner after the KB or transcripts change).
+
+Only Latin-script words are touched; Urdu script, digits and unknown words
+pass through unchanged. Lookups go by folded key, so an English word could
+share a key with a mined Roman spelling; the KB's English vocabulary
+(PROTECTED, saved with the mined variants) is therefore never rewritten or
+folded, which keeps English questions and chemical names intact.
+"""
+
+import os
+import re
+import json
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, Tuple
+
+# ─────────────────────────────────────────────────────────────
+# CONFIG  (override via environment variables)
+# ─────────────────────────────────────────────────────────────
+ROMAN_URDU_VARIANTS_PATH = os.getenv(
+    "ROMAN_URDU_VARIANTS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "roman_urdu_variants.json"),
+)
+
+_WORD    = re.compile(r"[a-z]+")
+_PUNCT   = re.compile(r"[^\w\s]+")
+_SPACE   = re.compile(r"\s+")
+_REPEATS = re.compile(r"([a-z])\1+")
+# applied in order to a single lowercase word
+_FOLD_RULES = [(re.compile(p), r) for p, r in (
+    (r"ee", "i"), (r"oo", "u"), (r"ou", "u"), (r"ei", "e"),
+    (r"(?<=[aeiou])h$", ""),          # kyah/kya, nahh/nah
+    (r"(?<=[^aeiou])y(?=[aeiou])", "i"),   # zyada/ziada, kyun/kiun
+    (r"w(?=[aeiou])", "v"),            # wala/vala, pawdar/pavdar
+    (r"q", "k"),                       # qeemat/keemat
+)]
+
+# Spellings the mined list can't discover (different words for the same thing)
+BUILTIN_VARIANTS = {
+    "gundum": "gandum", "gehun": "gandum", "gehon": "gandum", "kanak": "gandum",
+    "kapaas": "kapas", "kupas": "kapas", "narma": "kapas",
+    "chawal": "chawal", "chaval": "chawal", "chanval": "chawal", "dhaan": "dhan", "munji": "dhan",
+    "makai": "makai", "makki": "makai", "makkai": "makai", "chhali": "makai",
+    "ganna": "ganna", "kamad": "ganna",
+    "khad": "khad", "khaad": "khad",
+    "pani": "pani", "paani": "pani", "panni": "pani",
+    "zyada": "zyada", "ziada": "zyada", "ziyada": "zyada", "jyada": "zyada",
+    "bimari": "bimari", "beemari": "bimari", "bemari": "bimari",
+    "keera": "keera", "kira": "keera", "keeray": "keeray", "kiray": "keeray", "keede": "keeray",
+    "spray": "spray", "spre": "spray", "sprey": "spray", "isprey": "spray",
+    "kab": "kab", "kub": "kab",
+    "kaise": "kaise", "kaisay": "kaise", "kesay": "kaise", "kese": "kaise",
+}
+
+
+@lru_cache(maxsize=65536)   # farmer vocabulary is small; most words repeat
+def fold(word: str) -> str:
+    """Spelling key for one lowercase Latin word."""
+    for pattern, repl in _FOLD_RULES:
+        word = pattern.sub(repl, word)
+    return _REPEATS.sub(r"\1", word)
+
+
+def _load_variants(path: str) -> Tuple[Dict[str, str], FrozenSet[str]]:
+    """(folded key → canonical, protected words) from the built-ins and the mined file."""
+    variants, protected = {fold(k): v for k, v in BUILTIN_VARIANTS.items()}, ()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            mined = json.load(f)
+        for key, canonical in mined.get("variants", mined).items():
+            variants.setdefault(fold(key), canonical)   # hand-written entries win
+        protected = mined.get("protected", ())
+    else:
+        print(f"[ROMAN] ⚠️  {path} not found — built-in variants only and no protected "
+              "KB words; run mine_roman_variants.py")
+    return variants, frozenset(protected)
+
+
+VARIANTS, PROTECTED = _load_variants(ROMAN_URDU_VARIANTS_PATH)
+
+
+def _canonical(match) -> str:
+    word = match.group(0)
+    if word in PROTECTED:
+        return word
+    return VARIANTS.get(fold(word), word)
+
+
+def _key_word(match) -> str:
+    word = match.group(0)
+    return word if word in PROTECTED else fold(word)
+
+
+def normalize(text: str) -> str:
+    """Lowercase text with every known Roman Urdu spelling replaced by its canonical form."""
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    return _WORD.sub(_canonical, text)
+
+
+def normalize_key(text: str) -> str:
+    """
+    Lookup key: normalize() plus punctuation and spacing removed and every
+    word except PROTECTED ones folded, so unknown spelling variants still collide.
+    """
+    text = _PUNCT.sub(" ", normalize(text))
+    text = _WORD.sub(_key_word, text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def reload_variants(path: str = ROMAN_URDU_VARIANTS_PATH):
+    """Re-read roman_urdu_variants.json (after re-running mine_roman_variants.py)."""
+    global VARIANTS, PROTECTED
+    VARIANTS, PROTECTED = _load_variants(path)
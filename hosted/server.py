@@ -1,10 +1,13 @@
 import os
+import time
 import tempfile
 import requests
 from flask import Flask, request
 from dotenv import load_dotenv
 from datetime import datetime
 
+from session_store import get_store
+
 load_dotenv()
 
 app = Flask(__name__)
@@ -15,6 +18,26 @@ WHATSAPP_TOKEN   = os.getenv("WHATSAPP_TOKEN")
 PHONE_NUMBER_ID  = os.getenv("PHONE_NUMBER_ID")
 OPENWEATHER_KEY  = os.getenv("OPENWEATHER_API_KEY")
 
+# Menu options after which a typed message is treated as a question: only
+# the first message, and only within QUESTION_WINDOW_MINUTES of the selection
+QUESTION_OPTIONS        = ("option_1", "option_2")
+QUESTION_WINDOW_MINUTES = float(os.getenv("QUESTION_WINDOW_MINUTES", "10"))
+
+# Typed questions get a voice reply too only if this is set
+TEXT_REPLY_AUDIO = os.getenv("TEXT_REPLY_AUDIO", "0") == "1"
+
+# Messages that should always bring up the menu
+MENU_WORDS = {"hi", "hello", "hey", "start", "menu", "salam", "salaam",
+              "assalam", "aoa", "slam", "help", "options"}
+
+# Roman Urdu / Punjabi question words used to spot typed questions
+QUESTION_WORDS = {"kya", "kia", "kaise", "kaisay", "kesay", "kab", "kitna", "kitni",
+                  "kitne", "kis", "kaun", "kon", "kyun", "kyon", "kahan", "konsi",
+                  "konsa", "kiven", "kinna", "what", "how", "when", "which", "why"}
+
+# ── Per-sender conversation state ───────────────────────────
+sessions = get_store()
+
 # ── Lazy pipeline loader ────────────────────────────────────
 # Pipeline is imported on first use, not at startup.
 # This lets the server bind to a port immediately so Render
@@ -41,6 +64,20 @@ def ping():
     return "pong", 200
 
 
+@app.get("/stats")
+def stats():
+    from kb_answers import get_answers
+    from llm_client import get_client
+    from query_classifier import get_classifier
+    from query_cache import get_query_cache
+    from reranker import get_reranker, RERANK
+    classifier = get_classifier()
+    return {"sessions": len(sessions), "kb_answers": get_answers().stats(),
+            "llm": get_client().stats(), "query_cache": get_query_cache().stats(),
+            "query_classifier": classifier.stats() if classifier else None,
+            "reranker": get_reranker().stats() if RERANK else None}, 200
+
+
 @app.get("/webhook")
 def verify_webhook():
     mode      = request.args.get("hub.mode")
@@ -79,6 +116,7 @@ def receive_message():
         if msg["type"] == "location":
             lat = msg["location"]["latitude"]
             lon = msg["location"]["longitude"]
+            sessions.update(sender, lat=lat, lon=lon)
             send_whatsapp_message(sender, get_weather_by_coordinates(lat, lon))
             send_menu(sender)
             return "OK", 200
@@ -88,9 +126,18 @@ def receive_message():
             handle_voice_message(sender, msg["audio"])
             return "OK", 200
 
-        # ── Text message → show menu ─────────────────────────
+        # ── Text message → pipeline if a question is expected ─
         if msg["type"] == "text":
-            send_menu(sender)
+            text    = msg["text"]["body"]
+            session = sessions.get(sender)
+            expects_question = bool(
+                session and session.last_selection in QUESTION_OPTIONS
+                and time.time() - session.updated_at <= QUESTION_WINDOW_MINUTES * 60
+            )
+            if looks_like_question(text, expects_question):
+                handle_text_message(sender, text)
+            else:
+                send_menu(sender)
             return "OK", 200
 
     except Exception as e:
@@ -134,13 +181,62 @@ def handle_voice_message(to: str, audio_obj: dict):
         tmp_path = tmp.name
 
     # 3. Run pipeline
+    try:
+        answer_question(to, audio_path=tmp_path)
+    finally:
+        os.unlink(tmp_path)
+
+    send_menu(to)
+
+
+def looks_like_question(text: str, expects_question: bool = False) -> bool:
+    """
+    Decide whether a typed message is a farming question or a greeting /
+    menu request. After "Crop Guidance" or "Report Disease" any non-greeting
+    text counts; otherwise it needs a question mark, a question word or
+    at least four words.
+    """
+    words = [w.strip("?؟.,!") for w in text.lower().split()]
+    words = [w for w in words if w]
+    if not words or (len(words) <= 2 and words[0] in MENU_WORDS):
+        return False
+    if expects_question:
+        return True
+    if "?" in text or "؟" in text:
+        return True
+    return len(words) >= 4 or any(w in QUESTION_WORDS for w in words)
+
+
+def handle_text_message(to: str, text: str):
+    """Run a typed question through the pipeline (no STT needed)."""
+    answer_question(to, text_input=text, synthesize_speech=TEXT_REPLY_AUDIO)
+    send_menu(to)
+
+
+def answer_question(to: str, **pipeline_kwargs):
+    """
+    Run the pipeline for one question, send the text + audio reply and
+    remember the detected crop/query in the sender's session.
+    """
+    session = sessions.get(to)
     try:
         send_whatsapp_message(to, "⏳ Processing your question...")
         run_pipeline = get_pipeline()
-        result = run_pipeline(audio_path=tmp_path)
+        result = run_pipeline(
+            context=session.as_context() if session else None,
+            **pipeline_kwargs,
+        )
         final_answer  = result.get("final_answer", "")
         audio_out     = result.get("audio_response")
 
+        enhanced = result.get("enhanced_query") or {}
+        sessions.update(
+            to,
+            last_query=enhanced.get("enhanced_query") or result.get("farmer_text"),
+            crop=enhanced.get("crop", "Unknown"),
+            last_selection=None,   # the menu's question has been asked
+        )
+
         # 4a. Send text answer
         if final_answer:
             send_whatsapp_message(to, final_answer)
@@ -155,10 +251,6 @@ def handle_voice_message(to: str, audio_obj: dict):
     except Exception as e:
         print(f"[Pipeline error] {e}")
         send_whatsapp_message(to, "⚠️ Something went wrong while processing. Please try again.")
-    finally:
-        os.unlink(tmp_path)
-
-    send_menu(to)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -238,10 +330,11 @@ def send_menu(to: str):
 
 
 def handle_selection(to: str, selection_id: str):
+    sessions.update(to, last_selection=selection_id)
     if selection_id == "option_1":
         send_whatsapp_message(
             to,
-            "🌾 *Crop Guidance*\nSend me a voice note in Urdu or Punjabi with your question!"
+            "🌾 *Crop Guidance*\nSend me a voice note or type your question in Urdu or Punjabi!"
         )
     elif selection_id == "option_2":
         send_whatsapp_message(
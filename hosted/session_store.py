@@ -0,0 +1,175 @@
+"""
+GrowPak Session Store
+Per-sender conversation state: last menu selection, last enhanced query,
+crop and shared location.
+
+Records live in a bounded in-memory LRU (slotted objects, so 100k active
+farmers fit in a few tens of MB). Set SESSION_DB_PATH to also persist them
+to SQLite so state survives restarts; evicted senders are reloaded from
+disk on their next message.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# ─────────────────────────────────────────────────────────────
+# CONFIG  (override via environment variables)
+# ─────────────────────────────────────────────────────────────
+SESSION_MAX_USERS = int(os.getenv("SESSION_MAX_USERS", "100000"))
+SESSION_TTL_HOURS = float(os.getenv("SESSION_TTL_HOURS", "72"))
+SESSION_DB_PATH   = os.getenv("SESSION_DB_PATH", "")   # empty → memory only
+
+MAX_QUERY_CHARS = 300   # cap per-record memory; only used as retrieval context
+UNKNOWN_CROPS   = ("", "Unknown", "Not specified")
+
+_FIELDS = ("last_selection", "last_query", "crop", "lat", "lon")
+
+
+class Session:
+    """Compact per-sender record. Use SessionStore.update() to modify."""
+
+    __slots__ = ("sender", "last_selection", "last_query", "crop", "lat", "lon", "updated_at")
+
+    def __init__(self, sender: str, last_selection: str = None, last_query: str = None,
+                 crop: str = None, lat: float = None, lon: float = None,
+                 updated_at: float = 0.0):
+        self.sender         = sender
+        self.last_selection = last_selection
+        self.last_query     = last_query
+        self.crop           = crop
+        self.lat            = lat
+        self.lon            = lon
+        self.updated_at     = updated_at
+
+    @property
+    def location(self):
+        if self.lat is None or self.lon is None:
+            return None
+        return (self.lat, self.lon)
+
+    def as_context(self) -> dict:
+        """Fields the pipeline may use to prefill retrieval."""
+        return {"crop": self.crop, "last_query": self.last_query, "location": self.location}
+
+    def __repr__(self):
+        return (f"Session({self.sender!r}, selection={self.last_selection!r}, "
+                f"crop={self.crop!r}, location={self.location!r})")
+
+
+class SessionStore:
+    """Thread-safe LRU of Session records with optional SQLite write-through."""
+
+    def __init__(self, max_sessions: int = SESSION_MAX_USERS,
+                 ttl_seconds: float = SESSION_TTL_HOURS * 3600,
+                 db_path: str = SESSION_DB_PATH):
+        self.max_sessions = max_sessions
+        self.ttl_seconds  = ttl_seconds
+        self._sessions    = OrderedDict()
+        self._lock        = threading.Lock()
+        self._db          = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " sender TEXT PRIMARY KEY, last_selection TEXT, last_query TEXT,"
+                " crop TEXT, lat REAL, lon REAL, updated_at REAL)"
+            )
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, sender: str) -> Optional[Session]:
+        """Return the sender's session, or None if unknown or expired."""
+        with self._lock:
+            session = self._sessions.get(sender)
+            if session is None:
+                session = self._load(sender)
+                if session is None:
+                    return None
+                self._insert(session)
+            else:
+                self._sessions.move_to_end(sender)
+
+            if self.ttl_seconds and time.time() - session.updated_at > self.ttl_seconds:
+                self._delete(sender)
+                return None
+            return session
+
+    def update(self, sender: str, **fields) -> Session:
+        """Set the given fields on the sender's session, creating it if needed."""
+        unknown = set(fields) - set(_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown session fields: {sorted(unknown)}")
+
+        if fields.get("last_query"):
+            fields["last_query"] = str(fields["last_query"])[:MAX_QUERY_CHARS]
+        if "crop" in fields:
+            if fields["crop"] in UNKNOWN_CROPS:
+                del fields["crop"]   # never overwrite a known crop with Unknown
+            else:
+                fields["crop"] = sys.intern(str(fields["crop"]))
+        if fields.get("last_selection"):
+            fields["last_selection"] = sys.intern(fields["last_selection"])
+
+        with self._lock:
+            session = self._sessions.get(sender) or self._load(sender)
+            if session is None:
+                session = Session(sender)
+            for name, value in fields.items():
+                setattr(session, name, value)
+            session.updated_at = time.time()
+            self._insert(session)
+            self._save(session)
+            return session
+
+    def clear(self, sender: str):
+        with self._lock:
+            self._delete(sender)
+
+    # ── internals (caller holds the lock) ───────────────────
+    def _insert(self, session: Session):
+        self._sessions[session.sender] = session
+        self._sessions.move_to_end(session.sender)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)   # still on disk if persisted
+
+    def _delete(self, sender: str):
+        self._sessions.pop(sender, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE sender = ?", (sender,))
+            self._db.commit()
+
+    def _load(self, sender: str) -> Optional[Session]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT sender, last_selection, last_query, crop, lat, lon, updated_at"
+            " FROM sessions WHERE sender = ?", (sender,)
+        ).fetchone()
+        return Session(*row) if row else None
+
+    def _save(self, session: Session):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session.sender, session.last_selection, session.last_query,
+             session.crop, session.lat, session.lon, session.updated_at),
+        )
+        self._db.commit()
+
+
+_store = None
+
+def get_store() -> SessionStore:
+    """Process-wide store, configured from the environment on first use."""
+    global _store
+    if _store is None:
+        _store = SessionStore()
+    return _store
@@ -0,0 +1,259 @@
+"""
+Incremental Knowledge Base Builder (CLI version of Notebook 1)
+
+    python build_kb.py
+    python build_kb.py --excel RAG_knowledgeBase.xlsx --chroma ../hosted/agriculture_chroma_db
+    python build_kb.py --full        # drop the collection and re-embed everything
+
+Every spreadsheet row gets a stable id (from its question + crop) and a
+content hash. The hashes of the last build are kept in kb_manifest.json next
+to the ChromaDB files, so a rebuild only embeds new/changed rows, upserts
+them in bulk and deletes rows that disappeared. Rebuilding an unchanged KB
+just reads the spreadsheet and compares hashes.
+
+The hosted pipeline watches kb_manifest.json and reopens the collection when
+it changes, so no restart is needed after a rebuild. The index path and
+collection default to the hosted app's own CHROMA_DB_PATH / COLLECTION_NAME
+(relative paths are taken from hosted/, where the server runs), so a
+default build lands where the server looks.
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+# ─────────────────────────────────────────────────────────────
+# CONFIG — same defaults (and env vars) as hosted/pipeline.py
+# ─────────────────────────────────────────────────────────────
+HOSTED_DIR      = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hosted"))
+EXCEL_PATH      = "./RAG_knowledgeBase.xlsx"
+CHROMA_DB_PATH  = os.path.normpath(os.path.join(HOSTED_DIR, os.getenv("CHROMA_DB_PATH", "./agriculture_chroma_db")))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+COLLECTION_NAME = os.getenv("COLLECTION_NAME", "agriculture_kb")
+MANIFEST_FILE   = "kb_manifest.json"
+
+EMBED_BATCH  = 256
+UPSERT_BATCH = 512
+
+REQUIRED_COLUMNS = [
+    'QUESTION', 'ANSWER', 'crop', 'topic', 'stage',
+    'intent_type', 'entity', 'region', 'season'
+]
+
+VALID_TOPICS = [
+    'Sowing', 'Seed Rate', 'Nursery', 'Transplanting', 'Fertilizer',
+    'Irrigation', 'Weed Management', 'Pest Management', 'Disease Management',
+    'Harvesting', 'Yield', 'Variety', 'Soil', 'Climate',
+    'Land Preparation', 'General'
+]
+
+VALID_STAGES = [
+    'Pre-Sowing', 'Nursery', 'Germination', 'Vegetative', 'Flowering',
+    'Fruit Formation', 'Grain Formation', 'Maturity', 'Harvest',
+    'Post-Harvest', 'Any'
+]
+
+VALID_INTENT_TYPES = [
+    'Recommendation', 'Prevention', 'Chemical Control', 'Biological Control',
+    'Cultural Control', 'Mechanical Control', 'Symptoms', 'Impact',
+    'Duration', 'Identification', 'Dosage', 'Timing', 'Fact', 'Comparison'
+]
+
+VALID_SEASONS = ['Kharif', 'Rabi', 'Spring', 'Summer', 'Winter', 'Not specified']
+
+
+# ─────────────────────────────────────────────────────────────
+# LOAD + VALIDATE
+# ─────────────────────────────────────────────────────────────
+def load_and_validate_excel(file_path: str) -> pd.DataFrame:
+    """Load the KB spreadsheet and clean it exactly like Notebook 1."""
+    if file_path.endswith('.xlsx') or file_path.endswith('.xls'):
+        df = pd.read_excel(file_path)
+    else:
+        df = pd.read_csv(file_path)
+    print(f"📂 Loaded {file_path}: {len(df)} rows")
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        print(f"⚠️  Missing columns (will be auto-filled): {missing}")
+        for col in missing:
+            df[col] = 'Not specified'
+
+    df = df.fillna('Not specified')
+    df = df[df['QUESTION'].notna() & (df['QUESTION'].astype(str).str.strip() != '')]
+    df = df[df['ANSWER'].notna() & (df['ANSWER'].astype(str).str.strip() != '')]
+    df = df.reset_index(drop=True)
+
+    for col in REQUIRED_COLUMNS:
+        df[col] = df[col].astype(str).str.strip()
+
+    invalid_topics = df[~df['topic'].isin(VALID_TOPICS + ['Not specified'])]['topic'].unique()
+    if len(invalid_topics):
+        print(f"⚠️  Unknown topics (will still be indexed): {list(invalid_topics)}")
+    invalid_seasons = df[~df['season'].isin(VALID_SEASONS)]['season'].unique()
+    if len(invalid_seasons):
+        print(f"⚠️  Unknown seasons: {list(invalid_seasons)}")
+
+    print(f"✅ Clean rows ready for indexing: {len(df)}")
+    return df
+
+
+def row_document(row) -> Tuple[str, Dict]:
+    """Document text + metadata for one row (same layout as Notebook 1)."""
+    doc_text = (
+        f"Question: {row['QUESTION']}\n"
+        f"Answer: {row['ANSWER']}\n"
+        f"Crop: {row['crop']}\n"
+        f"Topic: {row['topic']}\n"
+        f"Stage: {row['stage']}\n"
+        f"Intent: {row['intent_type']}\n"
+        f"Entity: {row['entity']}"
+    )
+    metadata = {
+        'question'   : row['QUESTION'],
+        'answer'     : row['ANSWER'],
+        'crop'       : row['crop'],
+        'topic'      : row['topic'],
+        'stage'      : row['stage'],
+        'intent_type': row['intent_type'],
+        'entity'     : row['entity'],
+        'region'     : row['region'],
+        'season'     : row['season'],
+    }
+    return doc_text, metadata
+
+
+def hash_rows(df: pd.DataFrame) -> Dict[str, Tuple[str, int]]:
+    """
+    Map stable doc id → (content hash, row index). The id comes from
+    question + crop so editing an answer updates the same document;
+    repeated questions get a numeric suffix.
+    """
+    out, seen = {}, {}
+    for idx, row in df.iterrows():
+        base = hashlib.sha1(f"{row['QUESTION']}|{row['crop']}".encode("utf-8")).hexdigest()[:16]
+        seen[base] = seen.get(base, 0) + 1
+        doc_id = f"kb_{base}" if seen[base] == 1 else f"kb_{base}_{seen[base]}"
+        content = "\x1f".join(row[c] for c in REQUIRED_COLUMNS)
+        out[doc_id] = (hashlib.sha1(content.encode("utf-8")).hexdigest(), idx)
+    return out
+
+
+# ─────────────────────────────────────────────────────────────
+# MANIFEST
+# ─────────────────────────────────────────────────────────────
+def load_manifest(chroma_path: str) -> Dict:
+    path = os.path.join(chroma_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(chroma_path: str, manifest: Dict):
+    path = os.path.join(chroma_path, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)   # pipeline reloads when this changes
+
+
+# ─────────────────────────────────────────────────────────────
+# BUILD
+# ─────────────────────────────────────────────────────────────
+def build_incremental(df: pd.DataFrame, chroma_path: str, embedding_model_name: str,
+                      collection_name: str, full: bool = False) -> Dict:
+    """Sync the Chroma collection with df, embedding only what changed."""
+    import chromadb
+
+    start    = time.time()
+    rows     = hash_rows(df)
+    manifest = load_manifest(chroma_path)
+    previous = manifest.get("rows", {})
+
+    os.makedirs(chroma_path, exist_ok=True)
+    client = chromadb.PersistentClient(path=chroma_path)
+    collection = client.get_or_create_collection(name=collection_name, metadata={"hnsw:space": "cosine"})
+
+    # Without a trustworthy manifest we can't know what's in the collection
+    stale = (
+        full
+        or manifest.get("embedding_model") != embedding_model_name
+        or manifest.get("collection") != collection_name
+        or collection.count() != len(previous)
+    )
+    if stale:
+        print("🔄 Full rebuild (no matching manifest, model change or --full)")
+        client.delete_collection(name=collection_name)
+        collection = client.create_collection(name=collection_name, metadata={"hnsw:space": "cosine"})
+        previous = {}
+
+    to_upsert = [doc_id for doc_id, (h, _) in rows.items() if previous.get(doc_id) != h]
+    to_delete = [doc_id for doc_id in previous if doc_id not in rows]
+    print(f"📋 {len(rows)} rows: {len(to_upsert)} new/changed, {len(to_delete)} removed, "
+          f"{len(rows) - len(to_upsert)} unchanged")
+
+    if to_delete:
+        for i in range(0, len(to_delete), UPSERT_BATCH):
+            collection.delete(ids=to_delete[i:i + UPSERT_BATCH])
+        print(f"🗑️  Deleted {len(to_delete)} documents")
+
+    if to_upsert:
+        from sentence_transformers import SentenceTransformer
+
+        print(f"📦 Loading embedding model: {embedding_model_name}")
+        model = SentenceTransformer(embedding_model_name)
+
+        documents, metadatas = [], []
+        for doc_id in to_upsert:
+            doc_text, metadata = row_document(df.loc[rows[doc_id][1]])
+            documents.append(doc_text)
+            metadatas.append(metadata)
+
+        embeddings = model.encode(documents, batch_size=EMBED_BATCH, show_progress_bar=len(documents) > EMBED_BATCH)
+        for i in range(0, len(documents), UPSERT_BATCH):
+            collection.upsert(
+                ids        = to_upsert[i:i + UPSERT_BATCH],
+                documents  = documents[i:i + UPSERT_BATCH],
+                embeddings = embeddings[i:i + UPSERT_BATCH].tolist(),
+                metadatas  = metadatas[i:i + UPSERT_BATCH],
+            )
+        print(f"⚙️  Embedded and upserted {len(to_upsert)} documents")
+
+    if to_upsert or to_delete or stale or not manifest:
+        save_manifest(chroma_path, {
+            "embedding_model": embedding_model_name,
+            "collection":      collection_name,
+            "built_at":        time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "rows":            {doc_id: h for doc_id, (h, _) in rows.items()},
+        })
+
+    summary = {
+        "documents": collection.count(),
+        "upserted":  len(to_upsert),
+        "deleted":   len(to_delete),
+        "seconds":   round(time.time() - start, 2),
+    }
+    print(f"✅ ChromaDB now contains {summary['documents']} documents ({summary['seconds']}s)")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally build the agriculture ChromaDB index.")
+    parser.add_argument("--excel", default=EXCEL_PATH)
+    parser.add_argument("--chroma", default=CHROMA_DB_PATH)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--full", action="store_true", help="Drop and re-embed everything.")
+    args = parser.parse_args()
+
+    df = load_and_validate_excel(args.excel)
+    build_incremental(df, args.chroma, args.model, args.collection, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
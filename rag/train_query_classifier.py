@@ -0,0 +1,178 @@
+"""
+Train + evaluate the local query classifier (hosted/query_classifier.py)
+
+    python train_query_classifier.py
+    python train_query_classifier.py --excel RAG_knowledgeBase.xlsx --out ../hosted/agriculture_chroma_db/query_classifier.npz
+    python train_query_classifier.py --llm-sample 50     # also score the Groq enhancer on 50 held-out questions
+
+Embeds every KB question with the index's embedding model and fits one
+centroid per crop / topic / stage / intent_type label. A held-out split
+(--holdout) is scored first: accuracy per field, plus how many questions
+clear each confidence threshold and how accurate those are, which is what
+decides QUERY_CLASSIFIER_MIN_CONF. With --llm-sample the same held-out
+questions also go through enhance_farmer_query (needs GROQ_API_KEY) so the
+two can be compared on accuracy and latency. The saved classifier is then
+refit on every row.
+
+The artifact belongs next to the Chroma files, so it ships with the index.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from build_kb import (HOSTED_DIR, EXCEL_PATH, CHROMA_DB_PATH, EMBEDDING_MODEL,
+                      VALID_TOPICS, VALID_STAGES, VALID_INTENT_TYPES, load_and_validate_excel)
+
+sys.path.insert(0, HOSTED_DIR)
+from query_classifier import QueryClassifier, FIELDS, DEFAULT_TEMPERATURE   # noqa: E402
+from roman_urdu import normalize as normalize_roman                        # noqa: E402
+
+OUTPUT_FILE = "query_classifier.npz"
+THRESHOLDS  = (0.0, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+
+# Labels outside the fixed vocabularies (typos, 'Not specified') are not
+# predicted; crop has no fixed list, so every crop in the KB is kept.
+VOCABULARIES = {"topic": VALID_TOPICS, "stage": VALID_STAGES, "intent_type": VALID_INTENT_TYPES}
+
+
+def field_targets(df):
+    targets, keep = {}, np.ones(len(df), dtype=bool)
+    for field in FIELDS:
+        values = df[field].to_numpy()
+        targets[field] = values
+        if field in VOCABULARIES:
+            keep &= np.isin(values, VOCABULARIES[field])
+    return targets, keep
+
+
+def split(n, holdout, seed):
+    order = np.random.default_rng(seed).permutation(n)
+    cut = int(n * (1 - holdout))
+    return order[:cut], order[cut:]
+
+
+# ─────────────────────────────────────────────────────────────
+# EVALUATION
+# ─────────────────────────────────────────────────────────────
+def evaluate(classifier, embeddings, targets):
+    """Per-field accuracy, and coverage/accuracy of all-fields-confident predictions per threshold."""
+    start = time.perf_counter()
+    predictions = classifier.predict_batch(embeddings)
+    ms = 1000 * (time.perf_counter() - start) / max(1, len(predictions))
+
+    report = {"questions": len(predictions), "ms_per_question": round(ms, 3), "accuracy": {}, "thresholds": {}}
+    correct = np.zeros((len(predictions), len(FIELDS)), dtype=bool)
+    for j, field in enumerate(FIELDS):
+        correct[:, j] = [p[field][0] == t for p, t in zip(predictions, targets[field])]
+        report["accuracy"][field] = round(float(correct[:, j].mean()), 4)
+
+    min_conf = np.array([min(c for _, c in p.values()) for p in predictions])
+    for t in THRESHOLDS:
+        sure = min_conf >= t
+        report["thresholds"][t] = {
+            "coverage": round(float(sure.mean()), 4),
+            "accuracy": {f: round(float(correct[sure, j].mean()), 4) if sure.any() else None
+                         for j, f in enumerate(FIELDS)},
+        }
+    return report, predictions
+
+
+def evaluate_llm(questions, targets, classifier_predictions):
+    """Run the hosted Groq enhancer on the same questions; returns its accuracy and latency."""
+    import pipeline
+    # LLM only: skip pipeline._init (Chroma, embedding model, STT)
+    pipeline._groq_client = pipeline.get_client(pipeline.GROQ_API_KEY, pipeline.GROQ_MODEL)
+
+    hits = {f: 0 for f in FIELDS}
+    agree = {f: 0 for f in FIELDS}
+    seconds = []
+    for i, question in enumerate(questions):
+        start = time.perf_counter()
+        enhanced = pipeline.enhance_farmer_query(question, use_classifier=False)
+        seconds.append(time.perf_counter() - start)
+        for field in FIELDS:
+            hits[field]  += enhanced.get(field) == targets[field][i]
+            agree[field] += enhanced.get(field) == classifier_predictions[i][field][0]
+    n = len(questions)
+    return {
+        "questions": n,
+        "ms_per_question": round(1000 * sum(seconds) / n, 1),
+        "accuracy": {f: round(hits[f] / n, 4) for f in FIELDS},
+        "agreement_with_classifier": {f: round(agree[f] / n, 4) for f in FIELDS},
+    }
+
+
+def print_report(name, report):
+    acc = "  ".join(f"{f} {report['accuracy'][f]:.1%}" for f in FIELDS)
+    print(f"{name:<11} {report['ms_per_question']:>8.2f} ms/q   {acc}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local crop/topic/stage/intent query classifier.")
+    parser.add_argument("--excel", default=EXCEL_PATH)
+    parser.add_argument("--out", default=os.path.join(CHROMA_DB_PATH, OUTPUT_FILE))
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of rows held out for evaluation.")
+    parser.add_argument("--temperature", type=float, default=DEFAULT_TEMPERATURE)
+    parser.add_argument("--min-examples", type=int, default=2, help="Drop labels with fewer questions.")
+    parser.add_argument("--llm-sample", type=int, default=0, help="Held-out questions to also run through Groq.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    df = load_and_validate_excel(args.excel)
+    targets, keep = field_targets(df)
+    df = df[keep].reset_index(drop=True)
+    targets = {f: v[keep] for f, v in targets.items()}
+    print(f"📋 {len(df)} labelled questions")
+
+    print(f"📦 Loading embedding model: {args.model}")
+    model = SentenceTransformer(args.model)
+    questions = df["QUESTION"].tolist()
+    # same Roman Urdu spelling normalisation the pipeline applies to queries
+    embeddings = model.encode([normalize_roman(q) for q in questions], batch_size=256, normalize_embeddings=True,
+                              show_progress_bar=len(questions) > 256)
+
+    train, test = split(len(df), args.holdout, args.seed)
+    report = None
+    if len(test):
+        classifier = QueryClassifier.fit(embeddings[train], {f: v[train] for f, v in targets.items()},
+                                         args.model, args.temperature, args.min_examples,
+                                         questions=[questions[i] for i in train])
+        test_targets = {f: v[test] for f, v in targets.items()}
+        report, predictions = evaluate(classifier, embeddings[test], test_targets)
+
+        print(f"\nHeld-out evaluation ({len(test)} questions)")
+        print_report("classifier", report)
+        print("\n  min conf   coverage   " + "   ".join(f"{f:>11}" for f in FIELDS))
+        for t, row in report["thresholds"].items():
+            accs = "   ".join(f"{a:>11.1%}" if a is not None else f"{'-':>11}" for a in row["accuracy"].values())
+            print(f"  {t:>8.2f}   {row['coverage']:>8.1%}   {accs}")
+
+        if args.llm_sample:
+            n = min(args.llm_sample, len(test))
+            report["llm"] = evaluate_llm([questions[i] for i in test[:n]],
+                                         {f: v[:n] for f, v in test_targets.items()}, predictions[:n])
+            print(f"\nGroq enhancer on the first {n} held-out questions")
+            print_report("llm", report["llm"])
+            print("  agreement with classifier: " +
+                  "  ".join(f"{f} {a:.1%}" for f, a in report["llm"]["agreement_with_classifier"].items()))
+
+    classifier = QueryClassifier.fit(embeddings, targets, args.model, args.temperature, args.min_examples,
+                                     questions=questions)
+    classifier.info = {"rows": len(df), "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "holdout": report and {k: report[k] for k in ("questions", "accuracy")}}
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    classifier.save(args.out)
+    print(f"\n✅ Saved {args.out} ({json.dumps({f: len(v) for f, v in classifier.labels.items()})}, "
+          f"{len(classifier.vocab)} vocabulary words)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 import os
+import sys
 import random
 import torch
 import pandas as pd
-from scipy.signal import resample
-import soundfile as sf
 from transformers import WhisperProcessor, WhisperForConditionalGeneration
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from growpak_stt.audio import load_audio, TARGET_SR
+
 # ----------------------------------------------------
 # CONFIG
 # ----------------------------------------------------
@@ -32,12 +34,6 @@ model.to(device)
 model.eval()
 
 
-def resample_audio(audio, orig_sr, target_sr=16000):
-    if orig_sr == target_sr:
-        return audio
-    duration = audio.shape[0] / orig_sr
-    target_length = int(duration * target_sr)
-    return resample(audio, target_length)
 # ----------------------------------------------------
 # LOAD DATASET
 # ----------------------------------------------------
@@ -66,11 +62,10 @@ for idx, row in samples.iterrows():
     print("\n----------------------------------------------------")
     print(f"FILE: {file_name}")
 
-    # Load audio
-    audio, sr = sf.read(audio_path)
-    audio = resample_audio(audio, sr, 16000)
+    # Load audio (16 kHz mono float32)
+    audio = load_audio(audio_path)
     # Preprocess (uses your finetuned preprocessor_config + normalizer)
-    inputs = processor(audio, sampling_rate=sr, return_tensors="pt")
+    inputs = processor(audio, sampling_rate=TARGET_SR, return_tensors="pt")
     input_features = inputs.input_features.to(device)
 
     # Predict
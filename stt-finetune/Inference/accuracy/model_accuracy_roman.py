@@ -1,10 +1,14 @@
-import pandas as pd
-import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from growpak_stt.metrics import score_corpus, summarize
+from growpak_stt.results import load_results
 
 # ----------------------------------------------------
-# Load your excel file
+# Load results (Parquet dataset if present, else the workbook)
 # ----------------------------------------------------
-df = pd.read_excel("model_accuracy_v0(roman).xlsx")
+EXCEL_PATH = "model_accuracy_v1.1(roman).xlsx"
 
 # ----------------------------------------------------
 # Cleaning function
@@ -15,68 +19,47 @@ def clean(x):
         return x.strip().replace(" ", "").replace("‌", "")
     return ""
 
-df["ground_truth"] = df["ground_truth"].apply(clean)
-df["prediction"] = df["prediction"].apply(clean)
-df["roman_urdu_auto"] = df["roman_urdu_auto"].apply(clean)
 
-# ----------------------------------------------------
-# Levenshtein distance
-# ----------------------------------------------------
-def levenshtein(a, b):
-    """Compute Levenshtein edit distance between two strings."""
-    m, n = len(a), len(b)
-    dp = np.zeros((m + 1, n + 1), dtype=int)
+def print_breakdown(name, word, char):
+    print(f"{name} S/D/I (words):  {word['substitutions']}/{word['deletions']}/{word['insertions']}"
+          f" of {word['ref_len']} (corpus WER {word['rate']*100:.4f})")
+    print(f"{name} CER:            {char['mean_rate']*100:.4f}")
 
-    for i in range(m + 1):
-        dp[i][0] = i
-    for j in range(n + 1):
-        dp[0][j] = j
 
-    for i in range(1, m + 1):
-        for j in range(1, n + 1):
-            cost = 0 if a[i - 1] == b[j - 1] else 1
-            dp[i][j] = min(
-                dp[i - 1][j] + 1,        # deletion
-                dp[i][j - 1] + 1,        # insertion
-                dp[i - 1][j - 1] + cost  # substitution
-            )
-    return dp[m][n]
+def main():
+    # reads <name>.parquet written by run_evaluation.py when present
+    df = load_results(EXCEL_PATH)
 
-# ----------------------------------------------------
-# WER = edit_distance(words) / number_of_words_in_ground_truth
-# ----------------------------------------------------
-def wer(gt, pred):
-    gt_words = gt.split()
-    pred_words = pred.split()
-    return levenshtein(gt_words, pred_words) / max(len(gt_words), 1)
+    # For WER we need spaces, so raw text is scored; exact match uses the cleaned text
+    gt_raw = df["ground_truth"].astype(str).tolist()
+    wer_pred, cer_pred = score_corpus(gt_raw, df["prediction"].astype(str).tolist())
+    wer_auto, cer_auto = score_corpus(gt_raw, df["roman_urdu_auto"].astype(str).tolist())
 
-# ----------------------------------------------------
-# Compute accuracy (% exact match)
-# ----------------------------------------------------
-pred_acc = (df["prediction"] == df["ground_truth"]).mean()
-auto_acc = (df["roman_urdu_auto"] == df["ground_truth"]).mean()
-
-
-# For WER we need spaces, so use non-cleaned versions for WER.
-# Load original again but only for WER usage:
-df_raw = pd.read_excel("model_accuracy_v1.1(roman).xlsx")
+    df["WER_pred"] = [d["rate"] for d in wer_pred]
+    df["WER_auto"] = [d["rate"] for d in wer_auto]
 
-df["WER_pred"] = df.apply(
-    lambda r: wer(str(df_raw.loc[r.name, "ground_truth"]), 
-                  str(df_raw.loc[r.name, "prediction"])), axis=1)
+    # ----------------------------------------------------
+    # Compute accuracy (% exact match)
+    # ----------------------------------------------------
+    gt_clean = df["ground_truth"].apply(clean)
+    pred_acc = (df["prediction"].apply(clean) == gt_clean).mean()
+    auto_acc = (df["roman_urdu_auto"].apply(clean) == gt_clean).mean()
 
-df["WER_auto"] = df.apply(
-    lambda r: wer(str(df_raw.loc[r.name, "ground_truth"]), 
-                  str(df_raw.loc[r.name, "roman_urdu_auto"])), axis=1)
+    # ----------------------------------------------------
+    # Print report
+    # ----------------------------------------------------
+    print(f"Prediction WER:            {df['WER_pred'].mean()*100:.4f}")
+    print(f"Auto WER:                  {df['WER_auto'].mean()*100:.4f}")
+    print_breakdown("Prediction", summarize(wer_pred), summarize(cer_pred))
+    print_breakdown("Auto      ", summarize(wer_auto), summarize(cer_auto))
+    print("=====================================")
 
-# ----------------------------------------------------
-# Print report
-# ----------------------------------------------------
+    print("========== ACCURACY REPORT ==========")
+    print(f"Prediction Accuracy:       {(1 - df['WER_pred'].mean())*100:.4f}%")
+    print(f"Urdu Auto Accuracy:        {(1 - df['WER_auto'].mean())*100:.4f}%")
+    print(f"Prediction Exact Match:    {pred_acc*100:.4f}%")
+    print(f"Auto Exact Match:          {auto_acc*100:.4f}%")
 
-print(f"Prediction WER:            {df['WER_pred'].mean()*100:.4f}")
-print(f"Auto WER:                  {df['WER_auto'].mean()*100:.4f}")
-print("=====================================")
 
-print("========== ACCURACY REPORT ==========")
-print(f"Prediction Accuracy:       {(1 - df['WER_pred'].mean())*100:.4f}%")
-print(f"Urdu Auto Accuracy:        {(1 - df['WER_auto'].mean())*100:.4f}%")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from growpak_stt.audio import TARGET_SR, ffmpeg_load, has_ffmpeg, iter_ffmpeg_blocks, soundfile_load
+
+try:
+    import resource   # ffmpeg's own memory (Unix only)
+except ImportError:
+    resource = None
+
+# ----------------------------------------------------
+# Time and peak Python-side memory of each way of loading audio, per hour
+# of audio decoded:
+#
+#   sf+fft         the old path: soundfile float64 + scipy.signal.resample
+#   sf+poly        soundfile float32 + resample_poly (fallback without ffmpeg)
+#   ffmpeg         growpak_stt.audio.load_audio with ffmpeg on PATH
+#   ffmpeg-stream  iter_audio_blocks, 60 s blocks, nothing kept
+#
+#   python benchmark_audio_loading.py --audio-folder ../training/data/audio --limit 200
+# ----------------------------------------------------
+
+
+def legacy_load(path):
+    import soundfile as sf
+    from scipy.signal import resample
+
+    audio, sr = sf.read(path)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sr != TARGET_SR:
+        audio = resample(audio, int(audio.shape[0] / sr * TARGET_SR))
+    return audio.astype(np.float32)
+
+
+def stream_only(path):
+    n = 0
+    for block in iter_ffmpeg_blocks(path):
+        n += block.size
+    return n
+
+
+METHODS = {
+    "sf+fft": legacy_load,
+    "sf+poly": soundfile_load,
+    "ffmpeg": ffmpeg_load,
+    "ffmpeg-stream": stream_only,
+}
+
+
+def run(name, loader, paths):
+    seconds, elapsed, peak, failed = 0.0, 0.0, 0, 0
+    for path in paths:
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            out = loader(path)
+        except Exception:
+            failed += 1
+            tracemalloc.stop()
+            continue
+        elapsed += time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        seconds += (out if isinstance(out, int) else len(out)) / TARGET_SR
+
+    hours = seconds / 3600
+    per_hour = elapsed / hours if hours else float("nan")
+    print(f"{name:>14}: {per_hour:8.1f} s per hour of audio, "
+          f"peak {peak / 2**20:8.1f} MB on the largest file "
+          f"({seconds / 60:.1f} min decoded, {failed} failed)")
+    return per_hour, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark audio loading paths.")
+    parser.add_argument("--audio-folder", required=True)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--method", action="append", choices=list(METHODS), default=None)
+    args = parser.parse_args()
+
+    paths = sorted(
+        os.path.join(args.audio_folder, f) for f in os.listdir(args.audio_folder)
+        if not f.startswith(".")
+    )[:args.limit]
+    methods = args.method or list(METHODS)
+    if not has_ffmpeg():
+        print("ffmpeg not on PATH, skipping the ffmpeg methods")
+        methods = [m for m in methods if not m.startswith("ffmpeg")]
+
+    print(f"{len(paths)} files from {args.audio_folder}")
+    results = {name: run(name, METHODS[name], paths) for name in methods}
+
+    baseline = results.get("sf+fft")
+    if baseline and baseline[1]:
+        for name, (per_hour, peak) in results.items():
+            if name != "sf+fft":
+                print(f"{name:>14} vs sf+fft: {baseline[0] / per_hour:5.1f}x faster, "
+                      f"{peak / baseline[1]:.0%} of the peak memory")
+
+    if resource is not None and has_ffmpeg():
+        child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        print(f"Largest ffmpeg process: {child_rss:.1f} MB RSS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import argparse
+
+from run_evaluation import main as run_evaluation
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from growpak_stt.metrics import score_corpus, summarize
+from growpak_stt.results import read_results
+
+# ----------------------------------------------------
+# Latency and WER of each --decode-mode on the same ground-truth files.
+# Every mode writes its own results under --out-dir (re-running resumes),
+# then all are scored with growpak_stt.metrics. The table is also saved to
+# --out-dir/summary.json so the numbers can be quoted and compared later.
+#
+#   python compare_decoding.py --model ../models/whisper_urdu_finetuned_v1.1 \
+#       --audio-folder ../training/data/audio --excel ../training/transcripts_new.xlsx \
+#       --gt-column urdu_script --language ur --draft-model ../models/whisper_urdu_tiny_draft
+# ----------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare decoding modes on a ground-truth spreadsheet.")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--audio-folder", required=True)
+    parser.add_argument("--excel", required=True)
+    parser.add_argument("--gt-column", required=True)
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--precision", default="fp32")
+    parser.add_argument("--draft-model", default=None, help="Enables the assisted mode.")
+    parser.add_argument("--out-dir", default="decoding_comparison")
+    parser.add_argument("--num-beams", default="2")
+    args = parser.parse_args()
+
+    modes = ["beam", "greedy-fallback"] + (["assisted"] if args.draft_model else [])
+    report = []
+    for mode in modes:
+        run_args = [
+            "--model", args.model,
+            "--audio-folder", args.audio_folder,
+            "--excel", args.excel,
+            "--gt-column", args.gt_column,
+            "--precision", args.precision,
+            "--num-beams", args.num_beams,
+            "--decode-mode", mode,
+            "--output", os.path.join(args.out_dir, f"{mode}.xlsx"),
+            "--no-excel",
+        ]
+        if args.language:
+            run_args += ["--language", args.language]
+        if mode == "assisted":
+            run_args += ["--draft-model", args.draft_model, "--batch-size", "1"]
+        summary = run_evaluation(run_args)
+
+        df = read_results(summary["results"])
+        df = df[df["status"] == "ok"]
+        word, char = score_corpus(df["ground_truth"].fillna("").tolist(), df["prediction"].fillna("").tolist())
+        report.append((mode, summary, summarize(word), summarize(char), len(df)))
+
+    print("\n========== DECODING COMPARISON ==========")
+    rows = []
+    for mode, summary, word, char, n in report:
+        rtf = summary["audio_seconds"] / summary["generate_seconds"] if summary["generate_seconds"] else 0.0
+        print(f"{mode:>16}: WER {word['mean_rate']*100:7.3f}  CER {char['mean_rate']*100:7.3f}  "
+              f"{rtf:6.2f} audio-s/s in generate()  ({n} files; {summary['decoder']})")
+        rows.append({"mode": mode, "files": n, "wer": float(word["mean_rate"]), "cer": float(char["mean_rate"]),
+                     "audio_seconds_per_second": round(rtf, 3), "audio_seconds": float(summary["audio_seconds"]),
+                     "decoder": str(summary["decoder"])})
+    print("(speed only covers files decoded in this run; resumed files are scored but not timed)")
+
+    summary_path = os.path.join(args.out_dir, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"model": args.model, "draft_model": args.draft_model, "precision": args.precision,
+                   "num_beams": args.num_beams, "modes": rows}, f, indent=1)
+    print(f"Saved {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
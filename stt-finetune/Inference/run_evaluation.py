@@ -0,0 +1,239 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from growpak_stt.audio import load_audio
+from growpak_stt.transcribe import BatchTranscriber, load_model, FRAMES_PER_SECOND, PRECISIONS, SAMPLE_RATE
+from growpak_stt.longform import LongFormTranscriber
+from growpak_stt.decoding import AssistedDecoder, GreedyFallbackDecoder, load_draft_model
+from growpak_stt.features import file_hash, open_feature_store
+from growpak_stt.feature_store import WHISPER_FRAMES
+from growpak_stt.results import ResultsWriter, completed_keys, export_excel, results_path, text_schema
+
+# ----------------------------------------------------
+# Unified evaluation runner for fine-tuned Whisper checkpoints.
+#
+# Reads a spreadsheet of audio file names (optionally with ground truth),
+# loads audio in a background prefetch pool, decodes chunks from many files
+# per batch, and appends results to a Parquet dataset next to the output
+# (<output>.parquet) as it goes; re-running resumes from there. The Excel
+# report is exported from the dataset once at the end.
+#
+#   python run_evaluation.py --model ../models/whisper_urdu_finetuned_v1.1 \
+#       --audio-folder ../training/data/audio --excel ../training/transcripts_new.xlsx \
+#       --gt-column urdu_script --keep-column auto_text_urdu --language ur \
+#       --output "accuracy/model_accuracy_v1.1(urdu).xlsx"
+#
+# Add --chunking vad for long recordings (cut at pauses, timestamp merging).
+# ----------------------------------------------------
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batched evaluation of a fine-tuned Whisper checkpoint.")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--audio-folder", required=True)
+    parser.add_argument("--excel", required=True, help="Spreadsheet listing the audio files.")
+    parser.add_argument("--output", required=True, help="Result spreadsheet (.xlsx); results go to <output>.parquet.")
+    parser.add_argument("--no-excel", action="store_true", help="Only write the Parquet results.")
+    parser.add_argument("--audio-column", default="file_name")
+    parser.add_argument("--gt-column", default=None, help="Ground-truth text column, if any.")
+    parser.add_argument("--keep-column", action="append", default=[],
+                        help="Extra input column copied to the output (repeatable).")
+    parser.add_argument("--language", default=None, help='Force a decoder language, e.g. "ur".')
+    parser.add_argument("--precision", choices=PRECISIONS, default="fp32")
+    parser.add_argument("--batch-size", type=int, default=8, help="Chunks per generate() call.")
+    parser.add_argument("--files-per-step", type=int, default=32,
+                        help="Files whose chunks are pooled and sorted together.")
+    parser.add_argument("--prefetch-workers", type=int, default=4)
+    parser.add_argument("--steps-per-part", type=int, default=1,
+                        help="Steps written per finished Parquet part; a crash loses at most this many.")
+    parser.add_argument("--chunking", choices=("fixed", "vad"), default="fixed",
+                        help="fixed: --chunk-sec windows; vad: cut long audio at pauses (see growpak_stt.longform).")
+    parser.add_argument("--chunk-sec", type=float, default=None,
+                        help="Window length (fixed, default 25) or longest chunk (vad, default 28).")
+    parser.add_argument("--overlap-sec", type=float, default=None,
+                        help="Overlap between windows (fixed, default 0) or around cuts inside speech (vad, default 1).")
+    parser.add_argument("--timestamps", action="store_true",
+                        help="vad: stitch chunks by decoded timestamps instead of word overlap "
+                             "(only for checkpoints fine-tuned with timestamp tokens).")
+    parser.add_argument("--decode-mode", choices=("beam", "greedy-fallback", "assisted"), default="beam",
+                        help="beam: --num-beams for every chunk; greedy-fallback: greedy, beams only for "
+                             "suspect hypotheses; assisted: draft model proposes, checkpoint verifies.")
+    parser.add_argument("--draft-model", default=None, help="Draft checkpoint for --decode-mode assisted.")
+    parser.add_argument("--fallback-beams", type=int, default=4)
+    parser.add_argument("--compression-ratio-threshold", type=float, default=2.4)
+    parser.add_argument("--logprob-threshold", type=float, default=-1.0)
+    parser.add_argument("--num-beams", type=int, default=2)
+    parser.add_argument("--repetition-penalty", type=float, default=1.15)
+    parser.add_argument("--no-repeat-ngram-size", type=int, default=3)
+    parser.add_argument("--feature-store", default=None,
+                        help="Training feature store; clips under 30 s found there skip decoding.")
+    return parser
+
+
+def load_or_error(path, feature_store=None):
+    try:
+        if feature_store is not None:
+            key = file_hash(path)
+            # a full window means the clip may be longer than what was stored
+            if key in feature_store and feature_store.n_frames(key) < WHISPER_FRAMES:
+                seconds = feature_store.n_frames(key) / FRAMES_PER_SECOND
+                return (feature_store.get(key, frames=WHISPER_FRAMES), seconds), None
+        audio = load_audio(path)
+        return (audio, len(audio) / SAMPLE_RATE), None
+    except Exception as e:
+        return None, e
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    df = pd.read_excel(args.excel)
+    df[args.audio_column] = df[args.audio_column].astype(str)
+
+    columns = ["file_name"]
+    if args.gt_column:
+        columns.append("ground_truth")
+    columns.append("prediction")
+    columns += args.keep_column
+    columns.append("status")
+
+    out_dir = os.path.dirname(args.output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    dataset_path = results_path(args.output)
+
+    done = completed_keys(dataset_path, "file_name")
+    if done:
+        print(f"Resuming: {len(done)} files already in {dataset_path}")
+
+    rows = [r for _, r in df.iterrows() if r[args.audio_column] not in done]
+
+    processor, model, device = load_model(args.model, args.precision)
+
+    decoder = None
+    if args.decode_mode == "greedy-fallback":
+        decoder = GreedyFallbackDecoder(
+            processor.tokenizer,
+            fallback_beams=args.fallback_beams,
+            compression_ratio_threshold=args.compression_ratio_threshold,
+            logprob_threshold=args.logprob_threshold,
+        )
+    elif args.decode_mode == "assisted":
+        if not args.draft_model:
+            raise SystemExit("--decode-mode assisted needs --draft-model")
+        draft = load_draft_model(args.draft_model, device, next(model.parameters()).dtype)
+        decoder = AssistedDecoder(draft, model)
+    generate_kwargs = dict(
+        decoder=decoder,
+        num_beams=args.num_beams,
+        repetition_penalty=args.repetition_penalty,
+        no_repeat_ngram_size=args.no_repeat_ngram_size,
+    )
+    if args.chunking == "vad":
+        transcriber = LongFormTranscriber(
+            processor, model, device,
+            language=args.language,
+            batch_size=args.batch_size,
+            chunk_sec=28 if args.chunk_sec is None else args.chunk_sec,
+            overlap_sec=1.0 if args.overlap_sec is None else args.overlap_sec,
+            use_timestamps=args.timestamps,
+            **generate_kwargs,
+        )
+    else:
+        transcriber = BatchTranscriber(
+            processor, model, device,
+            language=args.language,
+            batch_size=args.batch_size,
+            chunk_sec=25 if args.chunk_sec is None else args.chunk_sec,
+            overlap_sec=0 if args.overlap_sec is None else args.overlap_sec,
+            **generate_kwargs,
+        )
+    print(f"Model: {args.model} ({args.precision} on {device}), {len(rows)} files to process")
+
+    feature_store = None
+    if args.feature_store:
+        feature_store = open_feature_store(args.feature_store, processor.feature_extractor)
+
+    def result_row(row, prediction, status):
+        out = [row[args.audio_column]]
+        if args.gt_column:
+            out.append(row[args.gt_column])
+        out.append(prediction)
+        out += [row[c] for c in args.keep_column]
+        out.append(status)
+        return out
+
+    paths = [os.path.join(args.audio_folder, r[args.audio_column]) for r in rows]
+    steps = [range(i, min(i + args.files_per_step, len(rows))) for i in range(0, len(rows), args.files_per_step)]
+
+    start = time.perf_counter()
+    writer = ResultsWriter(dataset_path, text_schema(columns), appends_per_part=args.steps_per_part)
+    with ThreadPoolExecutor(args.prefetch_workers) as pool, writer:
+        def prefetch(step_range):
+            return [pool.submit(load_or_error, paths[i], feature_store) if os.path.exists(paths[i]) else None
+                    for i in step_range]
+
+        # decode the next step's files in the background while this step generates
+        next_loads = prefetch(steps[0]) if steps else []
+        for n, step_range in enumerate(steps):
+            loads = next_loads
+            next_loads = prefetch(steps[n + 1]) if n + 1 < len(steps) else []
+
+            results, audios, durations, audio_rows = [], [], [], []
+            for i, fut in zip(step_range, loads):
+                row = rows[i]
+                if fut is None:
+                    print(f"  {row[args.audio_column]}: missing audio file")
+                    results.append(result_row(row, None, "missing_audio"))
+                    continue
+                loaded, error = fut.result()
+                if error is not None:
+                    print(f"  {row[args.audio_column]}: ERROR {error}")
+                    results.append(result_row(row, None, "error"))
+                    continue
+                audios.append(loaded[0])
+                durations.append(loaded[1])
+                audio_rows.append(row)
+
+            try:
+                predictions = transcriber.transcribe(audios, durations)
+                for row, text in zip(audio_rows, predictions):
+                    print(f"  {row[args.audio_column]}: {text}")
+                    results.append(result_row(row, text, "ok"))
+            except Exception as e:
+                print(f"  Batch ERROR: {e}")
+                results += [result_row(row, None, "error") for row in audio_rows]
+
+            writer.append(results)
+
+            elapsed = time.perf_counter() - start
+            print(f"[{step_range.stop}/{len(rows)}] "
+                  f"{transcriber.audio_seconds / elapsed:.2f} audio-s/s overall, "
+                  f"{transcriber.realtime_factor:.2f} audio-s/s in generate()")
+
+    if not args.no_excel and (done or rows):
+        export_excel(dataset_path, args.output)
+
+    print("\n----------------------------------------------------")
+    print(f"Finished! Saved results to {dataset_path}" + ("" if args.no_excel else f" and {args.output}"))
+    print(f"Throughput: {transcriber.audio_seconds:.1f} s of audio in {time.perf_counter() - start:.1f} s")
+    if decoder is not None:
+        print(f"Decoding: {decoder}")
+    print("----------------------------------------------------")
+
+    return {
+        "results": dataset_path,
+        "audio_seconds": transcriber.audio_seconds,
+        "generate_seconds": transcriber.generate_seconds,
+        "decoder": str(decoder) if decoder is not None else args.decode_mode,
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
+import sys
 import torch
-import subprocess
-import numpy as np
 from pathlib import Path
 from transformers import (
     WhisperProcessor,
@@ -15,32 +14,9 @@ from transformers import (
 BASE_DIR = Path(__file__).resolve().parent
 MODEL_PATH = (BASE_DIR / ".." / "models" / "whisper_urdu_finetuned_v2").resolve()
 AUDIO_FILE = (BASE_DIR / ".." / "training" / "asr_dataset" / "data" / "Recording.m4a").resolve()
-TARGET_SR = 16000
 
-# ------------------------------
-# FFmpeg loader (always works)
-# ------------------------------
-def load_audio_ffmpeg(path, target_sr=16000):
-    cmd = [
-        "ffmpeg",
-        "-i", str(path),
-        "-f", "f32le",
-        "-ac", "1",
-        "-ar", str(target_sr),
-        "-"
-    ]
-    out = subprocess.run(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        check=True,
-    )
-    audio = np.frombuffer(out.stdout, np.float32)
-    if audio.size == 0:
-        raise RuntimeError(
-            f"No audio decoded from {path}. FFmpeg output:\n{out.stderr.decode(errors='ignore')}"
-        )
-    return audio
+sys.path.insert(0, str(BASE_DIR / ".."))
+from growpak_stt.audio import load_audio, TARGET_SR
 
 
 def load_whisper_processor(model_path: Path) -> WhisperProcessor:
@@ -79,7 +55,7 @@ model.to(device).eval()
 # ------------------------------
 # Load + Resample Audio
 # ------------------------------
-audio = load_audio_ffmpeg(AUDIO_FILE, TARGET_SR)
+audio = load_audio(AUDIO_FILE, TARGET_SR)
 
 # ------------------------------
 # Preprocess
@@ -0,0 +1,6 @@
+"""
+Shared helpers for the GrowPak Whisper fine-tuning and inference scripts.
+
+Scripts under training/ and Inference/ add the stt-finetune folder to
+sys.path and import from here, e.g. `from growpak_stt.audio import load_audio`.
+"""
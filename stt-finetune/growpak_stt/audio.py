@@ -0,0 +1,122 @@
+"""
+One decode path for every script: any audio file -> 16 kHz mono float32.
+
+ffmpeg does the decode, downmix and resample and its output is read from
+the pipe in blocks, so a long file is never held twice (raw bytes + array)
+and iter_audio_blocks can process it without loading it whole. Without
+ffmpeg on PATH, soundfile reads float32 and scipy's polyphase
+resample_poly converts the rate (not the whole-signal FFT resample).
+"""
+
+import shutil
+import subprocess
+from math import gcd
+
+import numpy as np
+
+TARGET_SR = 16000
+BYTES_PER_SAMPLE = 4   # f32le
+
+
+def has_ffmpeg():
+    return shutil.which("ffmpeg") is not None
+
+
+def _ffmpeg_command(file_path, target_sr):
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-i", str(file_path),
+        "-f", "f32le",
+        "-ac", "1",
+        "-ar", str(target_sr),
+        "-"
+    ]
+
+
+# ------------------------------
+# FFmpeg audio loader (streamed)
+# ------------------------------
+def _ffmpeg_reads(file_path, target_sr, block_bytes):
+    """Raw f32le bytes from ffmpeg's stdout, block_bytes at a time."""
+    proc = subprocess.Popen(_ffmpeg_command(file_path, target_sr),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = proc.stdout.read(block_bytes)
+            if not data:
+                break
+            yield data
+        stderr = proc.stderr.read()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed on {file_path}:\n{stderr.decode(errors='ignore')[-2000:]}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+def iter_ffmpeg_blocks(file_path, target_sr=TARGET_SR, block_sec=60):
+    """Yield float32 blocks of about block_sec seconds straight from ffmpeg's stdout."""
+    block_bytes = int(block_sec * target_sr) * BYTES_PER_SAMPLE
+    pending = b""
+    for data in _ffmpeg_reads(file_path, target_sr, block_bytes):
+        data = pending + data if pending else data
+        usable = len(data) - len(data) % BYTES_PER_SAMPLE
+        pending = data[usable:]
+        if usable:
+            yield np.frombuffer(data, dtype=np.float32, count=usable // BYTES_PER_SAMPLE)
+
+
+def ffmpeg_load(file_path, target_sr=TARGET_SR, block_sec=60):
+    """Decode any ffmpeg-readable file to mono float32 at target_sr."""
+    buf = bytearray()
+    for data in _ffmpeg_reads(file_path, target_sr, int(block_sec * target_sr) * BYTES_PER_SAMPLE):
+        buf += data
+    if len(buf) < BYTES_PER_SAMPLE:
+        raise RuntimeError(f"No audio decoded from {file_path}")
+    # the bytearray becomes the array's buffer: no second copy
+    return np.frombuffer(buf, dtype=np.float32, count=len(buf) // BYTES_PER_SAMPLE)
+
+
+# ------------------------------
+# soundfile + polyphase fallback
+# ------------------------------
+def resample_audio(audio, orig_sr, target_sr=TARGET_SR):
+    """Polyphase resampling (scipy.signal.resample_poly); float32 in, float32 out."""
+    if orig_sr == target_sr:
+        return audio.astype(np.float32, copy=False)
+    from scipy.signal import resample_poly
+
+    g = gcd(int(orig_sr), int(target_sr))
+    return resample_poly(audio, target_sr // g, orig_sr // g).astype(np.float32, copy=False)
+
+
+def soundfile_load(file_path, target_sr=TARGET_SR):
+    import soundfile as sf
+
+    audio, sr = sf.read(file_path, dtype="float32", always_2d=True)
+    return resample_audio(audio.mean(axis=1), sr, target_sr)
+
+
+# ------------------------------
+# Public entry points
+# ------------------------------
+def load_audio(file_path, target_sr=TARGET_SR):
+    """16 kHz (target_sr) mono float32 for any file; ffmpeg when available."""
+    if has_ffmpeg():
+        return ffmpeg_load(file_path, target_sr)
+    return soundfile_load(file_path, target_sr)
+
+
+def iter_audio_blocks(file_path, target_sr=TARGET_SR, block_sec=60):
+    """Blocks of about block_sec seconds; only streamed end to end with ffmpeg."""
+    if has_ffmpeg():
+        yield from iter_ffmpeg_blocks(file_path, target_sr, block_sec)
+        return
+    audio = soundfile_load(file_path, target_sr)
+    step = int(block_sec * target_sr)
+    for start in range(0, len(audio), step):
+        yield audio[start:start + step]
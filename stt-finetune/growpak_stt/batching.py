@@ -0,0 +1,122 @@
+"""
+Length-grouped batching for Whisper fine-tuning.
+
+Whisper's encoder only accepts the full 30 s (3000-frame) window, so audio
+padding can't be trimmed per batch; what can be saved is decoder work on
+label padding. LengthBucketSampler puts clips with similar label length
+(and, as a tie-breaker, similar audio duration) in the same batch, and
+PaddingStats lets the collator report how much of each batch is real.
+"""
+
+import random
+from dataclasses import dataclass
+
+from torch.utils.data import Sampler
+from transformers import Seq2SeqTrainer
+
+
+class LengthBucketSampler(Sampler):
+    """
+    Shuffles indices, cuts them into mega-batches of batch_size * mega_batch_mult,
+    sorts each mega-batch by (label length, audio frames) and slices it into
+    batches; the batch order is shuffled again so an epoch isn't short → long.
+    """
+
+    def __init__(self, label_lengths, audio_frames, batch_size, mega_batch_mult=50, seed=42):
+        self.label_lengths = list(label_lengths)
+        self.audio_frames = list(audio_frames) if audio_frames is not None else [0] * len(self.label_lengths)
+        self.batch_size = batch_size
+        self.mega_batch_size = batch_size * mega_batch_mult
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __len__(self):
+        return len(self.label_lengths)
+
+    def batches(self):
+        rng = random.Random(self.seed + self.epoch)
+        indices = list(range(len(self.label_lengths)))
+        rng.shuffle(indices)
+
+        batches = []
+        for start in range(0, len(indices), self.mega_batch_size):
+            mega = sorted(
+                indices[start:start + self.mega_batch_size],
+                key=lambda i: (self.label_lengths[i], self.audio_frames[i]),
+            )
+            batches.extend(mega[i:i + self.batch_size] for i in range(0, len(mega), self.batch_size))
+
+        # The trainer / DataLoader re-cut the flat index stream into
+        # batch_size chunks, so the one short batch (the tail of the last
+        # mega-batch) must stay last: anywhere else it would shift every
+        # later chunk across two length buckets.
+        full = [b for b in batches if len(b) == self.batch_size]
+        rng.shuffle(full)
+        return full + [b for b in batches if len(b) < self.batch_size]
+
+    def check_chunking(self):
+        """
+        Raise unless the index stream, cut into batch_size chunks the way the
+        trainer does, gives back exactly batches(). Doesn't advance the epoch.
+        """
+        batches = self.batches()
+        flat = [i for batch in batches for i in batch]
+        chunks = [flat[i:i + self.batch_size] for i in range(0, len(flat), self.batch_size)]
+        if chunks != batches:
+            bad = next(n for n, (a, b) in enumerate(zip(chunks, batches)) if a != b)
+            raise RuntimeError(f"LengthBucketSampler: chunk {bad} of {len(batches)} straddles two buckets")
+
+    def __iter__(self):
+        batches = self.batches()
+        self.epoch += 1
+        for batch in batches:
+            yield from batch
+
+
+@dataclass
+class PaddingStats:
+    """Running counts of real vs padded label tokens and audio frames."""
+    label_tokens: int = 0
+    label_slots: int = 0
+    audio_frames: int = 0
+    audio_slots: int = 0
+    batches: int = 0
+
+    def update(self, label_lengths, max_label_len, frames=None, frame_slots=3000):
+        self.batches += 1
+        self.label_tokens += sum(label_lengths)
+        self.label_slots += max_label_len * len(label_lengths)
+        if frames is not None:
+            self.audio_frames += sum(frames)
+            self.audio_slots += frame_slots * len(frames)
+
+    @property
+    def label_efficiency(self):
+        return self.label_tokens / self.label_slots if self.label_slots else 0.0
+
+    @property
+    def audio_efficiency(self):
+        return self.audio_frames / self.audio_slots if self.audio_slots else 0.0
+
+    def reset(self):
+        self.label_tokens = self.label_slots = self.audio_frames = self.audio_slots = self.batches = 0
+
+    def __str__(self):
+        return (f"label padding efficiency {self.label_efficiency:.1%}, "
+                f"audio padding efficiency {self.audio_efficiency:.1%} over {self.batches} batches")
+
+
+class BucketedSeq2SeqTrainer(Seq2SeqTrainer):
+    """Seq2SeqTrainer that draws training batches from a LengthBucketSampler."""
+
+    def __init__(self, *args, train_sampler=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bucket_sampler = train_sampler
+
+    def _get_train_sampler(self, *args, **kwargs):
+        if self.bucket_sampler is not None:
+            return self.bucket_sampler
+        return super()._get_train_sampler(*args, **kwargs)
@@ -0,0 +1,230 @@
+"""
+Trainer callbacks shared by the fine-tuning scripts.
+
+CSVLoggerCallback keeps the HF trainer logs (training_logs.csv at the end,
+and now also streamed line by line to training_logs.jsonl). ProfilingCallback
+adds one row per optimizer step to training_profile.csv while training runs:
+wall time, samples/s, audio-s/s, time spent producing batches vs running the
+model, peak memory and label padding — enough to tell whether a run is bound
+by preprocessing/I/O or by the model.
+
+Batch timing comes from wrapping the data collator (wrap_collator), so it
+is exact with the default dataloader_num_workers=0. With loader workers the
+collation happens in other processes; the wait for their batches then shows
+up as idle time between steps instead.
+"""
+
+import os
+import csv
+import json
+import time
+
+import pandas as pd
+import torch
+from transformers import TrainerCallback
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+FRAMES_PER_SECOND = 100
+
+
+class CSVLoggerCallback(TrainerCallback):
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.logs = []
+        self._log_file = None
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        if state.is_world_process_zero:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._log_file = open(os.path.join(self.output_dir, "training_logs.jsonl"), "a", encoding="utf-8")
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        if logs:
+            logs["step"] = state.global_step
+            logs["epoch"] = state.epoch
+            self.logs.append(logs)
+            if self._log_file is not None:
+                self._log_file.write(json.dumps(logs) + "\n")
+                self._log_file.flush()
+
+    def on_train_end(self, args, state, control, **kwargs):
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        if not state.is_world_process_zero:
+            return
+        df = pd.DataFrame(self.logs)
+        save_path = os.path.join(self.output_dir, "training_logs.csv")
+        df.to_csv(save_path, index=False)
+        print(f"\n✅ Training logs saved to: {save_path}\n")
+
+
+class _TimedCollator:
+    """Calls the real collator and records time, samples, audio and label padding."""
+
+    def __init__(self, collator, profiler):
+        self.collator = collator
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        if name in ("collator", "profiler"):   # not set yet (e.g. while unpickling)
+            raise AttributeError(name)
+        return getattr(self.collator, name)
+
+    def __call__(self, features):
+        start = time.perf_counter()
+        batch = self.collator(features)
+        p = self.profiler
+        p.collate_seconds += time.perf_counter() - start
+
+        p.samples += len(features)
+        store = getattr(self.collator, "feature_store", None)
+        if store is not None and "feature_key" in features[0]:
+            p.audio_seconds += sum(store.n_frames(f["feature_key"]) for f in features) / FRAMES_PER_SECOND
+        elif "n_frames" in features[0]:   # streaming rows
+            p.audio_seconds += sum(f["n_frames"] for f in features) / FRAMES_PER_SECOND
+        labels = batch.get("labels")
+        if labels is not None:
+            p.label_tokens += int(labels.ne(-100).sum())
+            p.label_slots += labels.numel()
+        return batch
+
+
+class ProfilingCallback(CSVLoggerCallback):
+    COLUMNS = [
+        "step", "epoch", "wall_s", "samples", "samples_per_s", "audio_s_per_s",
+        "collate_s", "idle_s", "data_wait_s", "compute_s", "data_share",
+        "peak_mem_mb", "label_padding", "loss",
+    ]
+
+    def __init__(self, output_dir, profile_file="training_profile.csv"):
+        super().__init__(output_dir)
+        self.profile_path = os.path.join(output_dir, profile_file)
+        self._writer = None
+        self._file = None
+        self._reset_counters()
+        self.collate_seconds = 0.0
+        self.totals = {"wall_s": 0.0, "data_wait_s": 0.0, "samples": 0, "audio_s": 0.0, "steps": 0}
+
+    def wrap_collator(self, collator):
+        return _TimedCollator(collator, self)
+
+    def _reset_counters(self):
+        self.samples = 0
+        self.audio_seconds = 0.0
+        self.label_tokens = 0
+        self.label_slots = 0
+
+    # --------------------------
+    # Trainer events
+    # --------------------------
+    def on_train_begin(self, args, state, control, **kwargs):
+        super().on_train_begin(args, state, control, **kwargs)
+        if state.is_world_process_zero:
+            new_file = not os.path.exists(self.profile_path)
+            self._file = open(self.profile_path, "a", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.COLUMNS)
+            if new_file:
+                self._writer.writeheader()
+        self._last_end = time.perf_counter()
+        self._collate_at_end = self.collate_seconds
+        self._last_loss = None
+        self._reset_peak_memory()
+
+    def on_step_begin(self, args, state, control, **kwargs):
+        # time since the last step that went into anything but collation:
+        # waiting on loader workers, dataset reads, logging
+        now = time.perf_counter()
+        self._idle = max(0.0, (now - self._last_end) - (self.collate_seconds - self._collate_at_end))
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        if logs and "loss" in logs:
+            self._last_loss = logs["loss"]
+        super().on_log(args, state, control, logs=logs, **kwargs)
+
+    def on_step_end(self, args, state, control, **kwargs):
+        now = time.perf_counter()
+        wall = now - self._last_end
+        collate = self.collate_seconds - self._collate_at_end
+        idle = getattr(self, "_idle", 0.0)
+        data_wait = min(wall, collate + idle)
+
+        row = {
+            "step": state.global_step,
+            "epoch": round(state.epoch or 0.0, 4),
+            "wall_s": round(wall, 4),
+            "samples": self.samples,
+            "samples_per_s": round(self.samples / wall, 3) if wall else 0.0,
+            "audio_s_per_s": round(self.audio_seconds / wall, 3) if wall else 0.0,
+            "collate_s": round(collate, 4),
+            "idle_s": round(idle, 4),
+            "data_wait_s": round(data_wait, 4),
+            "compute_s": round(wall - data_wait, 4),
+            "data_share": round(data_wait / wall, 4) if wall else 0.0,
+            "peak_mem_mb": round(self._peak_memory_mb(), 1),
+            "label_padding": round(1 - self.label_tokens / self.label_slots, 4) if self.label_slots else 0.0,
+            "loss": self._last_loss,
+        }
+        if self._writer is not None:
+            self._writer.writerow(row)
+            self._file.flush()
+
+        self.totals["wall_s"] += wall
+        self.totals["data_wait_s"] += data_wait
+        self.totals["samples"] += self.samples
+        self.totals["audio_s"] += self.audio_seconds
+        self.totals["steps"] += 1
+
+        self._reset_peak_memory()
+        self._restart_clock()
+
+    def _restart_clock(self):
+        """Leave evaluation / checkpointing (and their batches) out of the next step."""
+        self._reset_counters()
+        self._last_end = time.perf_counter()
+        self._collate_at_end = self.collate_seconds
+
+    def on_evaluate(self, args, state, control, **kwargs):
+        self._restart_clock()
+
+    def on_save(self, args, state, control, **kwargs):
+        self._restart_clock()
+
+    def on_train_end(self, args, state, control, **kwargs):
+        if self._file is not None:
+            self._file.close()
+            self._file = self._writer = None
+        super().on_train_end(args, state, control, **kwargs)
+        if state.is_world_process_zero:
+            print(self.summary())
+
+    # --------------------------
+    # Helpers
+    # --------------------------
+    @staticmethod
+    def _reset_peak_memory():
+        if torch.cuda.is_available():
+            torch.cuda.reset_peak_memory_stats()
+
+    @staticmethod
+    def _peak_memory_mb():
+        if torch.cuda.is_available():
+            return torch.cuda.max_memory_allocated() / 2**20
+        if resource is not None:
+            # process peak RSS (kB on Linux); CPU runs only
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return 0.0
+
+    def summary(self):
+        t = self.totals
+        if not t["steps"] or not t["wall_s"]:
+            return "Profile: no steps recorded"
+        share = t["data_wait_s"] / t["wall_s"]
+        verdict = "data loading / preprocessing" if share > 0.3 else "the model (compute)"
+        return (f"Profile: {t['steps']} steps, {t['samples'] / t['wall_s']:.2f} samples/s, "
+                f"{t['audio_s'] / t['wall_s']:.1f} audio-s/s, {share:.1%} of step time waiting on data "
+                f"→ bound by {verdict} (per-step rows in {self.profile_path})")
@@ -0,0 +1,119 @@
+"""
+Cheaper decoding strategies for BatchTranscriber (decoder=...).
+
+GreedyFallbackDecoder decodes the whole batch greedily and re-decodes with
+beam search only the hypotheses that look broken: a high gzip compression
+ratio (Whisper's repetition loops) or a low average token log-prob — the
+same two signals openai/whisper uses for its temperature fallback.
+
+AssistedDecoder runs assisted (speculative) generation: a small draft
+model with the same tokenizer proposes tokens and the fine-tuned model
+verifies them in one forward pass. Output matches greedy decoding of the
+main model; transformers only supports it one sequence at a time.
+"""
+
+import zlib
+
+import torch
+
+# generate() options that only make sense for beam search
+BEAM_ONLY = ("num_beams", "length_penalty", "early_stopping", "num_return_sequences")
+
+
+def compression_ratio(text):
+    data = text.encode("utf-8")
+    if not data:
+        return 0.0
+    return len(data) / len(zlib.compress(data))
+
+
+def _strip_beam_kwargs(kwargs):
+    return {k: v for k, v in kwargs.items() if k not in BEAM_ONLY}
+
+
+class GreedyFallbackDecoder:
+    def __init__(self, tokenizer, fallback_beams=4, compression_ratio_threshold=2.4,
+                 logprob_threshold=-1.0):
+        self.tokenizer = tokenizer
+        self.fallback_beams = fallback_beams
+        self.compression_ratio_threshold = compression_ratio_threshold
+        self.logprob_threshold = logprob_threshold
+        self.decoded = 0
+        self.fallbacks = 0
+
+    def _needs_fallback(self, text, avg_logprob):
+        return (compression_ratio(text) > self.compression_ratio_threshold
+                or avg_logprob < self.logprob_threshold)
+
+    def __call__(self, model, input_features, generate_kwargs):
+        greedy_kwargs = _strip_beam_kwargs(generate_kwargs)
+        out = model.generate(
+            input_features, num_beams=1,
+            output_scores=True, return_dict_in_generate=True, **greedy_kwargs
+        )
+        scores = model.compute_transition_scores(out.sequences, out.scores, normalize_logits=True)
+        generated = out.sequences[:, -scores.shape[1]:]
+
+        eos = model.generation_config.eos_token_id
+        eos = set(eos if isinstance(eos, (list, tuple)) else [eos])
+
+        sequences = [seq.tolist() for seq in out.sequences]
+        retry = []
+        for i, (tokens, token_scores) in enumerate(zip(generated.tolist(), scores)):
+            # count up to and including the first end-of-text; the rest is padding
+            length = next((n + 1 for n, t in enumerate(tokens) if t in eos), len(tokens))
+            avg_logprob = float(token_scores[:length].sum()) / max(length, 1)
+            text = self.tokenizer.decode(sequences[i], skip_special_tokens=True)
+            if self._needs_fallback(text, avg_logprob):
+                retry.append(i)
+
+        self.decoded += len(sequences)
+        if retry:
+            self.fallbacks += len(retry)
+            beam_kwargs = dict(generate_kwargs)
+            beam_kwargs["num_beams"] = max(beam_kwargs.get("num_beams", 1), self.fallback_beams)
+            redone = model.generate(input_features[retry], **beam_kwargs)
+            for i, seq in zip(retry, redone):
+                sequences[i] = seq.tolist()
+        return sequences
+
+    @property
+    def fallback_rate(self):
+        return self.fallbacks / self.decoded if self.decoded else 0.0
+
+    def __str__(self):
+        return f"greedy+fallback: {self.fallbacks}/{self.decoded} chunks re-decoded with beams ({self.fallback_rate:.1%})"
+
+
+class AssistedDecoder:
+    def __init__(self, draft_model, main_model=None):
+        if main_model is not None and draft_model.config.vocab_size != main_model.config.vocab_size:
+            raise ValueError(
+                f"draft model vocab ({draft_model.config.vocab_size}) does not match "
+                f"the main model ({main_model.config.vocab_size}); they must share a tokenizer"
+            )
+        self.draft_model = draft_model
+        self.decoded = 0
+
+    def __call__(self, model, input_features, generate_kwargs):
+        kwargs = _strip_beam_kwargs(generate_kwargs)
+        sequences = []
+        for i in range(input_features.shape[0]):
+            with torch.no_grad():
+                out = model.generate(input_features[i:i + 1], assistant_model=self.draft_model, **kwargs)
+            sequences.append(out[0].tolist())
+        self.decoded += len(sequences)
+        return sequences
+
+    def __str__(self):
+        return f"assisted: {self.decoded} chunks verified against the draft model"
+
+
+def load_draft_model(model_path, device, dtype):
+    """A draft checkpoint on the main model's device and dtype (e.g. whisper-tiny / -base fine-tunes)."""
+    from transformers import WhisperForConditionalGeneration
+
+    draft = WhisperForConditionalGeneration.from_pretrained(model_path)
+    draft.to(device, dtype=dtype)
+    draft.eval()
+    return draft
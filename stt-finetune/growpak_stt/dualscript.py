@@ -0,0 +1,111 @@
+"""
+Urdu-script and Roman transcripts from one resident model and one encoder pass.
+
+Each chunk is encoded once; the encoder output is then decoded once per
+script, each script by its own LoRA adapter over a shared base
+(growpak_stt.lora, trained by training/train_*.py). Prompting a single
+fine-tune with another language does not give that script: the Urdu model
+prompted with "en" translates into English instead of writing Roman Urdu,
+so every script needs an adapter. Adapters that also changed the encoder
+can't share the encoder pass, so chunks are then encoded per script.
+
+Typical use: Roman text for retrieval, Urdu text for display.
+"""
+
+import time
+
+import torch
+from transformers.modeling_outputs import BaseModelOutput
+
+from .longform import LongFormTranscriber
+from .lora import load_adapters
+from .transcribe import merge_transcripts
+
+# decoder prompt each adapter was trained with, when its info doesn't record one
+SCRIPT_LANGUAGES = {"urdu": "ur", "roman": "en"}
+
+
+def _adapter_touches_encoder(model, name):
+    targets = model.peft_config[name].target_modules
+    if isinstance(targets, str):
+        return "encoder" in targets
+    return any("encoder" in t for t in targets or ())
+
+
+class DualScriptTranscriber(LongFormTranscriber):
+    """
+    transcribe() returns one {script: text} dict per input. model is a
+    PEFT model with one adapter per script; build it with from_adapters.
+    """
+
+    def __init__(self, processor, model, device, scripts, batch_size=8,
+                 chunk_sec=28, overlap_sec=1.0, **generate_kwargs):
+        loaded = getattr(model, "peft_config", {})
+        missing = [name for name in scripts if name not in loaded]
+        if missing:
+            raise ValueError(f"no adapter for script(s) {missing}; each script needs its own "
+                             "LoRA adapter (see DualScriptTranscriber.from_adapters)")
+        super().__init__(processor, model, device, language=None, batch_size=batch_size,
+                         chunk_sec=chunk_sec, overlap_sec=overlap_sec, use_timestamps=False,
+                         **generate_kwargs)
+        self.scripts = dict(scripts)   # adapter name -> decoder language
+        self.shared_encoder = not any(_adapter_touches_encoder(model, name) for name in self.scripts)
+        self.encoder_seconds = 0.0
+        self.encoder_passes_saved = 0
+
+    @classmethod
+    def from_model(cls, model_path, adapters=None, precision="fp32", device=None, **kwargs):
+        """
+        model_path as the base for per-script adapters. There is no
+        adapter-free mode: one checkpoint prompted per language doesn't
+        produce both scripts.
+        """
+        if not adapters:
+            raise ValueError("DualScriptTranscriber needs one LoRA adapter per script "
+                             f"(e.g. {{'urdu': dir, 'roman': dir}}); got none for {model_path}")
+        return cls.from_adapters(adapters, base_model=model_path, precision=precision, device=device, **kwargs)
+
+    @classmethod
+    def from_adapters(cls, adapters, base_model=None, precision="fp32", device=None, **kwargs):
+        """adapters: {script name: adapter dir from growpak_stt.lora.export_adapter}"""
+        processor, model, device, infos = load_adapters(adapters, base_model, precision, device)
+        scripts = {name: infos[name].get("language") or SCRIPT_LANGUAGES.get(name) for name in adapters}
+        return cls(processor, model, device, scripts, **kwargs)
+
+    def _decode_script(self, name, input_features, encoder_hidden):
+        self.model.set_adapter(name)
+        kwargs = dict(self.generate_kwargs)
+        if self.scripts[name]:
+            kwargs.update(language=self.scripts[name], task="transcribe")
+
+        if encoder_hidden is not None:
+            # a fresh wrapper each time: generate() expands it for beam search
+            ids = self.model.generate(encoder_outputs=BaseModelOutput(last_hidden_state=encoder_hidden), **kwargs)
+        else:
+            ids = self.model.generate(input_features, **kwargs)
+        return [t.strip() for t in self.processor.tokenizer.batch_decode(ids, skip_special_tokens=True)]
+
+    def _generate(self, chunks):
+        input_features = self._input_features(chunks)
+        start = time.perf_counter()
+        with torch.no_grad():
+            encoder_hidden = None
+            if self.shared_encoder:
+                t = time.perf_counter()
+                encoder_hidden = self.model.get_encoder()(input_features).last_hidden_state
+                self.encoder_seconds += time.perf_counter() - t
+                self.encoder_passes_saved += (len(self.scripts) - 1) * len(chunks)
+            texts = {name: self._decode_script(name, input_features, encoder_hidden) for name in self.scripts}
+        self.generate_seconds += time.perf_counter() - start
+        return [{name: texts[name][i] for name in self.scripts} for i in range(len(chunks))]
+
+    def _merge(self, pieces):
+        merged = {}
+        for name in self.scripts:
+            text_so_far = ""
+            for out, _ in pieces:
+                text = out[name]
+                if text:
+                    text_so_far = merge_transcripts(text_so_far, text) if text_so_far else text
+            merged[name] = text_so_far
+        return merged
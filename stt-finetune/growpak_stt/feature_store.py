@@ -0,0 +1,134 @@
+"""
+Single-file, memory-mapped store of Whisper log-mel input features.
+
+Layout of a store directory:
+    features.f16   all clips back to back, float16, shape (total_frames, n_mels)
+    index.json     {"n_mels", "config", "total_frames",
+                    "clips": {key: [frame_offset, n_frames, pad_value]}}
+
+Whisper pads every clip to 30 s, and after log-mel normalisation the padded
+tail is one constant per clip. Only the frames up to the end of that constant
+tail are stored, plus the pad value, so short farmer clips take a fraction of
+the 3000 frames. Reading returns a view into the memory map; get() re-pads to
+the full Whisper window.
+"""
+
+import os
+import json
+
+import numpy as np
+
+FEATURES_FILE = "features.f16"
+INDEX_FILE = "index.json"
+WHISPER_FRAMES = 3000
+
+
+def _trim(features):
+    """(n_mels, frames) → (kept_frames, pad_value); keeps everything if the tail isn't constant."""
+    pad_value = float(features[0, -1])
+    is_pad = np.all(features == pad_value, axis=0)
+    if not is_pad[-1]:
+        return features.shape[1], pad_value
+    # last frame that is *not* padding, +1
+    non_pad = np.flatnonzero(~is_pad)
+    kept = int(non_pad[-1]) + 1 if non_pad.size else 0
+    return kept, pad_value
+
+
+class FeatureStore:
+    """Read-only view of a feature store."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE), encoding="utf-8") as f:
+            index = json.load(f)
+        self.n_mels = index["n_mels"]
+        self.config = index["config"]
+        self.clips = index["clips"]
+        total = index["total_frames"]
+        self._data = (
+            np.memmap(os.path.join(path, FEATURES_FILE), dtype=np.float16, mode="r", shape=(total, self.n_mels))
+            if total else np.zeros((0, self.n_mels), dtype=np.float16)
+        )
+
+    def __len__(self):
+        return len(self.clips)
+
+    def __contains__(self, key):
+        return key in self.clips
+
+    def get_raw(self, key):
+        """Stored frames as a zero-copy (n_mels, n_frames) float16 view, plus the pad value."""
+        offset, n_frames, pad_value = self.clips[key]
+        return self._data[offset:offset + n_frames].T, pad_value
+
+    def get(self, key, frames=WHISPER_FRAMES, dtype=np.float32):
+        """Full Whisper input features (n_mels, frames) for one clip."""
+        raw, pad_value = self.get_raw(key)
+        out = np.full((self.n_mels, frames), pad_value, dtype=dtype)
+        n = min(raw.shape[1], frames)
+        out[:, :n] = raw[:, :n]
+        return out
+
+    def n_frames(self, key):
+        return self.clips[key][1]
+
+
+class FeatureStoreWriter:
+    """
+    Append-only writer. Re-opening an existing store with the same config
+    resumes it (already stored keys are skipped by callers via `in`).
+    """
+
+    def __init__(self, path, n_mels, config):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.n_mels = n_mels
+        self.config = config
+        self.clips = {}
+        self.total_frames = 0
+
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            if index["config"] == config and index["n_mels"] == n_mels:
+                self.clips = index["clips"]
+                self.total_frames = index["total_frames"]
+            else:
+                print(f"Feature store {path} was built with a different processor config — rebuilding.")
+
+        self._file = open(os.path.join(path, FEATURES_FILE), "r+b" if self.total_frames else "wb")
+        # drop anything written after the last saved index (interrupted run)
+        self._file.truncate(self.total_frames * n_mels * 2)
+        self._file.seek(0, os.SEEK_END)
+
+    def __contains__(self, key):
+        return key in self.clips
+
+    def add(self, key, features):
+        """Store (n_mels, frames) features under key."""
+        if key in self.clips:
+            return
+        kept, pad_value = _trim(np.asarray(features))
+        block = np.ascontiguousarray(np.asarray(features)[:, :kept].T, dtype=np.float16)
+        self._file.write(block.tobytes())
+        self.clips[key] = [self.total_frames, kept, pad_value]
+        self.total_frames += kept
+
+    def flush(self):
+        self._file.flush()
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "n_mels": self.n_mels,
+                "config": self.config,
+                "total_frames": self.total_frames,
+                "clips": self.clips,
+            }, f)
+        os.replace(index_path + ".tmp", index_path)
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        return FeatureStore(self.path)
@@ -0,0 +1,102 @@
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .audio import load_audio, TARGET_SR
+from .feature_store import FeatureStoreWriter
+
+
+# ------------------------------
+# Cache keys
+# ------------------------------
+def file_hash(path, block_size=1 << 20):
+    """SHA-1 of the file contents (same clip in two folders → same key)."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def feature_config_hash(feature_extractor):
+    """Hash of the extractor settings, so changing n_mels etc. never reuses stale features."""
+    config = feature_extractor.to_dict()
+    config.pop("processor_class", None)
+    keys = ("feature_size", "sampling_rate", "hop_length", "chunk_length", "n_fft", "padding_value")
+    text = "|".join(f"{k}={config.get(k)}" for k in keys)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+# ------------------------------
+# Parallel decode + batched feature extraction
+# ------------------------------
+class Featurizer:
+    """
+    Computes Whisper input features for audio paths into a FeatureStore.
+
+    Hashing and ffmpeg decoding run in a thread pool sized to the cores (each
+    ffmpeg call is its own process, so threads are enough); log-mel features
+    are then computed in one batched feature_extractor call per worker slice.
+    Clips are keyed by content hash, so ones already in the store (from an
+    earlier run or another folder) are never decoded again.
+    """
+
+    def __init__(self, feature_extractor, store_path, num_workers=None,
+                 sampling_rate=TARGET_SR, flush_every=20):
+        self.feature_extractor = feature_extractor
+        self.sampling_rate = sampling_rate
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.writer = FeatureStoreWriter(
+            store_path, feature_extractor.feature_size, feature_config_hash(feature_extractor)
+        )
+        self.pool = ThreadPoolExecutor(max_workers=self.num_workers)
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._calls = 0
+
+    def _extract(self, waveforms):
+        return list(self.feature_extractor(waveforms, sampling_rate=self.sampling_rate).input_features)
+
+    def __call__(self, paths):
+        """Ensure every path is in the store; returns their keys."""
+        keys = list(self.pool.map(file_hash, paths))
+
+        missing, queued = [], set()
+        for i, key in enumerate(keys):
+            if key not in self.writer and key not in queued:
+                missing.append(i)
+                queued.add(key)
+        self.hits += len(paths) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            waveforms = list(self.pool.map(load_audio, [paths[i] for i in missing]))
+            step = max(1, -(-len(missing) // self.num_workers))
+            slices = [waveforms[i:i + step] for i in range(0, len(waveforms), step)]
+            computed = [f for part in self.pool.map(self._extract, slices) for f in part]
+            for i, feats in zip(missing, computed):
+                self.writer.add(keys[i], feats)
+
+        self._calls += 1
+        if self._calls % self.flush_every == 0:
+            self.writer.flush()
+        return keys
+
+    def close(self):
+        """Finish writing and return a reader over the store."""
+        self.pool.shutdown()
+        return self.writer.close()
+
+
+def open_feature_store(path, feature_extractor):
+    """Reader for the store at path if it exists and matches this extractor, else None."""
+    from .feature_store import FeatureStore, INDEX_FILE
+
+    if not os.path.exists(os.path.join(path, INDEX_FILE)):
+        return None
+    store = FeatureStore(path)
+    if store.config != feature_config_hash(feature_extractor) or store.n_mels != feature_extractor.feature_size:
+        print(f"Feature store {path} does not match this processor — computing features instead.")
+        return None
+    return store
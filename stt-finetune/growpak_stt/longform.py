@@ -0,0 +1,185 @@
+"""
+Long-form transcription: VAD-guided chunking + timestamp-based merging.
+
+plan_chunks cuts a long voice note at the quietest point (by frame energy)
+near each 28 s limit instead of at fixed 25 s marks, and drops chunks with
+no speech at all. A cut that has to land inside speech gets overlap_sec of
+context on both sides. All chunks of a file go through one batched generate
+call (BatchTranscriber pools and sorts them). With timestamps on, every
+decoded segment is placed on the file's timeline and kept only by the chunk
+whose own span contains its midpoint, so overlapping context is never
+transcribed twice. Without timestamps (the default) it falls back to
+merge_transcripts: the GrowPak checkpoints were fine-tuned on labels with
+the <|notimestamps|> prefix and never learned timestamp tokens, so timestamp
+merging is opt-in for checkpoints that did.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .transcribe import BatchTranscriber, SAMPLE_RATE, merge_transcripts
+
+WINDOW_SEC = 30.0       # Whisper's input window
+DIGITAL_SILENCE_DB = -90.0
+SPEECH_FLOOR_DB = -40.0  # anything louder is never dropped as silence
+
+
+# ----------------------------------------------------
+# ENERGY VAD
+# ----------------------------------------------------
+def frame_energy_db(audio, sr=SAMPLE_RATE, frame_ms=30):
+    """RMS energy per frame in dB; returns (energies, samples per frame)."""
+    hop = int(sr * frame_ms / 1000)
+    n = len(audio) // hop
+    if n == 0:
+        return np.full(1, -100.0), max(len(audio), 1)
+    frames = audio[:n * hop].astype(np.float32).reshape(n, hop)
+    rms = np.sqrt((frames ** 2).mean(axis=1) + 1e-10)
+    return 20 * np.log10(rms), hop
+
+
+def quiet_threshold_db(energy_db, margin_db=12.0, floor_percentile=5, speech_percentile=90):
+    """
+    Frames within margin_db of the noise floor (a low percentile, ignoring
+    zero padding) count as pauses — but never anything within margin_db + 3
+    of typical speech level, so steady noise isn't mistaken for a pause.
+    """
+    audible = energy_db[energy_db > DIGITAL_SILENCE_DB]
+    if audible.size == 0:
+        return DIGITAL_SILENCE_DB
+    floor, loud = np.percentile(audible, [floor_percentile, speech_percentile])
+    return float(min(floor + margin_db, loud - margin_db - 3))
+
+
+@dataclass
+class Span:
+    """Sample offsets of one chunk: what is decoded (pad_*) and what it owns."""
+    pad_start: int
+    own_start: int
+    own_end: int
+    pad_end: int
+
+
+def plan_chunks(audio, sr=SAMPLE_RATE, max_chunk_sec=28.0, min_chunk_sec=5.0,
+                min_silence_sec=0.2, overlap_sec=1.0, margin_db=12.0, frame_ms=30):
+    """Return the Span list for one waveform (empty if it holds no speech)."""
+    if max_chunk_sec + 2 * overlap_sec > WINDOW_SEC:
+        raise ValueError("max_chunk_sec + 2 * overlap_sec must fit in Whisper's 30 s window")
+
+    energy, hop = frame_energy_db(audio, sr, frame_ms)
+    threshold = quiet_threshold_db(energy, margin_db)
+    # a cut point needs a short stretch of quiet, not one quiet frame
+    width = max(1, int(min_silence_sec * 1000 / frame_ms))
+    smooth = np.convolve(energy, np.ones(width) / width, mode="same")
+    quiet = smooth <= threshold
+    # only chunks that are silent by both measures are skipped; steady
+    # background noise with no pauses must still be transcribed
+    speech = energy > min(threshold, SPEECH_FLOOR_DB)
+
+    max_frames = int(max_chunk_sec * 1000 / frame_ms)
+    min_frames = int(min_chunk_sec * 1000 / frame_ms)
+    overlap = int(overlap_sec * sr)
+    total = len(audio)
+
+    cuts = [(0, True)]   # (frame, cut in silence)
+    start = 0
+    while len(energy) - start > max_frames:
+        lo, hi = start + min_frames, start + max_frames
+        pauses = np.flatnonzero(quiet[lo:hi])
+        if pauses.size:
+            # middle of the latest pause, so chunks stay close to max length
+            end = pauses[-1]
+            run_start = end
+            while run_start > 0 and quiet[lo + run_start - 1]:
+                run_start -= 1
+            c, in_pause = lo + (run_start + end) // 2, True
+        else:
+            # no pause: cut at the quietest frame of the last few seconds
+            lo = max(lo, hi - min_frames)
+            c, in_pause = lo + int(np.argmin(smooth[lo:hi])), False
+        cuts.append((c, in_pause))
+        start = c
+    cuts.append((len(energy), True))
+
+    spans = []
+    for (a, a_quiet), (b, b_quiet) in zip(cuts, cuts[1:]):
+        if not speech[a:b].any():
+            continue
+        own_start = a * hop
+        own_end = total if b == len(energy) else b * hop
+        spans.append(Span(
+            pad_start=own_start if a_quiet else max(0, own_start - overlap),
+            own_start=own_start,
+            own_end=own_end,
+            pad_end=own_end if b_quiet else min(total, own_end + overlap),
+        ))
+    return spans
+
+
+# ----------------------------------------------------
+# TRANSCRIBER
+# ----------------------------------------------------
+class LongFormTranscriber(BatchTranscriber):
+    """
+    BatchTranscriber with VAD chunking and timestamp merging. chunk_sec is
+    the longest chunk; overlap_sec is only added around cuts inside speech.
+    use_timestamps is off by default: the GrowPak checkpoints were
+    fine-tuned without timestamp tokens, so chunks are stitched with
+    merge_transcripts. Turn it on only for checkpoints trained with them.
+    """
+
+    def __init__(self, processor, model, device, language=None, batch_size=8,
+                 chunk_sec=28, overlap_sec=1.0, use_timestamps=False, decoder=None, **generate_kwargs):
+        super().__init__(processor, model, device, language=language, batch_size=batch_size,
+                         chunk_sec=chunk_sec, overlap_sec=overlap_sec, decoder=decoder, **generate_kwargs)
+        self.use_timestamps = use_timestamps
+
+    def _plan(self, audio):
+        spans = plan_chunks(audio, SAMPLE_RATE, max_chunk_sec=self.chunk_sec, overlap_sec=self.overlap_sec)
+        return [(audio[s.pad_start:s.pad_end], s) for s in spans]
+
+    def _generation_kwargs(self):
+        kwargs = super()._generation_kwargs()
+        if self.use_timestamps:
+            kwargs["return_timestamps"] = True
+        return kwargs
+
+    def _decode(self, predicted_ids):
+        if not self.use_timestamps:
+            return super()._decode(predicted_ids)
+        return [
+            self.processor.tokenizer.decode(ids, skip_special_tokens=True, output_offsets=True)
+            for ids in predicted_ids
+        ]
+
+    @staticmethod
+    def _owned_text(out, span):
+        """Text of the timestamped segments this chunk owns, or None without timestamps."""
+        offsets = out.get("offsets") if isinstance(out, dict) else None
+        if not offsets or span is None:
+            return None
+        chunk_start = span.pad_start / SAMPLE_RATE
+        chunk_end = span.pad_end / SAMPLE_RATE
+        kept = []
+        for seg in offsets:
+            seg_start, seg_end = seg["timestamp"]
+            seg_start = chunk_start + (seg_start or 0.0)
+            seg_end = chunk_start + seg_end if seg_end is not None else chunk_end
+            middle = (seg_start + seg_end) / 2 * SAMPLE_RATE
+            if span.own_start <= middle < span.own_end and seg["text"].strip():
+                kept.append(seg["text"].strip())
+        return " ".join(kept)
+
+    def _merge(self, pieces):
+        merged_text = ""
+        for out, span in pieces:
+            text = self._owned_text(out, span)
+            if text is None:
+                # no timestamps: overlapping context has to be matched on words
+                text = (out["text"] if isinstance(out, dict) else out).strip()
+                if text:
+                    merged_text = merge_transcripts(merged_text, text) if merged_text else text
+            elif text:
+                merged_text = f"{merged_text} {text}" if merged_text else text
+        return merged_text
@@ -0,0 +1,125 @@
+"""
+LoRA fine-tuning and adapter serving for Whisper (needs `pip install peft`).
+
+apply_lora freezes the base model and adds low-rank adapters to the
+decoder attention projections (optionally the encoder's too), so only a
+few MB of weights are trained — far less optimizer memory, and practical
+on CPU-only boxes. export_adapter saves either the adapter alone (a few
+MB next to a shared base model) or a merged full checkpoint that loads
+like any other fine-tune.
+
+AdapterSwitcher keeps one base model resident and switches between named
+adapters (e.g. "urdu" / "roman") per request instead of loading two full
+models.
+"""
+
+import os
+import json
+import threading
+
+from .transcribe import BatchTranscriber, load_model
+
+ADAPTER_INFO_FILE = "growpak_adapter.json"
+
+# q/k/v/out projections of self- and cross-attention; fc1/fc2 stay frozen
+DECODER_TARGETS = r".*decoder\.layers\.\d+\.(self_attn|encoder_attn)\.(q_proj|k_proj|v_proj|out_proj)"
+ENCODER_TARGETS = r".*encoder\.layers\.\d+\.self_attn\.(q_proj|k_proj|v_proj|out_proj)"
+
+
+def apply_lora(model, r=32, alpha=64, dropout=0.05, include_encoder=False):
+    from peft import LoraConfig, get_peft_model
+
+    targets = DECODER_TARGETS
+    if include_encoder:
+        targets = f"({DECODER_TARGETS})|({ENCODER_TARGETS})"
+    config = LoraConfig(r=r, lora_alpha=alpha, lora_dropout=dropout, target_modules=targets, bias="none")
+    model = get_peft_model(model, config)
+    model.print_trainable_parameters()
+    return model
+
+
+def export_adapter(model, out_dir, processor, base_model, merge=False, language=None):
+    """
+    merge=False: adapter weights + processor + growpak_adapter.json (base model, language).
+    merge=True: a full checkpoint with the adapter folded into the weights.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if merge:
+        model.merge_and_unload().save_pretrained(out_dir)
+    else:
+        model.save_pretrained(out_dir)
+        with open(os.path.join(out_dir, ADAPTER_INFO_FILE), "w") as f:
+            json.dump({"base_model": base_model, "language": language}, f, indent=2)
+    processor.save_pretrained(out_dir)
+
+
+def read_adapter_info(adapter_dir):
+    path = os.path.join(adapter_dir, ADAPTER_INFO_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_adapters(adapters, base_model=None, precision="fp32", device=None):
+    """
+    One resident base model with every adapter in `adapters` (name -> dir)
+    loaded. Returns (processor, peft model, device, {name: adapter info}).
+    """
+    from peft import PeftModel
+
+    if not adapters:
+        raise ValueError("need at least one adapter")
+    infos = {name: read_adapter_info(path) for name, path in adapters.items()}
+    base_model = base_model or next(iter(infos.values())).get("base_model")
+    if not base_model:
+        raise ValueError("base_model not given and not recorded with the adapters")
+
+    # int8 would quantise the LoRA layers too; adapters need a float base
+    if precision == "int8":
+        raise ValueError("adapters need a float precision (fp32/fp16/bf16)")
+    processor, base, device = load_model(base_model, precision, device)
+
+    names = list(adapters)
+    model = PeftModel.from_pretrained(base, adapters[names[0]], adapter_name=names[0])
+    for name in names[1:]:
+        model.load_adapter(adapters[name], adapter_name=name)
+    model.eval()
+    return processor, model, device, infos
+
+
+class AdapterSwitcher:
+    """
+    adapters maps a name to an adapter directory from export_adapter; all
+    must share base_model (taken from the first adapter's info when None).
+    Calls are serialised: the active adapter is model-wide state.
+    """
+
+    def __init__(self, adapters, base_model=None, precision="fp32", device=None, batch_size=8, **generate_kwargs):
+        self.processor, model, self.device, infos = load_adapters(adapters, base_model, precision, device)
+        self.model = model
+        names = list(adapters)
+
+        self.transcribers = {
+            name: BatchTranscriber(self.processor, model, self.device, language=infos[name].get("language"),
+                                   batch_size=batch_size, **generate_kwargs)
+            for name in names
+        }
+        self.active = None
+        self.lock = threading.Lock()
+
+    @property
+    def names(self):
+        return list(self.transcribers)
+
+    def use(self, name):
+        if name not in self.transcribers:
+            raise KeyError(f"unknown adapter {name!r}; have {self.names}")
+        if name != self.active:
+            self.model.set_adapter(name)
+            self.active = name
+
+    def transcribe(self, name, audios, durations=None):
+        with self.lock:
+            self.use(name)
+            return self.transcribers[name].transcribe(audios, durations)
@@ -0,0 +1,125 @@
+"""
+Word / character error rates with substitution, deletion and insertion counts.
+
+Edit distance is filled one DP row at a time with NumPy: substitutions and
+deletions are plain vector ops on the previous row, and the insertion chain
+inside a row is a running minimum (np.minimum.accumulate). Rows are kept
+for a short backtrace that splits the distance into S / D / I. Many
+utterance pairs can be scored in parallel across cores with score_corpus.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def _encode(ref_tokens, hyp_tokens):
+    """Map tokens (words or characters) to small ints so rows compare as arrays."""
+    vocab = {}
+    ref = np.fromiter((vocab.setdefault(t, len(vocab)) for t in ref_tokens), dtype=np.int64, count=len(ref_tokens))
+    hyp = np.fromiter((vocab.setdefault(t, len(vocab)) for t in hyp_tokens), dtype=np.int64, count=len(hyp_tokens))
+    return ref, hyp
+
+
+def _dp_matrix(ref, hyp):
+    m, n = len(ref), len(hyp)
+    dp = np.empty((m + 1, n + 1), dtype=np.int32)
+    offsets = np.arange(n + 1, dtype=np.int32)
+    dp[0] = offsets
+    for i in range(1, m + 1):
+        prev = dp[i - 1]
+        row = np.empty(n + 1, dtype=np.int32)
+        row[0] = i
+        row[1:] = np.minimum(prev[:-1] + (hyp != ref[i - 1]), prev[1:] + 1)
+        # insertions: row[j] = min(row[j], row[j-1] + 1) along the row
+        dp[i] = np.minimum.accumulate(row - offsets) + offsets
+    return dp
+
+
+def edit_ops(ref_tokens, hyp_tokens):
+    """Return (distance, substitutions, deletions, insertions) turning ref into hyp."""
+    ref_tokens, hyp_tokens = list(ref_tokens), list(hyp_tokens)
+    if not ref_tokens:
+        return len(hyp_tokens), 0, 0, len(hyp_tokens)
+    if not hyp_tokens:
+        return len(ref_tokens), 0, len(ref_tokens), 0
+
+    ref, hyp = _encode(ref_tokens, hyp_tokens)
+    dp = _dp_matrix(ref, hyp)
+
+    i, j = len(ref), len(hyp)
+    subs = dels = ins = 0
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and dp[i, j] == dp[i - 1, j - 1] + (ref[i - 1] != hyp[j - 1]):
+            subs += int(ref[i - 1] != hyp[j - 1])
+            i, j = i - 1, j - 1
+        elif i > 0 and dp[i, j] == dp[i - 1, j] + 1:
+            dels += 1
+            i -= 1
+        else:
+            ins += 1
+            j -= 1
+    return int(dp[-1, -1]), subs, dels, ins
+
+
+def levenshtein(a, b):
+    """Levenshtein edit distance between two strings or token lists."""
+    return edit_ops(a, b)[0]
+
+
+def _details(ref_tokens, hyp_tokens):
+    distance, subs, dels, ins = edit_ops(ref_tokens, hyp_tokens)
+    return {
+        "distance": distance,
+        "substitutions": subs,
+        "deletions": dels,
+        "insertions": ins,
+        "ref_len": len(ref_tokens),
+        "rate": distance / max(len(ref_tokens), 1),
+    }
+
+
+def wer_details(ref, hyp):
+    return _details(str(ref).split(), str(hyp).split())
+
+
+def cer_details(ref, hyp, ignore_spaces=True):
+    ref, hyp = str(ref), str(hyp)
+    if ignore_spaces:
+        ref, hyp = ref.replace(" ", ""), hyp.replace(" ", "")
+    return _details(list(ref), list(hyp))
+
+
+def wer(ref, hyp):
+    """WER = edit_distance(words) / number_of_words_in_ground_truth"""
+    return wer_details(ref, hyp)["rate"]
+
+
+def _score_pair(pair):
+    ref, hyp = pair
+    return wer_details(ref, hyp), cer_details(ref, hyp)
+
+
+def score_corpus(refs, hyps, workers=None, min_parallel=200):
+    """
+    Score every (ref, hyp) pair. Returns (word_details, char_details), two
+    lists of dicts in input order. Uses a process pool for large inputs —
+    call it from under `if __name__ == "__main__":` in scripts.
+    """
+    pairs = [("" if r is None else r, "" if h is None else h) for r, h in zip(refs, hyps)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pairs) < min_parallel:
+        scored = [_score_pair(p) for p in pairs]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            scored = list(pool.map(_score_pair, pairs, chunksize=max(1, len(pairs) // (workers * 4))))
+    return [w for w, _ in scored], [c for _, c in scored]
+
+
+def summarize(details):
+    """Corpus-level totals from a list of *_details dicts (micro-averaged rate)."""
+    totals = {k: sum(d[k] for d in details) for k in ("distance", "substitutions", "deletions", "insertions", "ref_len")}
+    totals["rate"] = totals["distance"] / max(totals["ref_len"], 1)
+    totals["mean_rate"] = sum(d["rate"] for d in details) / max(len(details), 1)
+    return totals
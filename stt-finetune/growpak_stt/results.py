@@ -0,0 +1,157 @@
+"""
+Evaluation results as a Parquet dataset (a directory of part files).
+
+ResultsWriter appends rows as they are produced. Rows go to
+part-NNNNN.parquet.tmp, which is closed and renamed to a finished part after
+every `appends_per_part` appends, so a killed run loses at most that many
+batches and never leaves a half-written file among the finished parts.
+Rows that failed (status other than "ok") are retried on resume; readers
+keep only the latest row per file. They only touch the columns asked for,
+and Excel is produced once at the end with export_excel.
+"""
+
+import glob
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+def results_path(output):
+    """Results dataset that sits next to a report path: out.xlsx -> out.parquet"""
+    return os.path.splitext(output)[0] + ".parquet"
+
+
+def text_schema(columns):
+    return pa.schema([(c, pa.string()) for c in columns])
+
+
+KEY = "file_name"
+
+
+def _parts(path):
+    return sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+
+
+def _as_text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return str(value)
+
+
+class ResultsWriter:
+    """
+    Append-as-you-go writer. rows are sequences in schema order; every
+    append() becomes one row group, and every `appends_per_part` appends
+    the current part is finished (closed and renamed) so it survives a crash.
+    """
+
+    def __init__(self, path, schema, appends_per_part=1):
+        self.path = path
+        self.schema = schema
+        self.appends_per_part = max(1, appends_per_part)
+        os.makedirs(path, exist_ok=True)
+        for stale in glob.glob(os.path.join(path, "*.tmp")):
+            os.remove(stale)
+
+        self.next_part = len(_parts(path))
+        self.part_path = self.tmp_path = None
+        self.writer = None
+        self.appends_in_part = 0
+        self.rows_written = 0
+
+    def append(self, rows):
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        arrays = []
+        for field, values in zip(self.schema, columns):
+            if pa.types.is_string(field.type):
+                values = [_as_text(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        table = pa.Table.from_arrays(arrays, schema=self.schema)
+
+        if self.writer is None:
+            self.part_path = os.path.join(self.path, f"part-{self.next_part:05d}.parquet")
+            self.tmp_path = self.part_path + ".tmp"
+            self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+            self.next_part += 1
+        self.writer.write_table(table)
+        self.rows_written += len(rows)
+        self.appends_in_part += 1
+        if self.appends_in_part >= self.appends_per_part:
+            self.close()
+
+    def close(self):
+        """Finish the current part; the next append() starts a new one."""
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp_path, self.part_path)
+            self.writer = None
+            self.appends_in_part = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _dataset(path):
+    # only finished parts; an in-progress .tmp has no footer yet
+    return ds.dataset(_parts(path), format="parquet")
+
+
+def has_results(path):
+    return os.path.isdir(path) and bool(_parts(path))
+
+
+def read_results(path, columns=None, key=KEY):
+    """
+    Whole dataset (or just `columns`) as a DataFrame. A file retried on a
+    later run appears in several parts; only its latest row is kept.
+    """
+    dataset = _dataset(path)
+    if key not in dataset.schema.names:
+        return dataset.to_table(columns=columns).to_pandas()
+    read = None if columns is None else list(dict.fromkeys([*columns, key]))
+    df = dataset.to_table(columns=read).to_pandas()
+    df = df.drop_duplicates(subset=key, keep="last").reset_index(drop=True)
+    return df if columns is None else df[columns]
+
+
+def iter_results(path, columns=None, batch_size=4096):
+    """Lazily yield DataFrames of at most batch_size rows (retried files not deduplicated)."""
+    for batch in _dataset(path).to_batches(columns=columns, batch_size=batch_size):
+        yield batch.to_pandas()
+
+
+def completed_keys(path, column=KEY, status_column="status"):
+    """
+    Values of one column across the finished parts whose status is "ok"
+    (files already transcribed); errors and missing audio are retried.
+    """
+    if not has_results(path):
+        return set()
+    dataset = _dataset(path)
+    if status_column not in dataset.schema.names:
+        return set(dataset.to_table(columns=[column]).column(column).to_pylist())
+    table = dataset.to_table(columns=[column], filter=ds.field(status_column) == "ok")
+    return set(table.column(column).to_pylist())
+
+
+def load_results(report_path, columns=None):
+    """
+    Prefer the Parquet dataset next to an .xlsx report; fall back to the
+    workbook for results produced before the dataset existed.
+    """
+    path = results_path(report_path)
+    if has_results(path):
+        return read_results(path, columns)
+    return pd.read_excel(report_path, usecols=columns)
+
+
+def export_excel(path, xlsx_path, columns=None):
+    read_results(path, columns).to_excel(xlsx_path, index=False, engine="openpyxl")
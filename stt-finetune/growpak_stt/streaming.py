@@ -0,0 +1,149 @@
+"""
+Streaming training data: decode + featurise on the fly.
+
+StreamingSpeechDataset is a torch IterableDataset over (audio path, text)
+rows. Rows pass through a shuffle buffer (only paths and text are held, so
+a large buffer is cheap), then a thread pool decodes audio with ffmpeg and
+computes log-mel features a bounded number of rows ahead of the trainer.
+Nothing is written to disk and only the buffer plus the prefetch window is
+in memory, so the corpus can be far larger than RAM or the feature store.
+
+Row sources are zero-argument callables returning a fresh iterator (one
+per epoch): rows_from_dataset for a saved HF dataset (memory-mapped Arrow)
+and rows_from_manifest for a CSV / JSONL list of new recordings.
+"""
+
+import os
+import json
+import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from torch.utils.data import IterableDataset, get_worker_info
+
+from .audio import load_audio, TARGET_SR
+
+
+# ------------------------------
+# Row sources
+# ------------------------------
+def rows_from_dataset(dataset, audio_column="audio", text_column="text"):
+    """Rows from a datasets.Dataset without decoding its Audio column."""
+    from datasets import Audio
+
+    if isinstance(dataset.features.get(audio_column), Audio):
+        dataset = dataset.cast_column(audio_column, Audio(decode=False))
+    dataset = dataset.select_columns([audio_column, text_column])
+
+    def rows():
+        for row in dataset:
+            audio = row[audio_column]
+            yield {"path": audio["path"] if isinstance(audio, dict) else audio, "text": row[text_column] or ""}
+    return rows
+
+
+def rows_from_manifest(path, audio_column="file_name", text_column="text", audio_folder=None):
+    """Rows from a CSV (read in chunks) or JSONL manifest; relative paths resolve against audio_folder."""
+    base = audio_folder or os.path.dirname(os.path.abspath(path))
+
+    def resolve(p):
+        p = str(p)
+        return p if os.path.isabs(p) else os.path.join(base, p)
+
+    def rows():
+        if path.endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        rec = json.loads(line)
+                        yield {"path": resolve(rec[audio_column]), "text": rec.get(text_column) or ""}
+        else:
+            import pandas as pd
+            for chunk in pd.read_csv(path, usecols=[audio_column, text_column], chunksize=10000):
+                for p, text in zip(chunk[audio_column], chunk[text_column]):
+                    yield {"path": resolve(p), "text": text if isinstance(text, str) else ""}
+    return rows
+
+
+# ------------------------------
+# Dataset
+# ------------------------------
+class StreamingSpeechDataset(IterableDataset):
+    """
+    Yields {"input_features", "labels", "n_frames"} rows for the collator.
+    Rows whose audio fails to decode or whose labels exceed max_label_tokens
+    are skipped (counted in .skipped).
+    """
+
+    def __init__(self, row_source, processor, shuffle_buffer=2000, prefetch=64,
+                 num_workers=None, max_label_tokens=448, seed=42):
+        self.row_source = row_source
+        self.processor = processor
+        self.shuffle_buffer = shuffle_buffer
+        self.prefetch = prefetch
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.max_label_tokens = max_label_tokens
+        self.seed = seed
+        self.epoch = 0
+        self.skipped = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _rows(self):
+        rows = self.row_source()
+        info = get_worker_info()
+        if info is not None and info.num_workers > 1:
+            # each DataLoader worker streams its own slice
+            rows = (r for i, r in enumerate(rows) if i % info.num_workers == info.id)
+        return rows
+
+    def _shuffled(self, rows):
+        if self.shuffle_buffer <= 1:
+            yield from rows
+            return
+        rng = random.Random(self.seed + self.epoch)
+        buffer = []
+        for row in rows:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(row)
+                continue
+            i = rng.randrange(len(buffer))
+            yield buffer[i]
+            buffer[i] = row
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def _prepare(self, row):
+        try:
+            audio = load_audio(row["path"])
+        except Exception as e:
+            print(f"Skipping {row['path']}: {e}")
+            return None
+        labels = self.processor.tokenizer(text_target=row["text"]).input_ids
+        if len(labels) > self.max_label_tokens:
+            return None
+        features = self.processor.feature_extractor(audio, sampling_rate=TARGET_SR, return_tensors="np").input_features[0]
+        return {
+            "input_features": features,
+            "labels": labels,
+            "n_frames": min(len(audio) // 160, features.shape[-1]),
+        }
+
+    def _ready(self, future):
+        item = future.result()
+        if item is None:
+            self.skipped += 1
+        else:
+            yield item
+
+    def __iter__(self):
+        pending = deque()
+        with ThreadPoolExecutor(self.num_workers) as pool:
+            for row in self._shuffled(self._rows()):
+                pending.append(pool.submit(self._prepare, row))
+                if len(pending) >= self.prefetch:
+                    yield from self._ready(pending.popleft())
+            while pending:
+                yield from self._ready(pending.popleft())
+        self.epoch += 1
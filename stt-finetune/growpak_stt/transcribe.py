@@ -0,0 +1,227 @@
+"""
+Batched Whisper transcription for fine-tuned GrowPak checkpoints.
+
+Long clips are cut into fixed windows (chunk_audio); chunks from many files
+are sorted by length and decoded together in batches, then stitched back
+per file with merge_transcripts.
+"""
+
+import os
+import time
+
+import numpy as np
+import torch
+from transformers import GenerationConfig, WhisperConfig, WhisperProcessor, WhisperForConditionalGeneration
+
+from .audio import TARGET_SR as SAMPLE_RATE
+
+FRAMES_PER_SECOND = 100   # Whisper log-mel hop of 160 samples
+
+
+def _seconds(item):
+    """Duration of a waveform (1-D) or of precomputed input features (2-D)."""
+    return item.shape[-1] / (FRAMES_PER_SECOND if item.ndim == 2 else SAMPLE_RATE)
+
+
+# ----------------------------------------------------
+# CHUNKING
+# ----------------------------------------------------
+def chunk_audio(audio, sr, chunk_sec=30, overlap_sec=2):
+    chunk_size = int(chunk_sec * sr)
+    overlap_size = int(overlap_sec * sr)
+    step = chunk_size - overlap_size
+
+    chunks = []
+    for start in range(0, len(audio), step):
+        end = start + chunk_size
+        chunk = audio[start:end]
+        if len(chunk) < sr:  # skip extremely small tail
+            continue
+        chunks.append(chunk)
+
+    return chunks
+
+
+def merge_transcripts(prev, curr, max_overlap_words=25):
+    """
+    Removes duplicated overlap between two consecutive chunk transcripts
+    """
+    prev_words = prev.split()
+    curr_words = curr.split()
+
+    max_check = min(len(prev_words), len(curr_words), max_overlap_words)
+
+    for i in range(max_check, 0, -1):
+        if prev_words[-i:] == curr_words[:i]:
+            return prev + " " + " ".join(curr_words[i:])
+
+    return prev + " " + curr
+
+
+# ----------------------------------------------------
+# MODEL LOADING
+# ----------------------------------------------------
+PRECISIONS = ("fp32", "fp16", "bf16", "int8")
+QUANTIZED_WEIGHTS = "quantized_int8.pt"   # written by training/export_model.py
+
+
+def quantize_int8(model):
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_quantized(model_path):
+    model = WhisperForConditionalGeneration(WhisperConfig.from_pretrained(model_path))
+    model.generation_config = GenerationConfig.from_pretrained(model_path)
+    model = quantize_int8(model)
+    model.load_state_dict(torch.load(os.path.join(model_path, QUANTIZED_WEIGHTS), map_location="cpu"))
+    return model
+
+
+def load_model(model_path, precision="fp32", device=None):
+    """
+    Load processor + model. fp16/bf16 need CUDA (bf16 also works on recent
+    CPUs); int8 applies dynamic quantisation to the Linear layers on CPU.
+    An int8 export from training/export_model.py is detected and always
+    loads as int8 on CPU.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {PRECISIONS}")
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+    processor = WhisperProcessor.from_pretrained(model_path)
+    if os.path.exists(os.path.join(model_path, QUANTIZED_WEIGHTS)):
+        model = _load_quantized(model_path)
+        model.eval()
+        return processor, model, "cpu"
+    model = WhisperForConditionalGeneration.from_pretrained(model_path)
+
+    if precision == "int8":
+        device = "cpu"
+        model = quantize_int8(model)
+    elif precision == "fp16":
+        model = model.half()
+    elif precision == "bf16":
+        model = model.to(torch.bfloat16)
+
+    model.to(device)
+    model.eval()
+    return processor, model, device
+
+
+# ----------------------------------------------------
+# BATCHED TRANSCRIBER
+# ----------------------------------------------------
+class BatchTranscriber:
+    """
+    language=None keeps the checkpoint's own behaviour with no forced decoder
+    ids (how the Roman models are evaluated); language="ur" forces Urdu
+    transcription like the Urdu scripts. decoder replaces the plain
+    model.generate call (see growpak_stt.decoding).
+    """
+
+    def __init__(self, processor, model, device, language=None, batch_size=8,
+                 chunk_sec=25, overlap_sec=0, decoder=None, **generate_kwargs):
+        self.processor = processor
+        self.model = model
+        self.device = device
+        self.language = language
+        self.batch_size = batch_size
+        self.chunk_sec = chunk_sec
+        self.overlap_sec = overlap_sec
+        self.generate_kwargs = generate_kwargs
+        self.decoder = decoder
+        self.dtype = next(model.parameters()).dtype
+
+        model.config.suppress_tokens = []
+        model.generation_config.suppress_tokens = []
+        if language is None:
+            model.config.forced_decoder_ids = None
+            model.generation_config.forced_decoder_ids = None
+
+        self.audio_seconds = 0.0
+        self.generate_seconds = 0.0
+
+    def _input_features(self, chunks):
+        """Batch tensor of log-mel features; precomputed (2-D) chunks are used as-is."""
+        features = [c if c.ndim == 2 else None for c in chunks]
+        wave_idx = [i for i, f in enumerate(features) if f is None]
+        if wave_idx:
+            computed = self.processor(
+                [chunks[i] for i in wave_idx], sampling_rate=SAMPLE_RATE, return_tensors="np"
+            ).input_features
+            for i, f in zip(wave_idx, computed):
+                features[i] = f
+        return torch.from_numpy(np.stack(features)).to(self.device, dtype=self.dtype)
+
+    def _generate(self, chunks):
+        input_features = self._input_features(chunks)
+        kwargs = self._generation_kwargs()
+
+        start = time.perf_counter()
+        with torch.no_grad():
+            if self.decoder is not None:
+                predicted_ids = self.decoder(self.model, input_features, kwargs)
+            else:
+                predicted_ids = self.model.generate(input_features, **kwargs)
+        self.generate_seconds += time.perf_counter() - start
+
+        return self._decode(predicted_ids)
+
+    def _generation_kwargs(self):
+        kwargs = dict(self.generate_kwargs)
+        if self.language:
+            kwargs.update(language=self.language, task="transcribe")
+        return kwargs
+
+    def _decode(self, predicted_ids):
+        return [t.strip() for t in self.processor.tokenizer.batch_decode(predicted_ids, skip_special_tokens=True)]
+
+    def _plan(self, audio):
+        """Split one waveform into (chunk, span) pairs; the span is handed back to _merge."""
+        return [(chunk, None) for chunk in chunk_audio(audio, SAMPLE_RATE, self.chunk_sec, self.overlap_sec)]
+
+    def _merge(self, pieces):
+        """Join one file's (decoded output, span) pairs, in chunk order."""
+        merged_text = ""
+        for text, _ in pieces:
+            if not text:
+                continue
+            merged_text = merge_transcripts(merged_text, text) if merged_text else text
+        return merged_text
+
+    def transcribe(self, audios, durations=None):
+        """
+        Transcribe a list of 16 kHz waveforms; returns one string per input.
+        An item may also be precomputed (n_mels, frames) input features for a
+        clip that fits one window (e.g. from a FeatureStore); pass durations
+        (seconds per item) so padded features don't inflate the throughput.
+        """
+        chunks = []   # (audio index, chunk index, samples or features, span)
+        for a_idx, audio in enumerate(audios):
+            self.audio_seconds += durations[a_idx] if durations else _seconds(audio)
+            if audio.ndim == 2:
+                chunks.append((a_idx, 0, audio, None))
+                continue
+            for c_idx, (chunk, span) in enumerate(self._plan(audio)):
+                chunks.append((a_idx, c_idx, chunk, span))
+
+        # similar lengths together → similar output lengths per generate call
+        chunks.sort(key=lambda c: _seconds(c[2]))
+        outputs = {}
+        for start in range(0, len(chunks), self.batch_size):
+            batch = chunks[start:start + self.batch_size]
+            for (a_idx, c_idx, _, span), out in zip(batch, self._generate([c[2] for c in batch])):
+                outputs[(a_idx, c_idx)] = (out, span)
+
+        results = []
+        for a_idx in range(len(audios)):
+            pieces = []
+            while (a_idx, len(pieces)) in outputs:
+                pieces.append(outputs[(a_idx, len(pieces))])
+            results.append(self._merge(pieces))
+        return results
+
+    @property
+    def realtime_factor(self):
+        """Audio seconds transcribed per second of generate() time."""
+        return self.audio_seconds / self.generate_seconds if self.generate_seconds else 0.0
@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import argparse
+import torch
+from torch.utils.data import DataLoader, RandomSampler
+from datasets import load_from_disk
+from transformers import WhisperProcessor, WhisperForConditionalGeneration
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from growpak_stt.features import Featurizer
+from growpak_stt.batching import LengthBucketSampler, PaddingStats
+from train_urdu import DataCollatorSpeechSeq2SeqWithPadding, FEATURE_STORE_DIR, MAX_LABEL_TOKENS
+
+# ------------------------------
+# Compares random vs length-bucketed batches on a prepared dataset:
+# padding efficiency and training throughput (label tokens / second).
+# --padding-only skips the training steps (no model is loaded) and reports
+# padding over one full epoch of each sampler.
+#
+#   python benchmark_bucketing.py --dataset urdu_asr_dataset --language ur
+#   python benchmark_bucketing.py --dataset roman_asr_dataset_new --language en
+#   python benchmark_bucketing.py --dataset urdu_asr_dataset --padding-only
+# ------------------------------
+
+
+def prepare(dataset, processor):
+    featurizer = Featurizer(processor.feature_extractor, FEATURE_STORE_DIR)
+    paths = [a["path"] if isinstance(a, dict) else a for a in dataset["audio"]]
+    keys = []
+    for i in range(0, len(paths), 64):
+        keys.extend(featurizer(paths[i:i + 64]))
+    store = featurizer.close()
+
+    labels = processor.tokenizer(text_target=[t or "" for t in dataset["text"]]).input_ids
+    rows = [{"feature_key": k, "labels": ids} for k, ids in zip(keys, labels) if len(ids) <= MAX_LABEL_TOKENS]
+    return rows, store
+
+
+def run(name, rows, sampler, collator, model, batch_size, steps, device):
+    loader = DataLoader(rows, batch_size=batch_size, sampler=sampler, collate_fn=collator)
+    optimizer = torch.optim.AdamW([p for p in model.parameters() if p.requires_grad], lr=1e-5)
+    collator.padding_stats.reset()
+    model.train()
+
+    tokens, samples, elapsed = 0, 0, 0.0
+    for step, batch in enumerate(loader):
+        if step >= steps:
+            break
+        batch = {k: v.to(device) for k, v in batch.items()}
+        start = time.perf_counter()
+        loss = model(**batch).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+        if device == "cuda":
+            torch.cuda.synchronize()
+        elapsed += time.perf_counter() - start
+        tokens += int(batch["labels"].ne(-100).sum())
+        samples += batch["labels"].shape[0]
+
+    print(f"{name:>10}: {tokens / elapsed:8.1f} label tokens/s, {samples / elapsed:6.2f} samples/s, "
+          f"{collator.padding_stats}")
+    return tokens / elapsed
+
+
+def padding_report(name, rows, sampler, batch_size, store):
+    """Padding over one epoch of sampler, batched the way the DataLoader would."""
+    stats, order = PaddingStats(), list(sampler)
+    for i in range(0, len(order), batch_size):
+        batch = [rows[j] for j in order[i:i + batch_size]]
+        lengths = [len(r["labels"]) for r in batch]
+        stats.update(lengths, max(lengths), [store.n_frames(r["feature_key"]) for r in batch])
+    print(f"{name:>10}: {stats}")
+    return stats.label_efficiency
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", default="urdu_asr_dataset")
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--model", default="openai/whisper-small")
+    parser.add_argument("--language", default="ur")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=30)
+    parser.add_argument("--padding-only", action="store_true", help="Report padding only; no training steps.")
+    args = parser.parse_args()
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    processor = WhisperProcessor.from_pretrained(args.model, language=args.language, task="transcribe")
+    rows, store = prepare(load_from_disk(args.dataset)[args.split], processor)
+    collator = DataCollatorSpeechSeq2SeqWithPadding(processor, store, PaddingStats())
+
+    results = {}
+    for name in ("random", "bucketed"):
+        if name == "random":
+            sampler = RandomSampler(rows, generator=torch.Generator().manual_seed(42))
+        else:
+            sampler = LengthBucketSampler(
+                [len(r["labels"]) for r in rows],
+                [store.n_frames(r["feature_key"]) for r in rows],
+                batch_size=args.batch_size,
+            )
+            sampler.check_chunking()
+        if args.padding_only:
+            results[name] = padding_report(name, rows, sampler, args.batch_size, store)
+            continue
+        model = WhisperForConditionalGeneration.from_pretrained(args.model).to(device)
+        results[name] = run(name, rows, sampler, collator, model, args.batch_size, args.steps, device)
+        del model
+
+    if args.padding_only:
+        print(f"Random batches need {results['bucketed'] / results['random']:.2f}x the label slots of bucketed ones")
+    else:
+        print(f"Bucketed / random throughput: {results['bucketed'] / results['random']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
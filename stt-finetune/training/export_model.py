@@ -0,0 +1,220 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+from datetime import datetime
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from growpak_stt.audio import load_audio, TARGET_SR
+from growpak_stt.metrics import score_corpus, summarize
+from growpak_stt.results import load_results
+from growpak_stt.transcribe import BatchTranscriber, QUANTIZED_WEIGHTS, load_model, quantize_int8
+
+# ------------------------------
+# Post-training export of a fine-tuned checkpoint for CPU hosting.
+#
+# Writes quantized variants next to each other under --out-dir, checks each
+# one's WER against the ground truth in an accuracy workbook, and records
+# size, load time and real-time factor in export_manifest.json.
+#
+#   int8       torch dynamic int8 (Linear layers); load with growpak_stt.transcribe.load_model
+#   fp16       half-precision HF checkpoint (evaluated only on CUDA)
+#   ct2-int8   CTranslate2 int8 (needs `pip install ctranslate2`)
+#
+#   python export_model.py --model ../models/whisper_urdu_finetuned_v1.1 --language ur \
+#       --gt "../Inference/accuracy/model_accuracy_v1.1(urdu).xlsx"
+# ------------------------------
+
+VARIANTS = ("int8", "fp16", "ct2-int8")
+MANIFEST_FILE = "export_manifest.json"
+
+
+def dir_size_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total / 2**20
+
+
+# ------------------------------
+# Exporters
+# ------------------------------
+def export_int8(model_path, out_path):
+    processor, model, _ = load_model(model_path, "fp32", device="cpu")
+    model = quantize_int8(model)
+    os.makedirs(out_path, exist_ok=True)
+    model.config.save_pretrained(out_path)
+    model.generation_config.save_pretrained(out_path)
+    processor.save_pretrained(out_path)
+    torch.save(model.state_dict(), os.path.join(out_path, QUANTIZED_WEIGHTS))
+
+
+def export_fp16(model_path, out_path):
+    processor, model, _ = load_model(model_path, "fp32", device="cpu")
+    model.half().save_pretrained(out_path)
+    processor.save_pretrained(out_path)
+
+
+def export_ct2(model_path, out_path, quantization="int8"):
+    from ctranslate2.converters import TransformersConverter
+
+    TransformersConverter(model_path, copy_files=["tokenizer.json", "preprocessor_config.json"]).convert(
+        out_path, quantization=quantization, force=True
+    )
+    # the processor is needed for features + decoding
+    from transformers import WhisperProcessor
+    WhisperProcessor.from_pretrained(model_path).save_pretrained(out_path)
+
+
+# ------------------------------
+# Evaluation
+# ------------------------------
+def load_eval_set(gt_path, audio_folder, limit):
+    df = load_results(gt_path)
+    df = df[df["ground_truth"].notna()]
+    items = []
+    for _, row in df.iterrows():
+        path = os.path.join(audio_folder, str(row["file_name"]))
+        if os.path.exists(path):
+            items.append((load_audio(path), str(row["ground_truth"])))
+        if len(items) >= limit:
+            break
+    return items
+
+
+def evaluate_hf(model_path, precision, items, language, batch_size):
+    start = time.perf_counter()
+    processor, model, device = load_model(model_path, precision)
+    load_seconds = time.perf_counter() - start
+
+    transcriber = BatchTranscriber(processor, model, device, language=language, batch_size=batch_size)
+    predictions = transcriber.transcribe([a for a, _ in items])
+    del model
+    return predictions, load_seconds, transcriber.realtime_factor
+
+
+def evaluate_ct2(model_path, items, language, batch_size):
+    import ctranslate2
+    from transformers import WhisperProcessor
+
+    start = time.perf_counter()
+    processor = WhisperProcessor.from_pretrained(model_path)
+    model = ctranslate2.models.Whisper(model_path, device="cpu", compute_type="int8")
+    load_seconds = time.perf_counter() - start
+
+    prompt = ["<|startoftranscript|>"]
+    if language:
+        prompt += [f"<|{language}|>", "<|transcribe|>"]
+    prompt.append("<|notimestamps|>")
+
+    # one 30 s window per file, like the other variants for clips under 30 s
+    predictions, generate_seconds = [], 0.0
+    for i in range(0, len(items), batch_size):
+        batch = [a[:30 * TARGET_SR] for a, _ in items[i:i + batch_size]]
+        features = processor(batch, sampling_rate=TARGET_SR, return_tensors="np").input_features
+        t = time.perf_counter()
+        results = model.generate(ctranslate2.StorageView.from_array(features), [prompt] * len(batch), beam_size=2)
+        generate_seconds += time.perf_counter() - t
+        predictions += [processor.tokenizer.decode(r.sequences_ids[0], skip_special_tokens=True).strip()
+                        for r in results]
+
+    audio_seconds = sum(min(len(a), 30 * TARGET_SR) for a, _ in items) / TARGET_SR
+    return predictions, load_seconds, audio_seconds / generate_seconds if generate_seconds else 0.0
+
+
+def score(predictions, items):
+    word, char = score_corpus([gt for _, gt in items], predictions)
+    return summarize(word)["mean_rate"], summarize(char)["mean_rate"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export quantized variants of a fine-tuned Whisper checkpoint.")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--out-dir", default=None, help="Default: <model>_export")
+    parser.add_argument("--variant", action="append", choices=VARIANTS, default=None)
+    parser.add_argument("--gt", required=True, help="Accuracy workbook with file_name / ground_truth columns.")
+    parser.add_argument("--audio-folder", default="data/audio")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--limit", type=int, default=100, help="Ground-truth files used for the WER check.")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--max-wer-drift", type=float, default=0.02,
+                        help="Largest WER increase over the fp32 model that still passes.")
+    args = parser.parse_args()
+
+    out_dir = args.out_dir or args.model.rstrip("/\\") + "_export"
+    os.makedirs(out_dir, exist_ok=True)
+    variants = args.variant or ["int8", "fp16"]
+
+    items = load_eval_set(args.gt, args.audio_folder, args.limit)
+    print(f"Evaluating on {len(items)} files from {args.gt}")
+
+    predictions, load_seconds, rtf = evaluate_hf(args.model, "fp32", items, args.language, args.batch_size)
+    base_wer, base_cer = score(predictions, items)
+    manifest = {
+        "source": os.path.abspath(args.model),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "eval": {"ground_truth": os.path.abspath(args.gt), "files": len(items)},
+        "variants": {
+            "fp32": {
+                "path": os.path.abspath(args.model),
+                "size_mb": round(dir_size_mb(args.model), 1),
+                "load_seconds": round(load_seconds, 2),
+                "realtime_factor": round(rtf, 2),
+                "wer": round(base_wer, 4),
+                "cer": round(base_cer, 4),
+            }
+        },
+    }
+    print(f"fp32: WER {base_wer:.4f}, {rtf:.2f} audio-s/s")
+
+    for variant in variants:
+        path = os.path.join(out_dir, variant)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        try:
+            if variant == "int8":
+                export_int8(args.model, path)
+            elif variant == "fp16":
+                export_fp16(args.model, path)
+            else:
+                export_ct2(args.model, path)
+        except ImportError as e:
+            print(f"{variant}: skipped ({e})")
+            continue
+
+        entry = {"path": os.path.abspath(path), "size_mb": round(dir_size_mb(path), 1)}
+        if variant == "fp16" and not torch.cuda.is_available():
+            entry["note"] = "not evaluated: fp16 inference needs CUDA"
+        else:
+            if variant == "ct2-int8":
+                predictions, load_seconds, rtf = evaluate_ct2(path, items, args.language, args.batch_size)
+            else:
+                predictions, load_seconds, rtf = evaluate_hf(path, variant, items, args.language, args.batch_size)
+            wer, cer = score(predictions, items)
+            entry.update(
+                load_seconds=round(load_seconds, 2),
+                realtime_factor=round(rtf, 2),
+                wer=round(wer, 4),
+                cer=round(cer, 4),
+                wer_drift=round(wer - base_wer, 4),
+                passed=wer - base_wer <= args.max_wer_drift,
+            )
+        manifest["variants"][variant] = entry
+        print(f"{variant}: {json.dumps(entry)}")
+
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Manifest written to {os.path.join(out_dir, MANIFEST_FILE)}")
+
+    failed = [v for v, e in manifest["variants"].items() if e.get("passed") is False]
+    if failed:
+        print(f"WER drift above {args.max_wer_drift} for: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
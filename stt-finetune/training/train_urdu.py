@@ -1,148 +1,111 @@
 import os
-import subprocess
+import sys
 import numpy as np
 import torch
-import pandas as pd
 from datasets import load_from_disk
 from transformers import (
     WhisperProcessor,
     WhisperForConditionalGeneration,
     Seq2SeqTrainingArguments,
-    Seq2SeqTrainer,
-    TrainerCallback,
 )
 from dataclasses import dataclass
 from typing import Any, Dict, List, Union
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from growpak_stt.features import Featurizer
+from growpak_stt.batching import BucketedSeq2SeqTrainer, LengthBucketSampler, PaddingStats
+from growpak_stt.callbacks import ProfilingCallback
+from growpak_stt.streaming import StreamingSpeechDataset, rows_from_dataset, rows_from_manifest
+from growpak_stt.lora import apply_lora, export_adapter
+
 # ------------------------------
 # Configuration  
 # ------------------------------
 MODEL_NAME = "openai/whisper-small"
 DATASET_PATH = "urdu_asr_dataset"
-TARGET_SR = 16000
-CACHE_DIR = "audio_cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
+FEATURE_STORE_DIR = "feature_store"   # memory-mapped log-mel features (growpak_stt.feature_store)
+PREPROCESS_BATCH = 64
+NUM_WORKERS = os.cpu_count()
+BUCKET_BY_LENGTH = True   # group batches by label length / duration to cut decoder padding
+
+# Streaming mode: decode + featurise on the fly (prefetching thread pool and
+# shuffle buffer) instead of building the feature store first. For corpora
+# larger than RAM / disk; training then runs for max_steps.
+STREAMING = False
+STREAM_MANIFEST = None    # CSV / JSONL (file_name, text) of recordings to stream instead of DATASET_PATH's train split
+SHUFFLE_BUFFER = 2000
+
+# LoRA mode (needs peft): train low-rank adapters on a frozen base model.
+# The adapter is saved on its own (a few MB, served by
+# growpak_stt.lora.AdapterSwitcher) unless MERGE_ADAPTER folds it into a full checkpoint.
+USE_LORA = False
+LORA_RANK = 32
+LORA_INCLUDE_ENCODER = False   # decoder attention only by default
+MERGE_ADAPTER = False
+LORA_OUTPUT_DIR = "../models/whisper_urdu_lora_v1.1"
 
 MAX_LABEL_TOKENS = 448  # Whisper training limit
 
-# ------------------------------
-# FFmpeg audio loader + caching
-# ------------------------------
-def ffmpeg_load(file_path, target_sr=TARGET_SR):
-    cache_file = os.path.join(CACHE_DIR, os.path.basename(file_path) + ".npy")
-
-    if os.path.exists(cache_file):
-        return np.load(cache_file)
-
-    command = [
-        "ffmpeg",
-        "-i", file_path,
-        "-f", "f32le",
-        "-ac", "1",
-        "-ar", str(target_sr),
-        "-"
-    ]
-    out = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-    audio = np.frombuffer(out.stdout, dtype=np.float32)
-
-    np.save(cache_file, audio)
-    return audio
-
-
 # ------------------------------
 # Data collator
 # ------------------------------
 @dataclass
 class DataCollatorSpeechSeq2SeqWithPadding:
     processor: Any
+    feature_store: Any = None   # FeatureStore; rows then carry "feature_key" instead of features
+    padding_stats: Any = None   # PaddingStats, updated per batch when set
 
     def __call__(self, features: List[Dict[str, Union[List[int], torch.Tensor]]]) -> Dict[str, torch.Tensor]:
-        input_features = [{"input_features": f["input_features"]} for f in features]
         label_features = [{"input_ids": f["labels"]} for f in features]
 
-        batch = self.processor.feature_extractor.pad(input_features, return_tensors="pt")
+        if self.feature_store is not None:
+            batch = {"input_features": torch.from_numpy(
+                np.stack([self.feature_store.get(f["feature_key"]) for f in features])
+            )}
+        else:
+            input_features = [{"input_features": f["input_features"]} for f in features]
+            batch = self.processor.feature_extractor.pad(input_features, return_tensors="pt")
         labels_batch = self.processor.tokenizer.pad(label_features, return_tensors="pt")
         labels = labels_batch["input_ids"].masked_fill(labels_batch.attention_mask.ne(1), -100)
         batch["labels"] = labels
+
+        if self.padding_stats is not None:
+            frames = None
+            if self.feature_store is not None:
+                frames = [self.feature_store.n_frames(f["feature_key"]) for f in features]
+            elif "n_frames" in features[0]:   # streaming rows
+                frames = [f["n_frames"] for f in features]
+            self.padding_stats.update(
+                [len(f["labels"]) for f in features], labels.shape[1], frames, batch["input_features"].shape[-1]
+            )
         return batch
 
-# =============================================================
-# ADD: Training Logger Callback → outputs training_logs.csv
-# =============================================================
-class CSVLoggerCallback(TrainerCallback):
-    def __init__(self, output_dir):
-        self.output_dir = output_dir
-        self.logs = []
-
-    def on_log(self, args, state, control, logs=None, **kwargs):
-        if logs:
-            logs["step"] = state.global_step
-            logs["epoch"] = state.epoch
-            self.logs.append(logs)
-
-    def on_train_end(self, args, state, control, **kwargs):
-        df = pd.DataFrame(self.logs)
-        save_path = os.path.join(self.output_dir, "training_logs.csv")
-        df.to_csv(save_path, index=False)
-        print(f"\n✅ Training logs saved to: {save_path}\n")
-        
 # ------------------------------
-# Main training
+# Feature-store preprocessing (default mode)
 # ------------------------------
-def main():
-    print("Loading dataset...")
-    dataset = load_from_disk(DATASET_PATH)
-
-    print("Loading model + processor...")
-    processor = WhisperProcessor.from_pretrained(
-        MODEL_NAME,
-        language="ur",             
-        task="transcribe" 
-    )
-
-    model = WhisperForConditionalGeneration.from_pretrained(MODEL_NAME)
-
-    # Freeze encoder for faster training
-    # for param in model.model.encoder.parameters():
-    #     param.requires_grad = False
-
-    # Force decoder language = Urdu
-    model.config.forced_decoder_ids = processor.get_decoder_prompt_ids(language="ur", task="transcribe")
-    # model.config.suppress_tokens = []   # no character blocking
-
-    # if processor.tokenizer.pad_token is None:
-    #     processor.tokenizer.pad_token = processor.tokenizer.eos_token
-
-    # use_bf16 = torch.cuda.is_available()
-    # if not use_bf16:
-    #     print("CUDA not available — running on CPU/no bf16.")
-
+def prepare_feature_store(dataset, processor):
     skipped_long = 0
+    featurizer = Featurizer(processor.feature_extractor, FEATURE_STORE_DIR, num_workers=NUM_WORKERS)
 
     # --------------------------
-    # Preprocess function
+    # Preprocess function (batched: parallel decode, features go to the store)
     # --------------------------
     def preprocess(batch):
         nonlocal skipped_long
 
-        audio_field = batch["audio"]
-        path = audio_field["path"] if isinstance(audio_field, dict) else audio_field
-
-        waveform = ffmpeg_load(path)
-        inputs = processor.feature_extractor(waveform, sampling_rate=TARGET_SR)
-        batch["input_features"] = inputs.input_features[0]
+        paths = [a["path"] if isinstance(a, dict) else a for a in batch["audio"]]
+        batch["feature_key"] = featurizer(paths)
 
-        text = batch.get("text") or ""
-        enc = processor.tokenizer(text_target=text)
-        ids = enc.input_ids
-
-        if len(ids) > MAX_LABEL_TOKENS:
-            skipped_long += 1
-            batch["labels"] = []  # placeholder
-            batch["skip"] = True
-        else:
-            batch["labels"] = ids
-            batch["skip"] = False
+        texts = batch.get("text") or [""] * len(paths)
+        batch["labels"], batch["skip"] = [], []
+        for ids in processor.tokenizer(text_target=[t or "" for t in texts]).input_ids:
+            if len(ids) > MAX_LABEL_TOKENS:
+                skipped_long += 1
+                batch["labels"].append([])  # placeholder
+                batch["skip"].append(True)
+            else:
+                batch["labels"].append(ids)
+                batch["skip"].append(False)
 
         return batch
 
@@ -154,8 +117,11 @@ def main():
     dataset = dataset.map(
         preprocess,
         remove_columns=cols_to_remove,
-        num_proc=1,
+        batched=True,
+        batch_size=PREPROCESS_BATCH,
     )
+    feature_store = featurizer.close()
+    print(f"Feature store: {featurizer.hits} reused, {featurizer.misses} computed, {len(feature_store)} clips")
 
     # Filter skipped
     before = len(dataset["train"])
@@ -165,8 +131,61 @@ def main():
     print(f"Skipped long samples (>448 tokens): {skipped_long}")
     print(f"Train set reduced: {before} → {after}")
 
-    # Remove helper
-    dataset = dataset.remove_columns(["skip"])
+    # Keep only what the collator reads (no Audio column decoding per row)
+    dataset = dataset.remove_columns(
+        [c for c in dataset["train"].column_names if c not in ("feature_key", "labels")]
+    )
+    return dataset["train"], dataset["validation"], feature_store
+
+
+# ------------------------------
+# Main training
+# ------------------------------
+def main():
+    print("Loading dataset...")
+    dataset = load_from_disk(DATASET_PATH)
+
+    print("Loading model + processor...")
+    processor = WhisperProcessor.from_pretrained(
+        MODEL_NAME,
+        language="ur",             
+        task="transcribe" 
+    )
+
+    model = WhisperForConditionalGeneration.from_pretrained(MODEL_NAME)
+
+    # Freeze encoder for faster training
+    # for param in model.model.encoder.parameters():
+    #     param.requires_grad = False
+
+    # Force decoder language = Urdu
+    model.config.forced_decoder_ids = processor.get_decoder_prompt_ids(language="ur", task="transcribe")
+    # model.config.suppress_tokens = []   # no character blocking
+
+    # if processor.tokenizer.pad_token is None:
+    #     processor.tokenizer.pad_token = processor.tokenizer.eos_token
+
+    # use_bf16 = torch.cuda.is_available()
+    # if not use_bf16:
+    #     print("CUDA not available — running on CPU/no bf16.")
+
+    if USE_LORA:
+        model = apply_lora(model, r=LORA_RANK, include_encoder=LORA_INCLUDE_ENCODER)
+
+    if STREAMING:
+        # decode + featurise on the fly; nothing is preprocessed up front
+        source = rows_from_manifest(STREAM_MANIFEST) if STREAM_MANIFEST else rows_from_dataset(dataset["train"])
+        train_dataset = StreamingSpeechDataset(
+            source, processor, shuffle_buffer=SHUFFLE_BUFFER, num_workers=NUM_WORKERS,
+            max_label_tokens=MAX_LABEL_TOKENS,
+        )
+        eval_dataset = StreamingSpeechDataset(
+            rows_from_dataset(dataset["validation"]), processor, shuffle_buffer=0, num_workers=NUM_WORKERS,
+            max_label_tokens=MAX_LABEL_TOKENS,
+        )
+        feature_store = None
+    else:
+        train_dataset, eval_dataset, feature_store = prepare_feature_store(dataset, processor)
 
     # --------------------------
     # Training args
@@ -176,7 +195,7 @@ def main():
         per_device_train_batch_size=8,
         per_device_eval_batch_size=8,
         gradient_accumulation_steps=2,
-        learning_rate=1e-5,
+        learning_rate=1e-3 if USE_LORA else 1e-5,
         warmup_steps=100,
         max_steps=1000,
         eval_steps=100,
@@ -185,31 +204,53 @@ def main():
         bf16=True,
         predict_with_generate=True,
         generation_max_length=225,
+        remove_unused_columns=False,   # keep "feature_key" for the collator
+        label_names=["labels"],        # not inferable from a peft-wrapped model
         # push_to_hub=False,
     )
 
-    collator = DataCollatorSpeechSeq2SeqWithPadding(processor)
+    padding_stats = PaddingStats()
+    collator = DataCollatorSpeechSeq2SeqWithPadding(processor, feature_store, padding_stats)
+
+    # training_logs.csv + per-step training_profile.csv (time, throughput, data wait, memory)
+    profiler = ProfilingCallback("../models/whisper_urdu_finetuned_v1.1")
+
+    train_sampler = None
+    if BUCKET_BY_LENGTH and not STREAMING:   # needs every length up front
+        train_sampler = LengthBucketSampler(
+            [len(ids) for ids in train_dataset["labels"]],
+            [feature_store.n_frames(k) for k in train_dataset["feature_key"]],
+            batch_size=training_args.per_device_train_batch_size,
+            seed=training_args.seed,
+        )
+        train_sampler.check_chunking()
 
     # --------------------------
     # Trainer
     # --------------------------
-    trainer = Seq2SeqTrainer(
+    trainer = BucketedSeq2SeqTrainer(
         model=model,
         args=training_args,
-        train_dataset=dataset["train"],
-        eval_dataset=dataset["validation"],
-        data_collator=collator,
+        train_dataset=train_dataset,
+        eval_dataset=eval_dataset,
+        data_collator=profiler.wrap_collator(collator),
         tokenizer=processor.tokenizer,
-        callbacks=[CSVLoggerCallback("../models/whisper_urdu_finetuned_v1.1")],
+        train_sampler=train_sampler,
+        callbacks=[profiler],
     )
 
     # Train
     print("Starting fine-tuning…")
     trainer.train()
-
-    # Save model + processor so check.py loads correctly
-    trainer.save_model("../models/whisper_urdu_finetuned_v1.1")
-    processor.save_pretrained("../models/whisper_urdu_finetuned_v1.1")
+    print(f"Padding: {padding_stats}")
+
+    if USE_LORA:
+        export_adapter(model, LORA_OUTPUT_DIR, processor, MODEL_NAME, merge=MERGE_ADAPTER, language="ur")
+        print(f"Adapter saved to {LORA_OUTPUT_DIR} ({'merged' if MERGE_ADAPTER else 'adapter only'})")
+    else:
+        # Save model + processor so check.py loads correctly
+        trainer.save_model("../models/whisper_urdu_finetuned_v1.1")
+        processor.save_pretrained("../models/whisper_urdu_finetuned_v1.1")
 
     print("Training complete!")
 